@@ -0,0 +1,59 @@
+"""Benchmark: prompt history size and build time vs session length.
+
+Compares the old "last 5 interactions, verbatim" context with the
+token-budgeted ContextBuilder on histories whose tool results hold whole
+files, and times relevance-ranked selection against an incrementally
+maintained HistoryIndex.
+
+Run with:  python benchmarks/bench_context.py
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kazuri.context import ContextBuilder, estimate_tokens
+from kazuri.retrieval import HistoryIndex
+from kazuri.session import Session
+
+
+def make_history(count):
+    file_contents = "def handler(event):\n    return process(event)\n" * 2000  # ~90KB
+    return [{
+        "timestamp": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}",
+        "task": f"Refactor module_{i}.py to use the new API",
+        "response": f"I've updated module_{i}.py.\n\n" + "Explanation of the change. " * 40,
+        "tool_uses": [{"tool": "read_file", "parameters": {"path": f"module_{i}.py"}, "result": file_contents}]
+    } for i in range(count)]
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return value, best
+
+
+def main():
+    builder = ContextBuilder()
+    print(f"{'history':>8}{'legacy tokens':>16}{'legacy ms':>12}{'budgeted tokens':>18}{'budgeted ms':>14}{'summarized':>12}{'index ms':>10}{'ranked ms':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        session = Session(session_dir=tmp)
+        for count in (1, 5, 20, 100, 1000):
+            session.history = make_history(count)
+            legacy, legacy_time = best_of(lambda: session.get_recent_context(limit=5))
+            (summary, messages), budget_time = best_of(lambda: builder.build(session.history))
+            budgeted = estimate_tokens(summary) + sum(estimate_tokens(m["content"]) for m in messages)
+            index, index_time = best_of(lambda: HistoryIndex(session.history), repeat=1)
+            _, ranked_time = best_of(lambda: builder.build(session.history, "update module_7.py", index))
+            print(f"{count:>8}{estimate_tokens(legacy):>16}{legacy_time * 1e3:>12.2f}"
+                  f"{budgeted:>18}{budget_time * 1e3:>14.2f}{len(summary.splitlines()):>12}"
+                  f"{index_time * 1e3:>10.1f}{ranked_time * 1e3:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
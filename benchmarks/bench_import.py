@@ -0,0 +1,85 @@
+"""Import-time benchmark for the CLI with an enforceable budget.
+
+Runs `python -X importtime -c "import kazuri.cli"` several times in an empty
+directory and reports the median cumulative import time of kazuri.cli. Exits
+non-zero if the median exceeds the budget, if a module that should be loaded
+lazily is imported, or if importing creates any files.
+
+Run with:  python benchmarks/bench_import.py [--runs N] [--budget-ms MS]
+The budget can also be set with KAZURI_IMPORT_BUDGET_MS.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_BUDGET_MS = 250.0
+
+# Modules that must only be imported once a command actually needs them
+LAZY_MODULES = [
+    "boto3", "botocore", "dotenv", "rich.markdown", "rich.live", "rich.prompt",
+    "concurrent.futures", "multiprocessing", "sqlite3", "kazuri.search", "kazuri.reader"
+]
+
+CHECK = (
+    "import sys, kazuri.cli; "
+    "print(','.join(m for m in {!r} if m in sys.modules))".format(LAZY_MODULES)
+)
+
+
+def measure_once(cwd: str) -> float:
+    """Return the cumulative import time of kazuri.cli in milliseconds."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import kazuri.cli"],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "kazuri.cli":
+            return int(parts[1]) / 1000
+    raise RuntimeError("kazuri.cli not found in -X importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument(
+        "--budget-ms", type=float,
+        default=float(os.getenv("KAZURI_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+    )
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as cwd:
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        loaded = subprocess.run(
+            [sys.executable, "-c", CHECK], cwd=cwd, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        if loaded:
+            failures.append(f"eagerly imported: {loaded}")
+
+        times = [measure_once(cwd) for _ in range(args.runs)]
+        created = os.listdir(cwd)
+        if created:
+            failures.append(f"import created files: {', '.join(sorted(created))}")
+
+    median = statistics.median(times)
+    print(f"import kazuri.cli: median {median:.1f}ms, min {min(times):.1f}ms, "
+          f"max {max(times):.1f}ms over {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.1f}ms exceeds budget {args.budget_ms:.0f}ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark: search_files with the trigram index vs scanning every file.
+
+Uses the synthetic tree from bench_search.py. Times building the index,
+an indexed search (which includes the incremental update's walk and
+stat), the same after editing 100 files, and a pattern without literals,
+which falls back to the scan.
+
+Run with:  python benchmarks/bench_index.py [file count]
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_search import PATTERN, make_tree, timed
+from kazuri.search import search_files
+from kazuri.trigram import TrigramIndex
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / ".git").mkdir()
+        make_tree(root, count)
+        # Backdate the files so the first update trusts all of them
+        for path in root.rglob("*.py"):
+            os.utime(path, (1_000_000, 1_000_000))
+        search = lambda pattern, **kwargs: search_files(str(root), pattern, max_results=None, workers=1, **kwargs)
+
+        (scanned, _), scan_time = timed(lambda: search(PATTERN, use_index=False))
+        print(f"{'scan':<32}{scan_time:>8.2f}s  {len(scanned):>5} matches")
+
+        with TrigramIndex(str(root)) as index:
+            _, build_time = timed(index.update)
+        size = (root / ".kazuri_cache" / "trigrams.db").stat().st_size
+        print(f"{'build index':<32}{build_time:>8.2f}s  {size / 1e6:.1f} MB")
+
+        (indexed, _), indexed_time = timed(lambda: search(PATTERN))
+        assert indexed == scanned
+        print(f"{'indexed search':<32}{indexed_time:>8.2f}s  {len(indexed):>5} matches")
+
+        for i, path in enumerate(sorted(root.glob("src/pkg1/*/*.py"))[:100]):
+            path.write_text(path.read_text() + f"\ndef handle_edit{i}(event):\n    pass\n")
+        (indexed, _), indexed_time = timed(lambda: search(PATTERN))
+        print(f"{'indexed, 100 files edited':<32}{indexed_time:>8.2f}s  {len(indexed):>5} matches")
+
+        (_, _), fallback_time = timed(lambda: search(r"\w+\(event\)"))
+        print(f"{'no literals (falls back)':<32}{fallback_time:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
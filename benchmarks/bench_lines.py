@@ -0,0 +1,50 @@
+"""Benchmark: line numbers and context for a file with 10k matches.
+
+Compares the old per-match approach (count newlines from the start of
+the file and split the whole file for the context of every match) with
+search_text, which builds one line-offset table and bisects it.
+
+Run with:  python benchmarks/bench_lines.py [match count]
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kazuri.search import search_text
+
+
+def legacy_search(regex, content):
+    results = []
+    for match in regex.finditer(content):
+        lines = content.split('\n')
+        line_num = content.count('\n', 0, match.start())
+        start = max(0, line_num - 2)
+        end = min(len(lines), line_num + 3)
+        results.append((line_num + 1, '\n'.join(lines[start:end])))
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    content = "".join(f"value_{i} = compute({i})\n    # padding line\n" for i in range(count))
+    regex = re.compile(r"compute\(\d+\)")
+
+    start = time.perf_counter()
+    legacy = legacy_search(regex, content)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = search_text(regex, content, "bench.py")
+    indexed_time = time.perf_counter() - start
+
+    assert [(r['line'], r['context']) for r in results] == legacy
+    print(f"{len(results)} matches in {len(content) // 1024} KB")
+    print(f"{'per-match split + count':<26}{legacy_time * 1e3:>10.1f} ms")
+    print(f"{'line-offset table':<26}{indexed_time * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
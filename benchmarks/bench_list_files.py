@@ -0,0 +1,45 @@
+"""Benchmark: list_files on the synthetic 100k-file tree from bench_search.py.
+
+Compares the old rglob + is_file + relative_to + sort listing with the
+scandir walker: the whole tree, the first page and a page resumed from a
+cursor deep in the tree.
+
+Run with:  python benchmarks/bench_list_files.py [file count]
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_search import make_tree, timed
+from kazuri.tools import ToolManager
+
+
+def legacy_list(root):
+    return sorted(str(p.relative_to(root)) for p in root.rglob("*") if p.is_file())
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / ".git").mkdir()
+        make_tree(root, count)
+        manager = ToolManager()
+
+        legacy, legacy_time = timed(lambda: legacy_list(root))
+        print(f"{'legacy rglob + sort':<30}{legacy_time * 1e3:>10.1f} ms  {len(legacy):>6} files (incl. ignored)")
+        full, full_time = timed(lambda: manager.list_files(tmp, recursive=True, limit=None))
+        print(f"{'walker, whole tree':<30}{full_time * 1e3:>10.1f} ms  {len(full['files']):>6} files")
+        first, first_time = timed(lambda: manager.list_files(tmp, recursive=True))
+        print(f"{'walker, first page':<30}{first_time * 1e3:>10.1f} ms  {len(first['files']):>6} files")
+        cursor = full["files"][len(full["files"]) * 3 // 4]
+        page, page_time = timed(lambda: manager.list_files(tmp, recursive=True, cursor=cursor))
+        print(f"{'walker, page at 75%':<30}{page_time * 1e3:>10.1f} ms  {len(page['files']):>6} files")
+        shallow, shallow_time = timed(lambda: manager.list_files(tmp, recursive=True, max_depth=2))
+        print(f"{'walker, max_depth=2':<30}{shallow_time * 1e3:>10.1f} ms  {len(shallow['files']):>6} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Micro-benchmark: streaming ToolCallParser vs the original process_tool_use.
+
+Run with:  python benchmarks/bench_parser.py
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kazuri.parser import ToolCallParser, parse_tool_calls
+
+
+def legacy_extract_code_block(text, start_idx):
+    lines = text[start_idx:].split('\n')
+    code_lines = []
+    end_idx = start_idx
+    for i, line in enumerate(lines):
+        if line.strip() and not line.strip().startswith('</'):
+            code_lines.append(line)
+            end_idx = start_idx + sum(len(l) + 1 for l in lines[:i+1])
+        elif line.strip().startswith('</'):
+            break
+    return '\n'.join(code_lines), end_idx
+
+
+def legacy_process_tool_use(response):
+    """The str.find based parser process_tool_use used before ToolCallParser."""
+    if "<tool_name>" in response:
+        tool_start = response.find("<tool_name>")
+        tool_end = response.find("</tool_name>")
+        if tool_start != -1 and tool_end != -1:
+            tool_name = response[tool_start + 11:tool_end].strip()
+            params = {}
+            param_start = response.find("<", tool_end)
+            while param_start != -1:
+                param_end = response.find(">", param_start)
+                if param_end == -1:
+                    break
+                param_name = response[param_start + 1:param_end]
+                if param_name.startswith('/'):
+                    param_start = response.find("<", param_end)
+                    continue
+                content_start = param_end + 1
+                content_end = response.find(f"</{param_name}>", content_start)
+                if content_end == -1:
+                    break
+                params[param_name] = response[content_start:content_end].strip()
+                param_start = response.find("<", content_end)
+            return {"tool": tool_name, "parameters": params}
+
+    write_file_match = re.search(r'<write_file>\s*filename:\s*([^\n]+)', response)
+    if write_file_match:
+        code, _ = legacy_extract_code_block(response, write_file_match.end())
+        return {
+            "tool": "write_to_file",
+            "parameters": {"path": write_file_match.group(1).strip(), "content": code.strip()}
+        }
+    return None
+
+
+def make_completion(content_kb):
+    line = "    html = '<div class=\"row\">' + str(value) + '</div>'  # markup in code\n"
+    body = line * (content_kb * 1024 // len(line))
+    return (
+        "I'll create the file now.\n\n"
+        "<tool_name>write_to_file</tool_name>\n"
+        "<path>generated_code/app.py</path>\n"
+        f"<content>\n{body}</content>\n\n"
+        "Then run it to check the output.\n"
+    )
+
+
+def make_write_file_completion(content_kb):
+    line = "    total = sum(x * x for x in range(100))\n"
+    body = line * (content_kb * 1024 // len(line))
+    return f"Here you go:\n<write_file> filename: big.py\n{body}</write_file>\n"
+
+
+def timeit(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def streamed(text, chunk_size):
+    parser = ToolCallParser()
+    calls = []
+    for i in range(0, len(text), chunk_size):
+        calls.extend(parser.feed(text[i:i + chunk_size]))
+    return calls + parser.close()
+
+
+def main():
+    print(f"{'case':<28}{'legacy':>12}{'parse_tool_calls':>18}{'streamed (16B)':>16}")
+    for name, factory in (("tool_name", make_completion), ("write_file", make_write_file_completion)):
+        for kb in (16, 64, 256):
+            text = factory(kb)
+            assert parse_tool_calls(text)[0] == legacy_process_tool_use(text)
+            assert streamed(text, 16)[0] == legacy_process_tool_use(text)
+            repeat = 5 if kb < 256 else 2
+            legacy = timeit(lambda: legacy_process_tool_use(text), repeat)
+            whole = timeit(lambda: parse_tool_calls(text), repeat)
+            chunked = timeit(lambda: streamed(text, 16), repeat)
+            print(f"{name + ' ' + str(kb) + 'KB':<28}{legacy * 1e3:>10.2f}ms{whole * 1e3:>16.2f}ms{chunked * 1e3:>14.2f}ms")
+
+    # Re-running the legacy parser over the growing text on every chunk is what
+    # streaming detection would cost without an incremental parser
+    text = make_completion(64)
+    chunk = 256
+    rescans = timeit(lambda: [legacy_process_tool_use(text[:i]) for i in range(chunk, len(text) + chunk, chunk)], 1)
+    incremental = timeit(lambda: streamed(text, chunk), 3)
+    print(f"\nper-chunk detection on 64KB ({chunk}B chunks): legacy rescan {rescans * 1e3:.1f}ms, "
+          f"incremental {incremental * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark: read_file on a large log.
+
+Compares the old whole-file text read with ranged reads through the
+memory-mapped reader: the head, the tail, a line range in the middle
+(cold, which builds the line-offset index, and warm), a byte range, and
+streaming the whole file with iter_chunks.
+
+Run with:  python benchmarks/bench_read_file.py [size in MB]
+"""
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_search import timed
+from kazuri.reader import iter_chunks, read_range
+
+
+def legacy_read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def measured(fn):
+    tracemalloc.start()
+    value, elapsed = timed(fn)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return value, elapsed, peak
+
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "app.log"
+        line = "2024-01-01T00:00:00Z INFO request handled in 12ms path=/api/items id={}\n"
+        lines = megabytes * 1024 * 1024 // len(line.format(0))
+        with open(path, 'w') as f:
+            for start in range(0, lines, 10_000):
+                f.write("".join(line.format(i) for i in range(start, min(start + 10_000, lines))))
+        middle = lines // 2
+        print(f"{path.stat().st_size / 1e6:.0f} MB, {lines} lines")
+
+        runs = [
+            ("legacy whole read", lambda: legacy_read(path)),
+            ("default (capped)", lambda: read_range(str(path))),
+            ("head 100", lambda: read_range(str(path), head=100)),
+            ("tail 100", lambda: read_range(str(path), tail=100)),
+            ("lines, cold index", lambda: read_range(str(path), start_line=middle, end_line=middle + 100)),
+            ("lines, warm index", lambda: read_range(str(path), start_line=middle + 7, end_line=middle + 107)),
+            ("bytes, 64 KiB", lambda: read_range(str(path), byte_start=10**8, byte_end=10**8 + 65536)),
+            ("iter_chunks, 1 MiB", lambda: sum(map(len, iter_chunks(str(path), 1 << 20)))),
+        ]
+        for label, fn in runs:
+            _, elapsed, peak = measured(fn)
+            print(f"{label:<22}{elapsed * 1000:>10.1f}ms  peak {peak / 1e6:>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Benchmark: building the repository map for the prompt.
+
+On a tree of copies of kazuri's own modules, times a cold map (every
+file parsed), a warm one (nothing changed, the cached map is reused) and
+one after editing a single file (only that file is parsed again), and
+compares its size with a raw listing of every file.
+
+Run with:  python benchmarks/bench_repomap.py [file count]
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_search import timed
+from kazuri.context import estimate_tokens
+from kazuri.repomap import RepoMap
+
+SOURCES = sorted((Path(__file__).resolve().parent.parent / "kazuri").glob("*.py"))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "repo"
+        for i in range(count):
+            directory = root / f"pkg{i // 100}"
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"mod{i}.py").write_text(SOURCES[i % len(SOURCES)].read_text())
+        for path in root.rglob("*.py"):
+            os.utime(path, (1_000_000, 1_000_000))
+
+        listing = "\n".join(str(p.relative_to(root)) for p in root.rglob("*") if p.is_file())
+        print(f"{'raw file listing':<26}{'':>10}  {estimate_tokens(listing):>7} tokens")
+        repo_map = RepoMap(str(root), cache_dir=str(Path(tmp) / "cache"))
+        outline, cold = timed(repo_map.render)
+        print(f"{'cold map':<26}{cold * 1e3:>8.0f}ms  {estimate_tokens(outline):>7} tokens")
+        _, warm = timed(repo_map.render)
+        print(f"{'warm map (unchanged)':<26}{warm * 1e3:>8.0f}ms")
+        edited = root / "pkg0" / "mod0.py"
+        edited.write_text(edited.read_text() + "\n\ndef brand_new():\n    pass\n")
+        _, after_edit = timed(repo_map.render)
+        print(f"{'after editing one file':<26}{after_edit * 1e3:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
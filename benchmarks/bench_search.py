@@ -0,0 +1,83 @@
+"""Benchmark: search_files on a synthetic 100k-file tree.
+
+Compares the old single-threaded rglob + read + re.finditer loop with the
+ignore-aware search engine, sequentially and in thread and process pools.
+A fifth of the files sit in node_modules, .git or gitignored directories.
+
+Run with:  python benchmarks/bench_search.py [file count]
+"""
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kazuri.search import search_files
+
+PATTERN = r"def handle_\w+\(event\)"
+
+
+def make_tree(root, count):
+    (root / ".gitignore").write_text("generated/\n*.log\n")
+    body = "import os\n\n\ndef helper(x):\n    return x * 2\n" * 20
+    for i in range(count):
+        if i % 10 == 0:
+            directory = root / "node_modules" / f"dep{i // 1000}"
+        elif i % 10 == 1:
+            directory = root / "generated" / f"part{i // 1000}"
+        elif i % 20 == 2:
+            directory = root / ".git" / "objects" / f"{i // 1000:02x}"
+        else:
+            directory = root / "src" / f"pkg{i // 1000}" / f"mod{i // 100 % 10}"
+        directory.mkdir(parents=True, exist_ok=True)
+        extra = f"\ndef handle_{i}(event):\n    return event\n" if i % 500 == 3 else ""
+        (directory / f"file{i}.py").write_text(body + extra)
+    (root / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+
+
+def legacy_search(root):
+    results = []
+    for file_path in Path(root).rglob("*"):
+        if file_path.is_file():
+            try:
+                with open(file_path, 'r') as f:
+                    content = f.read()
+                    for match in re.finditer(PATTERN, content):
+                        results.append((str(file_path), content.count('\n', 0, match.start()) + 1))
+            except Exception:
+                continue
+    return results
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / ".git").mkdir()
+        _, build_time = timed(lambda: make_tree(root, count))
+        print(f"built {count} files in {build_time:.1f}s")
+
+        legacy, legacy_time = timed(lambda: legacy_search(root))
+        print(f"{'legacy rglob':<28}{legacy_time:>8.2f}s  {len(legacy):>5} matches (incl. ignored dirs)")
+        runs = [
+            ("engine, 1 worker", dict(workers=1)),
+            ("engine, thread pool", dict(executor="thread")),
+            ("engine, process pool", dict(executor="process")),
+            ("engine, first 10 (thread)", dict(executor="thread", max_results=10)),
+        ]
+        for label, kwargs in runs:
+            kwargs.setdefault("max_results", None)
+            (results, _), elapsed = timed(lambda: search_files(str(root), PATTERN, **kwargs))
+            print(f"{label:<28}{elapsed:>8.2f}s  {len(results):>5} matches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark: cost of recording an interaction and loading a session vs length.
+
+Compares rewriting the whole session file on every interaction (the old
+JSON format) with appending one record to the JSONL log, and loading the
+whole old format with lazily loading the log.
+
+Run with:  python benchmarks/bench_session.py
+"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kazuri.session import Session
+
+
+def make_interaction(i):
+    return {
+        "timestamp": f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+        "task": f"Refactor module_{i}.py to use the new API",
+        "response": "Explanation of the change. " * 40,
+        "tool_uses": [{"tool": "read_file", "parameters": {"path": f"module_{i}.py"}, "result": "x = 1\n" * 500}]
+    }
+
+
+def main():
+    print(f"{'history':>8}{'rewrite ms':>14}{'append ms':>12}{'json.load ms':>15}{'lazy load ms':>15}")
+    for count in (10, 100, 1000):
+        with tempfile.TemporaryDirectory() as tmp:
+            session = Session(session_dir=tmp)
+            history = [make_interaction(i) for i in range(count)]
+            session.history = list(history)
+            session.save_session()
+
+            legacy_path = Path(tmp) / "legacy.json"
+            start = time.perf_counter()
+            with open(legacy_path, 'w') as f:
+                json.dump({"history": history + [make_interaction(count)], "saved_files": {}}, f, indent=2)
+            rewrite = time.perf_counter() - start
+
+            start = time.perf_counter()
+            session.add_interaction("Another task", "Another response")
+            append = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with open(legacy_path) as f:
+                json.load(f)
+            full_load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            Session(session_dir=tmp).get_session_info()
+            lazy_load = time.perf_counter() - start
+
+            print(f"{count:>8}{rewrite * 1e3:>14.2f}{append * 1e3:>12.2f}{full_load * 1e3:>15.2f}{lazy_load * 1e3:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
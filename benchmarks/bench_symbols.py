@@ -0,0 +1,67 @@
+"""Benchmark: list_code_definitions over a directory of Python files.
+
+Compares the old per-file regex listing with the symbol index: a cold
+run (every file parsed), a warm run (nothing changed), and a run after
+touching every file without changing it (hashed, not parsed).
+
+Run with:  python benchmarks/bench_symbols.py [file count]
+"""
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_search import timed
+from kazuri.symbols import SymbolIndex
+
+SOURCES = sorted((Path(__file__).resolve().parent.parent / "kazuri").glob("*.py"))
+
+LEGACY_PATTERNS = {
+    'function': r'def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(',
+    'class': r'class\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*[:\(]',
+    'variable': r'([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*'
+}
+
+
+def legacy_definitions(root):
+    definitions = 0
+    for path in Path(root).rglob("*.py"):
+        content = path.read_text()
+        for pattern in LEGACY_PATTERNS.values():
+            for match in re.finditer(pattern, content):
+                content.count('\n', 0, match.start())
+                definitions += 1
+    return definitions
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "repo"
+        for i in range(count):
+            directory = root / f"pkg{i // 100}"
+            directory.mkdir(parents=True, exist_ok=True)
+            source = SOURCES[i % len(SOURCES)].read_text()
+            (directory / f"mod{i}.py").write_text(source + f"\n\ndef unique_{i}():\n    pass\n")
+        os.utime(root, (1_000_000, 1_000_000))
+        for path in root.rglob("*.py"):
+            os.utime(path, (1_000_000, 1_000_000))
+
+        legacy, legacy_time = timed(lambda: legacy_definitions(root))
+        print(f"{'legacy regex':<26}{legacy_time:>8.2f}s  {legacy:>7} definitions")
+        with SymbolIndex(str(Path(tmp) / "symbols.db")) as index:
+            runs = [("cold (parse all)", None), ("warm (unchanged)", None), ("all files touched", "touch")]
+            for label, action in runs:
+                if action == "touch":
+                    for path in root.rglob("*.py"):
+                        os.utime(path, (2_000_000, 2_000_000))
+                result, elapsed = timed(lambda: index.symbols(str(root)))
+                total = sum(len(file_symbols) for file_symbols in result.values())
+                print(f"{label:<26}{elapsed:>8.2f}s  {total:>7} definitions")
+
+
+if __name__ == "__main__":
+    main()
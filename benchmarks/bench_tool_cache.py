@@ -0,0 +1,74 @@
+"""Benchmark: repeated read-only tool calls with the tool result cache.
+
+Replays the calls an agent typically repeats over a session: listing the
+tree, searching it, outlining a package and reading a few files, first
+without and then with the cache, then after one edit through
+write_to_file.
+
+Run with:  python benchmarks/bench_tool_cache.py [file count] [rounds]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_search import PATTERN, make_tree, timed
+from kazuri.tools import ToolManager
+
+
+def calls(manager):
+    return [
+        lambda: manager.list_files(".", recursive=True),
+        lambda: manager.search_files(".", PATTERN, max_results=None),
+        lambda: manager.list_code_definitions("src/pkg0"),
+        lambda: manager.read_file("src/pkg0/mod0/file3.py"),
+        lambda: manager.read_file("src/pkg1/mod5/file1503.py"),
+    ]
+
+
+def replay(manager, rounds):
+    for _ in range(rounds):
+        for call in calls(manager):
+            assert call()["success"]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as cache_dir:
+        root = Path(tmp)
+        (root / ".git").mkdir()
+        make_tree(root, count)
+        old = time.time() - 60
+        for directory, _, files in os.walk(root):
+            for name in files + [""]:
+                os.utime(os.path.join(directory, name), (old, old))
+        os.chdir(root)
+        os.environ["KAZURI_SEARCH_INDEX"] = "0"
+        os.environ["KAZURI_REPO_MAP_CACHE_DIR"] = cache_dir
+        print(f"{count} files, {rounds} rounds of {len(calls(None))} calls")
+
+        os.environ["KAZURI_TOOL_CACHE_BYTES"] = "0"
+        _, uncached = timed(lambda: replay(ToolManager(), rounds))
+        print(f"{'uncached':<24}{uncached:>8.2f}s")
+
+        del os.environ["KAZURI_TOOL_CACHE_BYTES"]
+        manager = ToolManager()
+        _, first = timed(lambda: replay(manager, 1))
+        _, cached = timed(lambda: replay(manager, rounds - 1))
+        print(f"{'cached, first round':<24}{first:>8.2f}s")
+        print(f"{'cached, later rounds':<24}{cached:>8.2f}s  ({cached / (rounds - 1) * 1000:.1f}ms per round)")
+
+        manager.write_to_file("src/pkg0/mod0/file3.py", "def handle_edit(event):\n    return event\n")
+        _, edited = timed(lambda: replay(manager, 1))
+        stats = manager.result_cache.stats()
+        print(f"{'round after one edit':<24}{edited:>8.2f}s")
+        print(f"hits {stats['hits']}, misses {stats['misses']}, stale {stats['stale']}, "
+              f"invalidations {stats['invalidations']}, {stats['bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import shutil
+import stat
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Linux ioctl that makes dst share src's blocks (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+CHUNK_SIZE = 1 << 20
+
+# Next to each blob, a directory with an empty file per artifact made from it
+READERS_SUFFIX = ".readers"
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def clone_file(source: Path, dest: Path):
+    """Copy a file, sharing its blocks with a reflink where supported."""
+    try:
+        import fcntl
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return
+    except (ImportError, OSError):
+        pass
+    shutil.copyfile(source, dest)
+
+
+class BlobStore:
+    """Content-addressed store of artifact contents.
+
+    Each distinct content is kept once, as a read-only file named by its
+    SHA-256 under blobs/<first two hex digits>/. Saving content that is
+    already stored only refreshes the blob's modification time. Artifacts
+    are writable reflinks or copies of a blob, each recorded as one of its
+    readers, so a blob can be deleted once none of them is left.
+    """
+
+    def __init__(self, root: Path):
+        """Initialize blob store.
+
+        Args:
+            root: Directory holding the blobs
+        """
+        self.root = Path(root)
+
+    def path_for(self, digest: str) -> Path:
+        """Get the path of the blob with the given digest."""
+        return self.root / digest[:2] / digest
+
+    def readers_dir(self, digest: str) -> Path:
+        """Get the directory recording the artifacts made from a blob."""
+        return self.root / digest[:2] / (digest + READERS_SUFFIX)
+
+    def _tmp_path(self) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self.root / f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _existing(self, digest: str) -> Optional[Path]:
+        path = self.path_for(digest)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def _commit(self, tmp_path: Path, digest: str) -> Path:
+        path = self.path_for(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(tmp_path, path)
+        return path
+
+    def put_bytes(self, data: bytes) -> str:
+        """Store content.
+
+        Args:
+            data: Content to store
+
+        Returns:
+            SHA-256 hex digest of the content
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if self._existing(digest) is None:
+            tmp_path = self._tmp_path()
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            self._commit(tmp_path, digest)
+        return digest
+
+    def put_file(self, source: Path) -> str:
+        """Store the contents of a file.
+
+        Args:
+            source: File to store
+
+        Returns:
+            SHA-256 hex digest of the content
+        """
+        digest = _hash_file(source)
+        if self._existing(digest) is None:
+            tmp_path = self._tmp_path()
+            clone_file(source, tmp_path)
+            # Address the copy by what was actually copied, in case the
+            # source changed after it was hashed
+            digest = _hash_file(tmp_path)
+            self._commit(tmp_path, digest)
+        return digest
+
+    def checkout(self, digest: str, dest: Path):
+        """Make dest a writable file with a stored blob's content.
+
+        dest is a reflink of the blob where the filesystem supports it, so
+        it shares the blob's blocks until written to, and a copy elsewhere.
+        Its name is recorded as a reader of the blob.
+
+        Args:
+            digest: Digest of a stored blob
+            dest: Path to create or replace
+        """
+        readers = self.readers_dir(digest)
+        readers.mkdir(parents=True, exist_ok=True)
+        (readers / dest.name).touch()
+        tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        clone_file(self.path_for(digest), tmp_path)
+        os.replace(tmp_path, dest)
+
+    def blobs(self) -> Iterator[Tuple[str, Path]]:
+        """Iterate over the stored blobs as (digest, path)."""
+        if not self.root.exists():
+            return
+        for path in self.root.glob("*/*"):
+            if not path.name.endswith(READERS_SUFFIX) and path.is_file():
+                yield path.name, path
+
+    def readers(self, digest: str) -> List[str]:
+        """Get the names of the artifacts made from a blob."""
+        try:
+            return sorted(os.listdir(self.readers_dir(digest)))
+        except OSError:
+            return []
+
+    def remove_reader(self, digest: str, name: str):
+        """Forget that an artifact was made from a blob."""
+        (self.readers_dir(digest) / name).unlink(missing_ok=True)
+
+    def remove(self, digest: str):
+        """Delete a blob and its readers."""
+        self.path_for(digest).unlink(missing_ok=True)
+        shutil.rmtree(self.readers_dir(digest), ignore_errors=True)
@@ -0,0 +1,179 @@
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Dict, Any, Callable, Optional
+from .session import open_session
+from .parser import parse_tool_calls
+from .cache import ResponseCache, referenced_files
+from .cli import MODEL_ID, build_task_request, get_environment_details, invoke_model
+
+
+def read_tasks(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Read batch tasks from JSONL lines.
+
+    Each non-blank line is either a JSON object with a "task" field (and an
+    optional "id") or a bare JSON string. Lines that cannot be used are
+    yielded with an "error" instead of a task.
+
+    Args:
+        lines: Lines of JSONL input
+
+    Yields:
+        Task dictionaries with "id" and "task" (or "error")
+    """
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"id": str(line_number), "error": f"Invalid JSON: {e}"}
+            continue
+
+        if isinstance(data, str):
+            data = {"task": data}
+        if not isinstance(data, dict) or not isinstance(data.get("task"), str):
+            yield {"id": str(line_number), "error": "Expected a JSON string or an object with a 'task' field"}
+            continue
+        yield {**data, "id": str(data.get("id", line_number))}
+
+
+def _session_name(number: int, task_id: str) -> str:
+    """Make a session file name unique to a task in its batch.
+
+    Task IDs may repeat, or become the same once made safe for a file
+    name, so the task's position in the batch comes first.
+    """
+    return f"{number}-" + (re.sub(r'[^A-Za-z0-9_.-]', '_', task_id)[:100] or "task")
+
+
+def run_task(
+    bedrock,
+    task: Dict[str, Any],
+    number: int,
+    session_dir: Path,
+    cache: Optional[ResponseCache] = None
+) -> Dict[str, Any]:
+    """Run one batch task in its own session.
+
+    Tool calls found in the completion are reported but not executed, since
+    a batch has nobody to confirm them.
+
+    Args:
+        bedrock: Shared Bedrock runtime client
+        task: Task dictionary from read_tasks
+        number: 1-based position of the task in the batch
+        session_dir: Directory holding this batch's sessions
+        cache: Optional response cache
+
+    Returns:
+        Result dictionary for the task
+    """
+    result = {
+        "id": task["id"],
+        "success": False,
+        "completion": None,
+        "tool_calls": [],
+        "latency_ms": 0.0,
+        "usage": {},
+        "session_file": None,
+        "cached": False,
+        "error": task.get("error")
+    }
+    if result["error"]:
+        return result
+
+    started = time.perf_counter()
+    try:
+        session = open_session(session_dir=str(session_dir), session_name=_session_name(number, task["id"]))
+        result["session_file"] = str(session.current_session)
+
+        body = build_task_request(task["task"], get_environment_details(session), session)
+        cache_key = cache.make_key(MODEL_ID, body, referenced_files(task["task"])) if cache else None
+        response_body = cache.get(cache_key) if cache else None
+        result["cached"] = response_body is not None
+        if response_body is None:
+            response_body = invoke_model(bedrock, body)
+            if cache:
+                cache.put(cache_key, response_body)
+        completion = response_body['content'][0]['text']
+
+        session.add_interaction(task["task"], completion)
+        result.update({
+            "success": True,
+            "completion": completion,
+            "tool_calls": parse_tool_calls(completion),
+            "usage": response_body.get("usage", {})
+        })
+    except Exception as e:
+        result["error"] = str(e)
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def run_batch(
+    bedrock,
+    tasks: Iterable[Dict[str, Any]],
+    emit: Callable[[Dict[str, Any]], None],
+    concurrency: int = 4,
+    session_dir: Optional[str] = None,
+    cache: Optional[ResponseCache] = None
+) -> Dict[str, Any]:
+    """Run tasks concurrently over one client, emitting results as they finish.
+
+    At most `concurrency` tasks are in flight at once and tasks are read
+    lazily, so arbitrarily long inputs use bounded memory.
+
+    Args:
+        bedrock: Shared Bedrock runtime client
+        tasks: Task dictionaries from read_tasks
+        emit: Called with each result, from the calling thread
+        concurrency: Maximum number of concurrent requests
+        session_dir: Directory for per-task sessions (defaults to a new
+            batch_<timestamp> directory under .kazuri_sessions)
+        cache: Optional response cache shared by all tasks
+
+    Returns:
+        Summary with task, success, failure and cache hit counts and total
+        time
+    """
+    if session_dir is None:
+        session_dir = str(Path(".kazuri_sessions") / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    batch_dir = Path(session_dir)
+    concurrency = max(1, concurrency)
+
+    summary = {
+        "tasks": 0,
+        "succeeded": 0,
+        "failed": 0,
+        "cache_hits": 0,
+        "elapsed_ms": 0.0,
+        "session_dir": str(batch_dir)
+    }
+    started = time.perf_counter()
+
+    def collect(done):
+        for future in done:
+            result = future.result()
+            summary["tasks"] += 1
+            summary["succeeded" if result["success"] else "failed"] += 1
+            summary["cache_hits"] += result["cached"]
+            emit(result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = set()
+        for number, task in enumerate(tasks, 1):
+            if len(in_flight) >= concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight.add(executor.submit(run_task, bedrock, task, number, batch_dir, cache))
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return summary
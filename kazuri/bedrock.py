@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Callable
+
+# Defaults for the Bedrock client, each overridable through the environment
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 120.0
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_RETRY_MODE = "adaptive"
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def get_client_settings() -> Dict[str, Any]:
+    """Get Bedrock client settings from environment variables."""
+    return {
+        'connect_timeout': _env_float('KAZURI_BEDROCK_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT),
+        'read_timeout': _env_float('KAZURI_BEDROCK_READ_TIMEOUT', DEFAULT_READ_TIMEOUT),
+        'max_pool_connections': _env_int('KAZURI_BEDROCK_MAX_POOL_CONNECTIONS', DEFAULT_MAX_POOL_CONNECTIONS),
+        'max_attempts': _env_int('KAZURI_BEDROCK_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS),
+        'retry_mode': os.getenv('KAZURI_BEDROCK_RETRY_MODE') or DEFAULT_RETRY_MODE,
+        # Client-side rate limit; 0 disables it
+        'requests_per_minute': _env_float('KAZURI_BEDROCK_REQUESTS_PER_MINUTE', 0),
+        'burst': _env_float('KAZURI_BEDROCK_BURST', 1),
+    }
+
+
+def build_client_config(settings: Optional[Dict[str, Any]] = None):
+    """Build the botocore Config for the Bedrock runtime client.
+
+    Args:
+        settings: Client settings (defaults to get_client_settings())
+
+    Returns:
+        botocore.config.Config with tuned timeouts, pooling, keep-alive and
+        retries
+    """
+    from botocore.config import Config
+
+    settings = settings or get_client_settings()
+    return Config(
+        connect_timeout=settings['connect_timeout'],
+        read_timeout=settings['read_timeout'],
+        max_pool_connections=settings['max_pool_connections'],
+        tcp_keepalive=True,
+        retries={
+            'mode': settings['retry_mode'],
+            'max_attempts': settings['max_attempts']
+        }
+    )
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace requests to Bedrock."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """Initialize token bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held, i.e. the allowed burst
+            clock: Monotonic clock, overridable for tests
+            sleep: Sleep function, overridable for tests
+        """
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Take tokens from the bucket, blocking until they are available.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+
+class BedrockClient:
+    """Bedrock runtime client with optional client-side rate limiting.
+
+    Model calls wait for the token bucket before they are sent; every other
+    attribute is delegated to the underlying boto3 client.
+    """
+
+    def __init__(self, client, limiter: Optional[TokenBucket] = None):
+        self.client = client
+        self.limiter = limiter
+
+    def invoke_model(self, **kwargs):
+        if self.limiter:
+            self.limiter.acquire()
+        return self.client.invoke_model(**kwargs)
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        if self.limiter:
+            self.limiter.acquire()
+        return self.client.invoke_model_with_response_stream(**kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+
+_clients: Dict[Any, BedrockClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_bedrock_client(aws_config: Dict[str, str]) -> BedrockClient:
+    """Get the shared Bedrock client for an AWS configuration.
+
+    Clients are created once per configuration and reused, so connections
+    stay pooled and the adaptive retry state is shared by every caller.
+
+    Args:
+        aws_config: boto3.client keyword arguments from get_aws_config()
+
+    Returns:
+        The shared BedrockClient
+    """
+    settings = get_client_settings()
+    key = (tuple(sorted(aws_config.items())), tuple(sorted(settings.items())))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            import boto3
+
+            limiter = None
+            if settings['requests_per_minute'] > 0:
+                limiter = TokenBucket(settings['requests_per_minute'] / 60, settings['burst'])
+            client = BedrockClient(
+                boto3.client(**aws_config, config=build_client_config(settings)),
+                limiter
+            )
+            _clients[key] = client
+        return client
+
+
+def reset_bedrock_clients():
+    """Drop all shared clients (e.g. after credentials change)."""
+    with _clients_lock:
+        _clients.clear()
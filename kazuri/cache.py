@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Dict, Any, Optional
+
+DEFAULT_CACHE_DIR = ".kazuri_cache"
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Things in a task that look like file paths, e.g. "explain kazuri/cli.py"
+FILE_REFERENCE = re.compile(r'[\w./\\-]*\w\.\w+')
+
+
+def referenced_files(text: str, root: Optional[str] = None) -> List[Path]:
+    """Find existing files referenced by path in a piece of text.
+
+    Args:
+        text: Text to scan, typically the task
+        root: Directory relative paths are resolved against (defaults to cwd)
+
+    Returns:
+        Sorted list of unique existing file paths
+    """
+    base = Path(root or os.getcwd())
+    found = set()
+    for candidate in FILE_REFERENCE.findall(text):
+        path = Path(candidate)
+        if not path.is_absolute():
+            path = base / path
+        try:
+            if path.is_file():
+                found.add(path.resolve())
+        except OSError:
+            continue
+    return sorted(found)
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded, content-addressed on-disk cache of model responses.
+
+    Entries are keyed by model ID, request body and the hashes of the files
+    the task references, so editing a referenced file invalidates them.
+    Entries expire after a TTL and the least recently used ones are evicted
+    once the cache grows past its size limit.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL
+    ):
+        """Initialize response cache.
+
+        Args:
+            cache_dir: Directory to store cache entries
+            max_bytes: Maximum total size of cached entries
+            ttl: Seconds an entry stays valid
+        """
+        self.cache_dir = Path(cache_dir)
+        self.entries_dir = self.cache_dir / "responses"
+        self.stats_file = self.cache_dir / "stats.json"
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._total_bytes: Optional[int] = None
+
+    def make_key(self, model_id: str, body: Dict[str, Any], files: Iterable[Path] = ()) -> str:
+        """Build the cache key for a request.
+
+        Args:
+            model_id: Bedrock model ID
+            body: Request body
+            files: Files referenced by the request
+
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.sha256()
+        digest.update(model_id.encode())
+        digest.update(json.dumps(body, sort_keys=True).encode())
+        for path in sorted(files):
+            digest.update(str(path).encode())
+            digest.update(_hash_file(path).encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.entries_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            The cached response body, or None on a miss
+        """
+        path = self._entry_path(key)
+        response = None
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            if time.time() - entry.get("created", 0) <= self.ttl:
+                response = entry["response"]
+                # Reads refresh the mtime, which orders LRU eviction
+                os.utime(path)
+            else:
+                self._remove(path)
+        except (OSError, ValueError, KeyError):
+            response = None
+
+        self._record("hits" if response is not None else "misses")
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """Store a response.
+
+        Args:
+            key: Key from make_key
+            response: Response body to cache
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"created": time.time(), "response": response})
+
+        with self._lock:
+            total = self._current_bytes()
+            try:
+                total -= path.stat().st_size
+            except OSError:
+                pass
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._total_bytes = total + len(data.encode())
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> List[Path]:
+        if not self.entries_dir.exists():
+            return []
+        return list(self.entries_dir.glob("*/*.json"))
+
+    def _current_bytes(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self._entries())
+        return self._total_bytes
+
+    def _remove(self, path: Path) -> int:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return 0
+        if self._total_bytes is not None:
+            self._total_bytes -= size
+        return size
+
+    def _evict(self):
+        """Remove least recently used entries until under the size limit."""
+        entries = []
+        for path in self._entries():
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        evicted = 0
+        for _, path in sorted(entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if self._remove(path):
+                evicted += 1
+        if evicted:
+            self._record("evictions", evicted)
+
+    def _read_stats(self) -> Dict[str, int]:
+        try:
+            with open(self.stats_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record(self, counter: str, count: int = 1):
+        """Add to a persistent hit/miss/eviction counter."""
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            stats = self._read_stats()
+            stats[counter] = stats.get(counter, 0) + count
+            tmp_path = self.stats_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, self.stats_file)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        stats = self._read_stats()
+        entries = self._entries()
+        return {
+            "hits": stats.get("hits", 0),
+            "misses": stats.get("misses", 0),
+            "evictions": stats.get("evictions", 0),
+            "entries": len(entries),
+            "bytes": sum(p.stat().st_size for p in entries),
+            "max_bytes": self.max_bytes
+        }
+
+    def clear(self) -> int:
+        """Remove every cached entry and reset the statistics.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            entries = self._entries()
+            for path in entries:
+                path.unlink(missing_ok=True)
+            self.stats_file.unlink(missing_ok=True)
+            self._total_bytes = 0
+        return len(entries)
+
+
+def get_response_cache(enabled: Optional[bool] = None) -> Optional[ResponseCache]:
+    """Get the response cache configured from the environment.
+
+    The cache is opt-in: it is used when `enabled` is True, or when it is
+    None and KAZURI_CACHE is set to a true value.
+
+    Args:
+        enabled: Explicit override, e.g. from --cache/--no-cache
+
+    Returns:
+        ResponseCache, or None if caching is disabled
+    """
+    if enabled is None:
+        enabled = os.getenv('KAZURI_CACHE', '').lower() in ('1', 'true', 'yes', 'on')
+    if not enabled:
+        return None
+    return ResponseCache(
+        cache_dir=os.getenv('KAZURI_CACHE_DIR') or DEFAULT_CACHE_DIR,
+        max_bytes=int(os.getenv('KAZURI_CACHE_MAX_BYTES') or DEFAULT_MAX_BYTES),
+        ttl=float(os.getenv('KAZURI_CACHE_TTL') or DEFAULT_TTL)
+    )
@@ -1,32 +1,76 @@
 import os
 import typer
 from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.prompt import Prompt, Confirm
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-import boto3
+from typing import Optional, List, Dict, Any, Tuple, Callable, TYPE_CHECKING
 import json
-import re
-from dotenv import load_dotenv
+import time
+from functools import lru_cache
 from .tools import ToolManager
-from .session import Session
+from .session import Session, open_session
+from .parser import ToolCallParser, parse_tool_calls
+from .bedrock import get_bedrock_client
+from .cache import get_response_cache, referenced_files
+from .context import get_context_builder
 
-# Load environment variables from .env file
-load_dotenv()
+# boto3, dotenv and the heavier rich modules are imported where they are used
+# so that `kazuri --help` and `kazuri version` start quickly
+if TYPE_CHECKING:
+    from rich.panel import Panel
 
 # Initialize typer app and rich console
 app = typer.Typer(help="Kazuri - Your AI-powered development assistant")
 console = Console()
-tool_manager = ToolManager()
-session = Session()
+
+# Created on first use so importing the CLI has no filesystem side effects
+_tool_manager: Optional[ToolManager] = None
+_session: Optional[Session] = None
 
 # Version number
 VERSION = "0.1.2"
 
+# Model settings
+MODEL_ID = 'anthropic.claude-3-sonnet-20240229-v1:0'
+MAX_TOKENS = 2048
+TEMPERATURE = 0.7
+
+# How often the streamed response panel is re-rendered
+STREAM_REFRESH_PER_SECOND = 8
+
+# Working directory files listed in the environment details of a prompt
+ENVIRONMENT_FILE_LIMIT = 200
+
+def get_tool_manager() -> ToolManager:
+    """Get the shared tool manager, creating it on first use."""
+    global _tool_manager
+    if _tool_manager is None:
+        _tool_manager = ToolManager()
+    return _tool_manager
+
+def get_session() -> Session:
+    """Get the current session, loading it on first use."""
+    global _session
+    if _session is None:
+        _session = open_session()
+    return _session
+
+def __getattr__(name: str):
+    """Keep `kazuri.cli.tool_manager` and `kazuri.cli.session` available."""
+    if name == "tool_manager":
+        return get_tool_manager()
+    if name == "session":
+        return get_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@lru_cache(maxsize=1)
+def load_environment():
+    """Load environment variables from the .env file (once per process)."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
 def get_aws_config() -> Dict[str, str]:
     """Get AWS configuration from environment variables."""
+    load_environment()
     config = {
         'service_name': 'bedrock-runtime',
         'region_name': os.getenv('AWS_REGION') or os.getenv('AWS_DEFAULT_REGION'),
@@ -38,48 +82,125 @@ def get_aws_config() -> Dict[str, str]:
     # Remove None values
     return {k: v for k, v in config.items() if v is not None}
 
+@lru_cache(maxsize=1)
 def load_system_prompt() -> str:
-    """Load the system prompt from file."""
+    """Load the system prompt from file (read once per process)."""
     prompt_path = Path(__file__).parent / "system_prompt.txt"
     with open(prompt_path, 'r') as f:
         return f.read()
 
-def format_task_for_claude(task: str, environment_details: Optional[str] = None) -> str:
-    # Load system prompt from file
-    system_prompt = load_system_prompt()
+def prompt_caching_enabled() -> bool:
+    """Whether to mark request prefixes for Bedrock prompt caching.
     
-    # Get recent conversation history
-    recent_context = session.get_recent_context(limit=5)
+    Opt-in through KAZURI_PROMPT_CACHING because not every Bedrock model
+    accepts cache_control blocks.
+    """
+    load_environment()
+    return os.getenv('KAZURI_PROMPT_CACHING', '').lower() in ('1', 'true', 'yes', 'on')
+
+def text_block(text: str, cache: bool = False) -> Dict[str, Any]:
+    """Build a text content block, optionally ending a cacheable prefix."""
+    block = {"type": "text", "text": text or "(empty)"}
+    if cache:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+def build_task_messages(
+    task: str,
+    environment_details: Optional[str] = None,
+    session: Optional[Session] = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split a task into a static system block and conversation messages.
     
-    prompt = f"{system_prompt}\n\n"
+    The system prompt never changes, so it is the prefix marked for Bedrock
+    prompt caching. History is selected by the context builder by recency
+    and relevance to the task, within the configured token budget; the
+    window slides and the relevant turns change with the task, so it is not
+    a stable prefix and is not marked. The task and environment details
+    change every turn and go last.
+    
+    Args:
+        task: The task or question
+        environment_details: Optional environment details for this turn
+        session: Session to take history from (defaults to the current one)
+        
+    Returns:
+        Tuple of system blocks and messages
+    """
+    cache = prompt_caching_enabled()
+    session = session or get_session()
     
-    # Add recent conversation history if available
-    if recent_context:
-        prompt += f"Recent Conversation History:\n{recent_context}\n\n"
+    system = [text_block(load_system_prompt(), cache=cache)]
     
-    prompt += f"Human: {task}"
+    # The newest turns plus the older ones most relevant to the task in full,
+    # the rest compacted, within the token budget
+    summary, history = get_context_builder().build(
+        session.history, query=task, index=session.get_history_index()
+    )
+    if summary:
+        system.append(text_block(f"Summary of earlier conversation:\n{summary}"))
     
+    messages = []
+    for message in history:
+        messages.append({"role": message["role"], "content": [text_block(message["content"])]})
+    
+    content = task
     if environment_details:
-        prompt += f"\n\nEnvironment Details:\n{environment_details}"
+        content += f"\n\nEnvironment Details:\n{environment_details}"
+    messages.append({"role": "user", "content": [text_block(content)]})
     
-    return prompt
+    return system, messages
+
+def build_task_request(
+    task: str,
+    environment_details: Optional[str] = None,
+    session: Optional[Session] = None
+) -> Dict[str, Any]:
+    """Build the Bedrock request body for a task."""
+    system, messages = build_task_messages(task, environment_details, session)
+    return {
+        "anthropic_version": "bedrock-2023-05-31",
+        "system": system,
+        "messages": messages,
+        "max_tokens": MAX_TOKENS,
+        "temperature": TEMPERATURE
+    }
 
-def get_environment_details():
+def format_usage(usage: Dict[str, Any]) -> str:
+    """Summarize token usage, including prompt cache reads and writes."""
+    return (
+        f"{usage.get('input_tokens', 0)} input "
+        f"({usage.get('cache_read_input_tokens', 0)} cache read, "
+        f"{usage.get('cache_creation_input_tokens', 0)} cache write), "
+        f"{usage.get('output_tokens', 0)} output"
+    )
+
+def get_environment_details(session: Optional[Session] = None):
     """Gather relevant environment details."""
+    session = session or get_session()
     details = []
     
     # Add current working directory files
     details.append("# Current Working Directory Files")
     try:
-        files = tool_manager.list_files(".")
+        files = get_tool_manager().list_files(".", limit=ENVIRONMENT_FILE_LIMIT)
         if files["success"]:
             details.extend(files["files"])
+            if files.get("truncated"):
+                details.append(f"(more files not shown; list_files with cursor {files['next_cursor']} continues)")
     except Exception:
         pass
     
-    # Add VSCode visible files and open tabs if available
-    details.append("\n# VSCode Context")
-    details.append("(Add any relevant VSCode context)")
+    # Add an outline of the repository's most relevant definitions
+    try:
+        from .repomap import get_repo_map
+        repo_map = get_repo_map()
+        outline = repo_map.outline() if repo_map else ""
+        if outline:
+            details.append("\n# Repository Map")
+            details.append(outline)
+    except Exception:
+        pass
     
     # Add any active tool uses from recent history
     recent_tool_uses = session.get_last_tool_uses()
@@ -90,80 +211,140 @@ def get_environment_details():
     
     return "\n".join(details)
 
-def extract_code_block(text: str, start_idx: int) -> tuple[str, int]:
-    """Extract a code block from text starting at start_idx."""
-    lines = text[start_idx:].split('\n')
-    code_lines = []
-    end_idx = start_idx
-    
-    for i, line in enumerate(lines):
-        if line.strip() and not line.strip().startswith('</'):
-            code_lines.append(line)
-            end_idx = start_idx + sum(len(l) + 1 for l in lines[:i+1])
-        elif line.strip().startswith('</'):
-            break
+def response_panel(completion: str) -> "Panel":
+    """Render a completion as Kazuri's response panel."""
+    from rich.markdown import Markdown
+    from rich.panel import Panel
+    return Panel(
+        Markdown(completion),
+        title="Kazuri's Response",
+        border_style="green"
+    )
+
+def invoke_model(bedrock, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Call the model and return the parsed response body."""
+    response = bedrock.invoke_model(
+        modelId=MODEL_ID,
+        body=json.dumps(body)
+    )
     
-    return '\n'.join(code_lines), end_idx
+    return json.loads(response['body'].read())
 
-def process_tool_use(response: str):
-    """Process any tool use requests in the response."""
-    try:
-        # First check for proper XML format
-        if "<tool_name>" in response:
-            tool_start = response.find("<tool_name>")
-            tool_end = response.find("</tool_name>")
-            if tool_start != -1 and tool_end != -1:
-                tool_name = response[tool_start + 11:tool_end].strip()
-                
-                # Extract parameters
-                params = {}
-                param_start = response.find("<", tool_end)
-                while param_start != -1:
-                    param_end = response.find(">", param_start)
-                    if param_end == -1:
-                        break
-                    
-                    param_name = response[param_start + 1:param_end]
-                    if param_name.startswith('/'):  # Skip closing tags
-                        param_start = response.find("<", param_end)
-                        continue
-                        
-                    content_start = param_end + 1
-                    content_end = response.find(f"</{param_name}>", content_start)
-                    if content_end == -1:
-                        break
-                    
-                    params[param_name] = response[content_start:content_end].strip()
-                    param_start = response.find("<", content_end)
-                
-                return {
-                    "tool": tool_name,
-                    "parameters": params
-                }
+def invoke_completion(bedrock, body: Dict[str, Any]) -> str:
+    """Call the model and wait for the full completion."""
+    return invoke_model(bedrock, body)['content'][0]['text']
+
+def iter_stream_text(event_stream, usage: Optional[Dict[str, Any]] = None):
+    """Yield text deltas from a Bedrock response stream.
+    
+    Args:
+        event_stream: The response stream's event iterator
+        usage: Optional dictionary updated with the token usage reported
+            by the stream
+    """
+    for event in event_stream:
+        chunk = event.get("chunk") if isinstance(event, dict) else None
+        if not chunk:
+            continue
         
-        # Check for alternative format: <write_file> filename: path
-        write_file_match = re.search(r'<write_file>\s*filename:\s*([^\n]+)', response)
-        if write_file_match:
-            filename = write_file_match.group(1).strip()
-            code_start = write_file_match.end()
-            code, _ = extract_code_block(response, code_start)
+        data = json.loads(chunk["bytes"])
+        if usage is not None:
+            if data.get("type") == "message_start":
+                usage.update(data.get("message", {}).get("usage", {}))
+            elif data.get("type") == "message_delta":
+                usage.update(data.get("usage", {}))
+        if data.get("type") == "content_block_delta":
+            delta = data.get("delta", {})
+            if delta.get("type") == "text_delta":
+                yield delta.get("text", "")
+
+def stream_completion(
+    bedrock,
+    body: Dict[str, Any],
+    on_tool_call: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Tuple[str, Optional[float], Dict[str, Any]]:
+    """Stream the completion into a live response panel.
+    
+    Args:
+        bedrock: Bedrock runtime client
+        body: Request body built by build_task_request
+        on_tool_call: Optional callback invoked with each tool call as soon
+            as it has been fully received
+        
+    Returns:
+        Tuple of the full completion text, the time to first token in
+        seconds (None if the model returned no text) and the token usage
+    """
+    started = time.perf_counter()
+    response = bedrock.invoke_model_with_response_stream(
+        modelId=MODEL_ID,
+        body=json.dumps(body)
+    )
+    
+    from rich.live import Live
+    
+    parser = ToolCallParser()
+    usage = {}
+    parts = []
+    first_token = None
+    last_render = 0.0
+    interval = 1.0 / STREAM_REFRESH_PER_SECOND
+    with Live(response_panel(""), console=console, refresh_per_second=STREAM_REFRESH_PER_SECOND) as live:
+        for text in iter_stream_text(response['body'], usage):
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            parts.append(text)
+            
+            for tool_use in parser.feed(text):
+                if on_tool_call:
+                    on_tool_call(tool_use)
             
-            # Convert to proper format
-            return {
-                "tool": "write_to_file",
-                "parameters": {
-                    "path": filename,
-                    "content": code.strip()
-                }
-            }
+            # Re-parsing the Markdown is the expensive part, so only rebuild
+            # the panel as often as Live actually repaints it
+            now = time.perf_counter()
+            if now - last_render >= interval:
+                live.update(response_panel("".join(parts)))
+                last_render = now
         
-        return None
+        live.update(response_panel("".join(parts)))
+    
+    for tool_use in parser.close():
+        if on_tool_call:
+            on_tool_call(tool_use)
+    
+    return "".join(parts), first_token, usage
+
+def process_tool_use(response: str):
+    """Process the first tool use request in the response."""
+    try:
+        tool_uses = parse_tool_calls(response)
+        return tool_uses[0] if tool_uses else None
     except Exception as e:
         console.print(f"[red]Error processing tool use: {str(e)}[/red]")
         return None
 
+def run_tool_use(tool_use: Dict[str, Any], yes: bool = False) -> Optional[Dict[str, Any]]:
+    """Execute a parsed tool use and report the outcome."""
+    result = execute_tool(tool_use, yes)
+    if result:
+        if result.get("success"):
+            console.print("[green]Tool execution successful[/green]")
+            if "content" in result:
+                console.print(result["content"])
+            elif "files" in result:
+                console.print("\n".join(result["files"]))
+        else:
+            console.print(f"[red]Tool execution failed: {result.get('error', 'Unknown error')}[/red]")
+    return result
+
 def execute_tool(tool_use: Optional[Dict[str, Any]], yes: bool = False) -> Dict[str, Any]:
     """Execute the specified tool with given parameters."""
+    from rich.panel import Panel
+    from rich.prompt import Confirm
+    
+    tool_manager = get_tool_manager()
     try:
         if not tool_use:
             return {"success": False, "error": "No tool use specified"}
@@ -259,89 +440,306 @@ def execute_tool(tool_use: Optional[Dict[str, Any]], yes: bool = False) -> Dict[
             "error": str(e)
         }
 
+def require_aws_config() -> Dict[str, str]:
+    """Get the AWS configuration, exiting if no region is set."""
+    aws_config = get_aws_config()
+    if not aws_config.get('region_name'):
+        console.print("[red]Error: AWS region not set. Please set AWS_REGION or AWS_DEFAULT_REGION environment variable.[/red]")
+        raise typer.Exit(1)
+    return aws_config
+
+def run_task(
+    bedrock,
+    task: str,
+    aws_config: Dict[str, str],
+    verbose: bool = False,
+    yes: bool = False,
+    stream: bool = False,
+    use_cache: Optional[bool] = None
+) -> str:
+    """Run a single task against the model and record it in the session.
+    
+    Args:
+        bedrock: Bedrock runtime client to call
+        task: The task or question
+        aws_config: AWS configuration the client was built from
+        verbose: Show detailed output
+        yes: Automatically confirm all prompts
+        stream: Stream the response as it is generated
+        use_cache: Use the response cache (None defers to KAZURI_CACHE)
+        
+    Returns:
+        The model's completion
+    """
+    started = time.perf_counter()
+    session = get_session()
+    tool_manager = get_tool_manager()
+    
+    # Get environment details
+    env_details = get_environment_details()
+    
+    # Build the request with conversation history
+    body = build_task_request(task, env_details)
+    prepared = time.perf_counter() - started
+    tool_results = []
+    
+    def handle_tool_use(tool_use: Dict[str, Any]):
+        result = run_tool_use(tool_use, yes)
+        if result:
+            tool_results.append(result)
+    
+    # Identical requests over unchanged files can be answered from the cache
+    cache = get_response_cache(use_cache)
+    cache_key = cache.make_key(MODEL_ID, body, referenced_files(task)) if cache else None
+    response_body = cache.get(cache_key) if cache else None
+    cached = response_body is not None
+    streamed = stream and not cached
+    
+    if cached:
+        console.print("[dim]Using cached response[/dim]")
+        completion = response_body['content'][0]['text']
+        for tool_use in parse_tool_calls(completion):
+            handle_tool_use(tool_use)
+    elif stream:
+        # With --yes nothing needs confirming, so tools run as soon as
+        # their call has streamed in; otherwise wait for the full response
+        pending = []
+        completion, first_token, usage = stream_completion(
+            bedrock, body, on_tool_call=handle_tool_use if yes else pending.append
+        )
+        if first_token is not None:
+            console.print(f"[dim]Time to first token: {first_token:.2f}s[/dim]")
+        for tool_use in pending:
+            handle_tool_use(tool_use)
+        response_body = {"content": [{"type": "text", "text": completion}], "usage": usage}
+    else:
+        console.print("[green]Thinking...[/green]")
+        response_body = invoke_model(bedrock, body)
+        completion = response_body['content'][0]['text']
+        
+        # Process any tool use before displaying response
+        for tool_use in parse_tool_calls(completion):
+            handle_tool_use(tool_use)
+    
+    if cache and not cached:
+        cache.put(cache_key, response_body)
+    
+    # Store interaction in session
+    session.add_interaction(task, completion, tool_results)
+    
+    # Display the response (already rendered live when streaming)
+    if not streamed:
+        console.print(response_panel(completion))
+    
+    # If verbose, show additional debug info
+    if verbose:
+        console.print("\n[dim]Debug Information:[/dim]")
+        console.print(f"[dim]Current Directory: {os.getcwd()}[/dim]")
+        console.print(f"[dim]Available Tools: {tool_manager.list_tools()}[/dim]")
+        console.print(f"[dim]AWS Region: {aws_config['region_name']}[/dim]")
+        console.print(f"[dim]Session File: {session.current_session}[/dim]")
+        console.print(f"[dim]Prompt Prepared In: {prepared * 1000:.1f}ms[/dim]")
+        if not cached and response_body.get("usage"):
+            console.print(f"[dim]Tokens: {format_usage(response_body['usage'])}[/dim]")
+        if cache:
+            stats = cache.stats()
+            console.print(f"[dim]Response Cache: {'hit' if cached else 'miss'} ({stats['hits']} hits, {stats['misses']} misses)[/dim]")
+        if tool_manager.result_cache is not None:
+            stats = tool_manager.result_cache.stats()
+            console.print(
+                f"[dim]Tool Result Cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['entries']} entries ({stats['bytes']} bytes)[/dim]"
+            )
+        console.print("\n[dim]Recent Context:[/dim]")
+        console.print(session.get_recent_context())
+    
+    return completion
+
 @app.command()
 def ask(
     task: str = typer.Argument(..., help="The task or question you want help with"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Show detailed output"),
-    yes: bool = typer.Option(False, "--yes", "-y", help="Automatically confirm all prompts")
+    yes: bool = typer.Option(False, "--yes", "-y", help="Automatically confirm all prompts"),
+    stream: bool = typer.Option(False, "--stream", "-s", help="Stream the response as it is generated"),
+    cache: Optional[bool] = typer.Option(None, "--cache/--no-cache", help="Use the on-disk response cache (default: KAZURI_CACHE)")
 ):
     """Ask Kazuri for help with a development task."""
     try:
         # Get AWS configuration
-        aws_config = get_aws_config()
-        if not aws_config.get('region_name'):
-            console.print("[red]Error: AWS region not set. Please set AWS_REGION or AWS_DEFAULT_REGION environment variable.[/red]")
-            raise typer.Exit(1)
+        aws_config = require_aws_config()
         
-        # Initialize AWS Bedrock client
-        bedrock = boto3.client(**aws_config)
-        
-        # Get environment details
-        env_details = get_environment_details()
-        
-        # Format prompt with conversation history
-        formatted_prompt = format_task_for_claude(task, env_details)
-        
-        # Call Claude through AWS Bedrock
-        console.print("[green]Thinking...[/green]")
-        body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": formatted_prompt
-                }
-            ],
-            "max_tokens": 2048,
-            "temperature": 0.7
-        }
-        
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-            body=json.dumps(body)
-        )
+        # Get the shared, tuned AWS Bedrock client
+        bedrock = get_bedrock_client(aws_config)
         
-        response_body = json.loads(response['body'].read())
-        completion = response_body['content'][0]['text']
+        run_task(bedrock, task, aws_config, verbose=verbose, yes=yes, stream=stream, use_cache=cache)
+    
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+@app.command()
+def shell(
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Show detailed output"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Automatically confirm all prompts"),
+    stream: bool = typer.Option(False, "--stream", "-s", help="Stream responses as they are generated"),
+    cache: Optional[bool] = typer.Option(None, "--cache/--no-cache", help="Use the on-disk response cache (default: KAZURI_CACHE)")
+):
+    """Start an interactive Kazuri session.
+    
+    The Bedrock client, session history and tools stay loaded between
+    turns, so each task only pays for the model call itself.
+    """
+    from rich.prompt import Prompt
+    
+    try:
+        aws_config = require_aws_config()
+        bedrock = get_bedrock_client(aws_config)
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+    
+    session = get_session()
+    console.print("[green]Kazuri shell[/green] [dim](type 'exit' to quit, 'clear' to reset history, 'info' for session details)[/dim]")
+    while True:
+        try:
+            task = Prompt.ask("[bold green]kazuri[/bold green]").strip()
+        except (EOFError, KeyboardInterrupt):
+            console.print()
+            break
         
-        # Process any tool use before displaying response
-        tool_use = process_tool_use(completion)
-        tool_results = []
-        if tool_use:
-            result = execute_tool(tool_use, yes)
-            if result:
-                tool_results.append(result)
-                if result.get("success"):
-                    console.print("[green]Tool execution successful[/green]")
-                    if "content" in result:
-                        console.print(result["content"])
-                    elif "files" in result:
-                        console.print("\n".join(result["files"]))
-                else:
-                    console.print(f"[red]Tool execution failed: {result.get('error', 'Unknown error')}[/red]")
+        if not task:
+            continue
+        if task in ("exit", "quit"):
+            break
+        if task == "clear":
+            session.clear_history()
+            console.print("[green]Session history cleared[/green]")
+            continue
+        if task == "info":
+            for key, value in session.get_session_info().items():
+                console.print(f"{key}: {value}")
+            continue
         
-        # Store interaction in session
-        session.add_interaction(task, completion, tool_results)
+        try:
+            run_task(bedrock, task, aws_config, verbose=verbose, yes=yes, stream=stream, use_cache=cache)
+        except KeyboardInterrupt:
+            console.print("[yellow]Interrupted[/yellow]")
+        except Exception as e:
+            console.print(f"[red]Error: {str(e)}[/red]")
+
+@app.command()
+def batch(
+    tasks_file: str = typer.Argument("-", help="JSONL file of tasks, or - to read from stdin"),
+    concurrency: int = typer.Option(4, "--concurrency", "-c", help="Maximum number of concurrent requests"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Write NDJSON results to this file instead of stdout"),
+    session_dir: Optional[str] = typer.Option(None, "--session-dir", help="Directory for the per-task sessions"),
+    cache: Optional[bool] = typer.Option(None, "--cache/--no-cache", help="Use the on-disk response cache (default: KAZURI_CACHE)")
+):
+    """Run many tasks concurrently and stream the results as NDJSON.
+    
+    Each line of input is a JSON object with a "task" field (and optional
+    "id") or a bare JSON string. Tool calls are reported, not executed.
+    """
+    import sys
+    from .batch import read_tasks, run_batch
+    
+    status = Console(stderr=True)
+    try:
+        aws_config = require_aws_config()
+        bedrock = get_bedrock_client(aws_config)
         
-        # Display the response
-        console.print(Panel(
-            Markdown(completion),
-            title="Kazuri's Response",
-            border_style="green"
-        ))
+        source = sys.stdin if tasks_file == "-" else open(tasks_file, 'r')
+        sink = open(output, 'w') if output else sys.stdout
+        try:
+            def emit(result: Dict[str, Any]):
+                sink.write(json.dumps(result) + "\n")
+                sink.flush()
+            
+            summary = run_batch(
+                bedrock, read_tasks(source), emit, concurrency, session_dir,
+                cache=get_response_cache(cache)
+            )
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if sink is not sys.stdout:
+                sink.close()
         
-        # If verbose, show additional debug info
-        if verbose:
-            console.print("\n[dim]Debug Information:[/dim]")
-            console.print(f"[dim]Current Directory: {os.getcwd()}[/dim]")
-            console.print(f"[dim]Available Tools: {tool_manager.list_tools()}[/dim]")
-            console.print(f"[dim]AWS Region: {aws_config['region_name']}[/dim]")
-            console.print(f"[dim]Session File: {session.current_session}[/dim]")
-            console.print("\n[dim]Recent Context:[/dim]")
-            console.print(session.get_recent_context())
-    
+        status.print(
+            f"[green]Batch complete:[/green] {summary['succeeded']} succeeded, "
+            f"{summary['failed']} failed in {summary['elapsed_ms'] / 1000:.1f}s"
+            + (f" ({summary['cache_hits']} from cache)" if summary['cache_hits'] else "")
+        )
+    except typer.Exit:
+        raise
     except Exception as e:
-        console.print(f"[red]Error: {str(e)}[/red]")
+        status.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+@app.command("cache")
+def cache_command(
+    action: str = typer.Argument("stats", help="stats or clear")
+):
+    """Show response cache statistics or clear the cache."""
+    response_cache = get_response_cache(True)
+    if action == "stats":
+        for key, value in response_cache.stats().items():
+            console.print(f"{key}: {value}")
+    elif action == "clear":
+        removed = response_cache.clear()
+        console.print(f"[green]Removed {removed} cached responses[/green]")
+    else:
+        console.print(f"[red]Error: Unknown cache action: {action}[/red]")
+        raise typer.Exit(1)
+
+@app.command("sessions")
+def sessions_command(
+    action: str = typer.Argument("gc", help="gc"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Report what would be removed without removing it"),
+    session_dir: Optional[str] = typer.Option(None, "--session-dir", help="Session directory to prune")
+):
+    """Archive idle sessions and prune old sessions and artifacts."""
+    from .retention import get_session_retention
+    from .session import DEFAULT_SESSION_DIR
+    
+    if action != "gc":
+        console.print(f"[red]Error: Unknown sessions action: {action}[/red]")
+        raise typer.Exit(1)
+    report = get_session_retention(session_dir or DEFAULT_SESSION_DIR).collect(dry_run=dry_run)
+    prefix = "Would reclaim" if dry_run else "Reclaimed"
+    console.print(
+        f"[green]{prefix} {report['bytes_reclaimed']} bytes:[/green] "
+        f"{report['archived']} sessions archived, {report['deleted_sessions']} deleted, "
+        f"{report['evicted_artifacts']} artifacts evicted"
+    )
+
+@app.command("index")
+def index_command(
+    action: str = typer.Argument("status", help="build or status"),
+    path: str = typer.Option(".", "--path", help="Workspace directory to index")
+):
+    """Build or inspect the trigram index used by search_files."""
+    from .trigram import TrigramIndex
+
+    if action == "build":
+        start = time.time()
+        with TrigramIndex(path) as index:
+            _, counts = index.update()
+        console.print(
+            f"[green]Indexed {index.root} in {time.time() - start:.1f}s:[/green] "
+            f"{counts['added']} added, {counts['updated']} updated, "
+            f"{counts['removed']} removed, {counts['unchanged']} unchanged"
+        )
+    elif action == "status":
+        index = TrigramIndex.find(path)
+        if index is None:
+            console.print("[yellow]No index found; run `kazuri index build` to create one[/yellow]")
+            return
+        with index:
+            for key, value in index.status().items():
+                console.print(f"{key}: {value}")
+    else:
+        console.print(f"[red]Error: Unknown index action: {action}[/red]")
         raise typer.Exit(1)
 
 @app.command()
@@ -0,0 +1,190 @@
+import os
+from typing import List, Dict, Any, Tuple, Optional
+from .retrieval import HistoryIndex
+
+# Rough average for English text and code; good enough to enforce a budget
+CHARS_PER_TOKEN = 4
+
+DEFAULT_BUDGET_TOKENS = 8000
+DEFAULT_MAX_TURNS = 5
+DEFAULT_TOOL_RESULT_TOKENS = 500
+DEFAULT_SUMMARY_TURNS = 20
+DEFAULT_RECENT_TURNS = 2
+
+# Length of the task and response excerpts in a compacted turn
+SUMMARY_EXCERPT_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens, noting how much was dropped."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}\n... [truncated {len(text) - max_chars} characters]"
+
+
+def _excerpt(text: str) -> str:
+    line = " ".join(str(text).split())
+    if len(line) > SUMMARY_EXCERPT_CHARS:
+        line = line[:SUMMARY_EXCERPT_CHARS - 3] + "..."
+    return line
+
+
+class ContextBuilder:
+    """Builds conversation history for a prompt within a token budget.
+
+    The most recent turns are included in full, with oversized tool results
+    truncated. Given the new task and a HistoryIndex, only the newest
+    `recent_turns` are always kept and the rest of the full turns are the
+    older ones most relevant to the task. Turns that are not included are
+    compacted into one-line summaries, which are cached so they are only
+    computed once per turn. The history may be a lazy sequence: the newest
+    turns are read with one slice and older ones only when chosen by
+    relevance, so the work per prompt does not grow with the history.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int = DEFAULT_BUDGET_TOKENS,
+        max_turns: int = DEFAULT_MAX_TURNS,
+        max_tool_result_tokens: int = DEFAULT_TOOL_RESULT_TOKENS,
+        summary_turns: int = DEFAULT_SUMMARY_TURNS,
+        recent_turns: int = DEFAULT_RECENT_TURNS
+    ):
+        """Initialize context builder.
+
+        Args:
+            budget_tokens: Maximum estimated tokens of history per prompt
+            max_turns: Maximum number of turns included in full
+            max_tool_result_tokens: Size each tool result is truncated to
+            summary_turns: Maximum number of older turns kept as summaries
+            recent_turns: Newest turns always included when selecting the
+                others by relevance
+        """
+        self.budget_tokens = budget_tokens
+        self.max_turns = max_turns
+        self.max_tool_result_tokens = max_tool_result_tokens
+        self.summary_turns = summary_turns
+        self.recent_turns = recent_turns
+        self._summaries: Dict[Tuple[str, str], str] = {}
+
+    def turn_messages(self, interaction: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Render one interaction as a user and an assistant message."""
+        response = interaction.get('response', '')
+        tool_uses = [t for t in interaction.get('tool_uses', []) if isinstance(t, dict)]
+        if tool_uses:
+            response += "\n\nTool Uses:\n" + "\n".join(
+                f"- {t.get('tool', 'unknown_tool')}: "
+                f"{truncate_text(str(t.get('result', 'No result')), self.max_tool_result_tokens)}"
+                for t in tool_uses
+            )
+        return [
+            {"role": "user", "content": interaction.get('task', '')},
+            {"role": "assistant", "content": response}
+        ]
+
+    def summarize(self, interaction: Dict[str, Any]) -> str:
+        """Compact an interaction into a single line."""
+        key = (interaction.get('timestamp', ''), interaction.get('task', ''))
+        summary = self._summaries.get(key)
+        if summary is None:
+            response = interaction.get('response', '').strip().split('\n', 1)[0]
+            summary = f"- {_excerpt(interaction.get('task', ''))} -> {_excerpt(response)}"
+            tools = [t.get('tool', 'unknown_tool') for t in interaction.get('tool_uses', []) if isinstance(t, dict)]
+            if tools:
+                summary += f" [tools: {', '.join(tools)}]"
+            self._summaries[key] = summary
+        return summary
+
+    def build(
+        self,
+        history: List[Dict[str, Any]],
+        query: Optional[str] = None,
+        index: Optional[HistoryIndex] = None
+    ) -> Tuple[str, List[Dict[str, str]]]:
+        """Select history for a prompt.
+
+        Args:
+            history: Session history, oldest first (a list or a lazy
+                sequence such as SessionHistory)
+            query: The new task; with an index, older turns are chosen by
+                relevance to it instead of recency
+            index: Relevance index over the history, or over its most
+                recent part
+
+        Returns:
+            Tuple of the summary of compacted older turns (empty if none)
+            and the selected turns, oldest first, as alternating
+            user/assistant messages
+        """
+        remaining = self.budget_tokens
+        chosen: Dict[int, List[Dict[str, str]]] = {}
+        count = len(history)
+        # Every turn but the relevant older ones comes from this window
+        window_start = max(0, count - self.max_turns - self.summary_turns)
+        window = history[window_start:]
+
+        def interaction(position: int) -> Dict[str, Any]:
+            if position >= window_start:
+                return window[position - window_start]
+            return history[position]
+
+        def include(position: int) -> bool:
+            nonlocal remaining
+            messages = self.turn_messages(interaction(position))
+            cost = sum(estimate_tokens(m["content"]) for m in messages)
+            if cost > remaining:
+                return False
+            chosen[position] = messages
+            remaining -= cost
+            return True
+
+        by_relevance = bool(query) and index is not None and index.end == count
+        oldest = count
+        newest_turns = min(self.recent_turns, self.max_turns) if by_relevance else self.max_turns
+        while oldest > 0 and len(chosen) < newest_turns and include(oldest - 1):
+            oldest -= 1
+
+        if by_relevance:
+            slots = self.max_turns - len(chosen)
+            for position, _ in index.search(query, k=slots * 4, before=oldest):
+                if len(chosen) >= self.max_turns:
+                    break
+                include(position)
+
+        summaries = []
+        for position in reversed(range(count)):
+            if len(summaries) >= self.summary_turns:
+                break
+            if position in chosen:
+                continue
+            line = self.summarize(interaction(position))
+            cost = estimate_tokens(line) + 1
+            if cost > remaining:
+                break
+            summaries.append(line)
+            remaining -= cost
+
+        messages = [message for position in sorted(chosen) for message in chosen[position]]
+        return "\n".join(reversed(summaries)), messages
+
+
+_builder: Optional[ContextBuilder] = None
+
+
+def get_context_builder() -> ContextBuilder:
+    """Get the shared context builder configured from the environment."""
+    global _builder
+    if _builder is None:
+        _builder = ContextBuilder(
+            budget_tokens=int(os.getenv('KAZURI_CONTEXT_BUDGET') or DEFAULT_BUDGET_TOKENS),
+            max_turns=int(os.getenv('KAZURI_CONTEXT_TURNS') or DEFAULT_MAX_TURNS),
+            max_tool_result_tokens=int(os.getenv('KAZURI_TOOL_RESULT_TOKENS') or DEFAULT_TOOL_RESULT_TOKENS),
+            recent_turns=int(os.getenv('KAZURI_CONTEXT_RECENT_TURNS') or DEFAULT_RECENT_TURNS)
+        )
+    return _builder
@@ -0,0 +1,274 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Directories that are never worth walking into, ignore files or not
+DEFAULT_EXCLUDES = frozenset({
+    ".git", ".hg", ".svn",
+    "node_modules", "__pycache__",
+    ".venv", "venv", ".tox", ".nox",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    ".kazuri_sessions", ".kazuri_cache",
+})
+
+IGNORE_FILE = ".gitignore"
+
+# Path -> (mtime_ns, size) of what a walk read, for callers caching results
+Watch = Dict[str, Tuple[int, int]]
+
+# Recorded for an ignore file that does not exist yet
+MISSING = (-1, -1)
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            parts.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape("["))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            parts.append(f"[{body}]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """Rules from one .gitignore file.
+
+    Paths are matched relative to the directory holding the file, using
+    gitignore semantics: the last matching rule wins, "!" re-includes,
+    a trailing "/" only matches directories, and a pattern containing a
+    "/" is anchored to the directory while others match at any depth.
+    """
+
+    def __init__(self, base: str, lines: List[str]):
+        """Initialize ignore rules.
+
+        Args:
+            base: Directory of the ignore file, relative to the walk's top
+                directory in POSIX form ("" for the top itself)
+            lines: Lines of the ignore file
+        """
+        self.base = f"{base}/" if base else ""
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            prefix = "" if anchored else "(?:.*/)?"
+            self.rules.append((re.compile(f"^{prefix}{_translate(line)}$", re.DOTALL), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path: Path, base: str, watch: Optional[Watch] = None) -> Optional["IgnoreRules"]:
+        """Load the rules of an ignore file, or None if it has none.
+
+        The file is recorded in `watch`, if given, before it is read.
+        """
+        try:
+            if watch is not None:
+                record_stat(watch, str(path))
+            with open(path, 'r', errors='replace') as f:
+                rules = cls(base, f.readlines())
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Check a path against the rules.
+
+        Args:
+            rel_path: Path relative to the walk's top directory, POSIX form
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if ignored, False if explicitly re-included, None if no
+            rule matches
+        """
+        if not rel_path.startswith(self.base):
+            return None
+        rel_path = rel_path[len(self.base):]
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negate
+        return None
+
+
+def record_stat(watch: Watch, path: str):
+    """Record a path's modification time and size.
+
+    Raises:
+        OSError: If the path cannot be stat'ed
+    """
+    stat = os.stat(path)
+    watch[path] = (stat.st_mtime_ns, stat.st_size)
+
+
+def _is_ignored(rules: List[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+    for ruleset in reversed(rules):
+        matched = ruleset.match(rel_path, is_dir)
+        if matched is not None:
+            return matched
+    return False
+
+
+def _repository_rules(root: Path, watch: Optional[Watch] = None) -> Tuple[str, List[IgnoreRules]]:
+    """Find the ignore rules that apply to root from its enclosing repository.
+
+    Returns:
+        Tuple of root's path relative to the repository top ("" if root is
+        the top or not in a repository) and the rules of the ignore files
+        from the top down to root's parent
+    """
+    for top in [root, *root.parents]:
+        if (top / ".git").exists():
+            break
+    else:
+        return "", []
+    prefix = root.relative_to(top).as_posix()
+    if prefix == ".":
+        return "", []
+    rules = []
+    directory = top
+    for part in ("",) + Path(prefix).parts[:-1]:
+        directory = directory / part if part else directory
+        base = directory.relative_to(top).as_posix()
+        ignore_file = directory / IGNORE_FILE
+        ruleset = IgnoreRules.from_file(ignore_file, "" if base == "." else base, watch)
+        if ruleset:
+            rules.append(ruleset)
+        elif watch is not None:
+            # Creating it would change the rules, but not the listings walked
+            watch.setdefault(str(ignore_file), MISSING)
+    return prefix, rules
+
+
+def _walk_key(rel_path: str, is_dir: bool) -> Tuple[Tuple[int, str], ...]:
+    """Sort key giving walk_files' order: a directory's files, then its subdirectories."""
+    parts = rel_path.split("/")
+    return tuple((1, part) for part in parts[:-1]) + ((1 if is_dir else 0, parts[-1]),)
+
+
+def walk_files(
+    root: str,
+    use_ignore_files: bool = True,
+    excludes: frozenset = DEFAULT_EXCLUDES,
+    max_depth: Optional[int] = None,
+    start_after: Optional[str] = None,
+    watch: Optional[Watch] = None
+) -> Iterator[Tuple[str, str]]:
+    """Walk a directory tree, skipping excluded and ignored paths.
+
+    Directories in `excludes`, virtualenvs (directories with a pyvenv.cfg)
+    and, when use_ignore_files is set, paths matched by .gitignore files
+    (including those between root and its repository's top) are not
+    descended into. Symlinked directories are not followed.
+
+    Files come in a fixed order, each directory's files by name and then
+    its subdirectories by name, so a walk can be resumed after any file:
+    subtrees before it are skipped without being read.
+
+    Args:
+        root: Directory to walk
+        use_ignore_files: Honor .gitignore files
+        excludes: Directory names that are always skipped
+        max_depth: Levels of subdirectories to descend into (0 for root's
+            own files only, None for no limit)
+        start_after: Relative path of a file from an earlier walk; only
+            the files after it are yielded
+        watch: Dict in which each directory listed and ignore file read
+            is recorded, just before it is read; if none of them has
+            changed since, the walk would yield the same files
+
+    Yields:
+        Tuples of (path, path relative to root in POSIX form) for each file
+    """
+    root_path = Path(root).resolve()
+    prefix, rules = _repository_rules(root_path, watch) if use_ignore_files else ("", [])
+    resume_key = _walk_key(start_after, False) if start_after else None
+    stack = [(str(root_path), "", rules, 0)]
+    while stack:
+        directory, rel_dir, rules, depth = stack.pop()
+        if use_ignore_files:
+            ruleset = IgnoreRules.from_file(
+                Path(directory) / IGNORE_FILE, "/".join(filter(None, (prefix, rel_dir))), watch
+            )
+            if ruleset:
+                rules = rules + [ruleset]
+        try:
+            if watch is not None:
+                record_stat(watch, directory)
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                continue
+            if is_dir:
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                if entry.name in excludes or os.path.exists(os.path.join(entry.path, "pyvenv.cfg")):
+                    continue
+            elif not is_file:
+                continue
+            if resume_key:
+                key = _walk_key(rel_path, is_dir)
+                # Skip files up to the resume point and subtrees wholly before it
+                if key <= resume_key if not is_dir else key < resume_key[:len(key)]:
+                    continue
+            if rules and _is_ignored(rules, f"{prefix}/{rel_path}" if prefix else rel_path, is_dir):
+                continue
+            if is_dir:
+                subdirectories.append((entry.path, rel_path, rules, depth + 1))
+            else:
+                # Everything after the first file yielded is past the resume point
+                resume_key = None
+                yield entry.path, rel_path
+        # Reversed so directories are walked in name order
+        stack.extend(reversed(subdirectories))
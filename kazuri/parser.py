@@ -0,0 +1,277 @@
+import re
+from typing import List, Dict, Any, Optional, Iterable
+from .tools import ToolManager
+
+# Parser states
+TEXT = "text"
+TOOL_NAME = "tool_name"
+CALL = "call"
+PARAM = "param"
+WRITE_FILE = "write_file"
+
+# Longest run after a '<' that is still treated as a possible tag
+MAX_TAG_LENGTH = 64
+
+TAG_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_\-]*')
+
+
+class ToolCallParser:
+    """Incremental parser for tool calls in a model completion.
+
+    Text can be fed in arbitrary chunks as it streams in; every complete tool
+    call is returned as soon as the text that closes it arrives. Three forms
+    are recognised:
+
+    - ``<tool_name>name</tool_name>`` followed by parameter tags. The call
+      ends at the next ``<tool_name>``, at any prose after the parameters, or
+      at the end of the completion.
+    - ``<name>`` for a known tool wrapping parameter tags, ending at ``</name>``.
+    - ``<write_file> filename: path`` followed by code lines, ending at the
+      first line starting with ``</``.
+
+    Parameter values are only scanned for their own closing tag, so code in
+    ``<content>`` may freely contain markup.
+    """
+
+    def __init__(self, tool_names: Optional[Iterable[str]] = None):
+        """Initialize parser.
+
+        Args:
+            tool_names: Tool names recognised as wrapping tags (defaults to
+                all tools known to ToolManager)
+        """
+        self.tool_names = set(tool_names if tool_names is not None else ToolManager.TOOLS)
+        self._buf = ""
+        self._state = TEXT
+        self._parts: List[str] = []
+        self._tool: Optional[str] = None
+        self._closing: Optional[str] = None
+        self._params: Dict[str, str] = {}
+        self._param: Optional[str] = None
+        self._lines: List[str] = []
+        self._filename: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Feed the next chunk of the completion.
+
+        Args:
+            chunk: Newly received text
+
+        Returns:
+            List of tool calls completed by this chunk
+        """
+        self._buf += chunk
+        calls: List[Dict[str, Any]] = []
+        while self._step(calls):
+            pass
+        return calls
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Signal the end of the completion.
+
+        Returns:
+            List of tool calls that were still open
+        """
+        calls: List[Dict[str, Any]] = []
+        if self._state == WRITE_FILE:
+            if self._filename is None:
+                match = re.match(r'\s*filename:\s*([^\n]+)', self._buf)
+                if match:
+                    self._filename = match.group(1).strip()
+                    self._buf = self._buf[match.end():]
+            if self._filename is not None:
+                self._write_file_lines(self._buf, calls, final=True)
+        elif self._state in (CALL, PARAM):
+            # An unterminated parameter is dropped, like a truncated response
+            self._emit(calls)
+        self._reset()
+        self._buf = ""
+        return calls
+
+    def _reset(self):
+        self._state = TEXT
+        self._parts = []
+        self._tool = None
+        self._closing = None
+        self._params = {}
+        self._param = None
+        self._lines = []
+        self._filename = None
+
+    def _emit(self, calls: List[Dict[str, Any]]):
+        if self._tool:
+            calls.append({
+                "tool": self._tool,
+                "parameters": self._params
+            })
+        self._reset()
+
+    def _next_tag(self):
+        """Find the next complete tag in the buffer.
+
+        Returns:
+            Tuple of (start, end, tag) for a complete tag, (start, None, None)
+            if a tag may still be arriving, or None if there is no tag
+        """
+        start = self._buf.find("<")
+        while start != -1:
+            end = self._buf.find(">", start)
+            if end == -1:
+                if len(self._buf) - start <= MAX_TAG_LENGTH:
+                    return start, None, None
+            else:
+                tag = self._buf[start + 1:end]
+                name = tag[1:] if tag.startswith("/") else tag
+                if TAG_NAME.fullmatch(name):
+                    return start, end + 1, tag
+            start = self._buf.find("<", start + 1)
+        return None
+
+    def _read_until(self, closing: str) -> Optional[str]:
+        """Consume the buffer up to a closing tag.
+
+        Text before the tag is moved into the pending parts as it arrives, so
+        large values are scanned once.
+        """
+        idx = self._buf.find(closing)
+        if idx == -1:
+            keep = len(closing) - 1
+            if len(self._buf) > keep:
+                self._parts.append(self._buf[:len(self._buf) - keep])
+                self._buf = self._buf[len(self._buf) - keep:]
+            return None
+
+        self._parts.append(self._buf[:idx])
+        value = "".join(self._parts)
+        self._parts = []
+        self._buf = self._buf[idx + len(closing):]
+        return value
+
+    def _step(self, calls: List[Dict[str, Any]]) -> bool:
+        """Advance the state machine; returns False when more input is needed."""
+        if self._state == TEXT:
+            found = self._next_tag()
+            if found is None:
+                self._buf = ""
+                return False
+            start, end, tag = found
+            if end is None:
+                self._buf = self._buf[start:]
+                return False
+            self._buf = self._buf[end:]
+            if tag == "tool_name":
+                self._state = TOOL_NAME
+            elif tag == "write_file":
+                self._state = WRITE_FILE
+            elif tag in self.tool_names:
+                self._tool = tag
+                self._closing = tag
+                self._state = CALL
+            return True
+
+        if self._state == TOOL_NAME:
+            name = self._read_until("</tool_name>")
+            if name is None:
+                return False
+            self._tool = name.strip()
+            self._closing = None
+            self._state = CALL
+            return True
+
+        if self._state == CALL:
+            found = self._next_tag()
+            if found is None:
+                text, start, end, tag = self._buf, None, None, None
+            else:
+                start, end, tag = found
+                text = self._buf[:start]
+
+            # Prose after the parameters ends a <tool_name> call
+            if self._closing is None and text.strip():
+                self._emit(calls)
+                return True
+
+            if found is None:
+                self._buf = ""
+                return False
+            if end is None:
+                self._buf = self._buf[start:]
+                return False
+            self._buf = self._buf[end:]
+
+            if tag == "tool_name":
+                self._emit(calls)
+                self._state = TOOL_NAME
+            elif tag.startswith("/"):
+                if self._closing is not None and tag[1:] == self._closing:
+                    self._emit(calls)
+            else:
+                self._param = tag
+                self._state = PARAM
+            return True
+
+        if self._state == PARAM:
+            value = self._read_until(f"</{self._param}>")
+            if value is None:
+                return False
+            self._params[self._param] = value.strip()
+            self._param = None
+            self._state = CALL
+            return True
+
+        if self._state == WRITE_FILE:
+            if self._filename is None:
+                match = re.match(r'\s*filename:\s*([^\n]+)\n', self._buf)
+                if match is None:
+                    head = self._buf.lstrip()
+                    if head and not (head.startswith("filename:") or "filename:".startswith(head)):
+                        # Not the alternative write_file form after all
+                        self._reset()
+                        return True
+                    return False
+                self._filename = match.group(1).strip()
+                self._buf = self._buf[match.end():]
+                return True
+            return self._write_file_lines(self._buf, calls)
+
+        return False
+
+    def _write_file_lines(self, text: str, calls: List[Dict[str, Any]], final: bool = False) -> bool:
+        """Collect code lines for the <write_file> form until a closing line."""
+        lines = text.split("\n")
+        tail = "" if final else lines.pop()
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if stripped.startswith("</"):
+                self._buf = "\n".join(lines[i + 1:] + [tail])
+                self._finish_write_file(calls)
+                return True
+            if stripped:
+                self._lines.append(line)
+
+        self._buf = tail
+        if final:
+            self._finish_write_file(calls)
+        return False
+
+    def _finish_write_file(self, calls: List[Dict[str, Any]]):
+        self._tool = "write_to_file"
+        self._params = {
+            "path": self._filename,
+            "content": "\n".join(self._lines).strip()
+        }
+        self._emit(calls)
+
+
+def parse_tool_calls(text: str, tool_names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """Parse every tool call in a complete response.
+
+    Args:
+        text: The full model completion
+        tool_names: Optional override for the recognised tool names
+
+    Returns:
+        List of tool call dictionaries with "tool" and "parameters"
+    """
+    parser = ToolCallParser(tool_names)
+    return parser.feed(text) + parser.close()
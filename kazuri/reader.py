@@ -0,0 +1,285 @@
+import codecs
+import mmap
+import os
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
+from .search import SNIFF_BYTES
+
+# Content returned by one read; the rest is fetched with the next_* hint
+DEFAULT_READ_BYTES = 256 * 1024
+
+# Granularity of the line-offset index and of iter_chunks
+CHUNK_BYTES = 64 * 1024
+
+
+@lru_cache(maxsize=16)
+def _newline_counts(path: str, mtime_ns: int, size: int) -> Tuple[int, ...]:
+    """Count the newlines before each CHUNK_BYTES block of a file.
+
+    Keyed by modification time and size, so an edited file is scanned
+    again. Entry i is the number of newlines before offset i * CHUNK_BYTES;
+    the last entry is the total.
+    """
+    counts = [0]
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_BYTES), b""):
+            counts.append(counts[-1] + block.count(b"\n"))
+    return tuple(counts)
+
+
+class TextFile:
+    """Memory-mapped view of a file for reading parts of it as text.
+
+    Only the pages a read touches are loaded, so taking the head, the tail
+    or a byte range of a multi-gigabyte log costs about as much as the
+    returned text. Line numbers are resolved with a sparse line-offset
+    index (newlines per CHUNK_BYTES block), built in one pass the first
+    time a line range is asked for and cached until the file changes.
+    The encoding must be ASCII-compatible so "\\n" bytes are newlines.
+    """
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        """Open and map a file.
+
+        Args:
+            path: File to read
+            encoding: Text encoding; undecodable bytes are replaced
+
+        Raises:
+            OSError: If the file cannot be opened or mapped
+        """
+        self.path = os.path.realpath(path)
+        self.encoding = encoding
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.size = stat.st_size
+            self.mtime_ns = stat.st_mtime_ns
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def is_binary(self) -> bool:
+        """Whether the file has a NUL byte in its first block."""
+        return self.data.find(b"\0", 0, SNIFF_BYTES) != -1
+
+    def decode(self, start: int, end: int) -> str:
+        """Decode a byte range, dropping a UTF-8 byte order mark at the start."""
+        if start == 0 and self.data[:3] == codecs.BOM_UTF8:
+            start = 3
+        return self.data[start:end].decode(self.encoding, errors='replace')
+
+    def _counts(self) -> Tuple[int, ...]:
+        return _newline_counts(self.path, self.mtime_ns, self.size)
+
+    def total_lines(self) -> int:
+        """Number of lines, counting a last line without a newline."""
+        if not self.size:
+            return 0
+        return self._counts()[-1] + (self.data[-1:] != b"\n")
+
+    def line_offset(self, line: int) -> int:
+        """Byte offset at which a 1-based line starts (the size past the end)."""
+        target = line - 1
+        if target <= 0:
+            return 0
+        counts = self._counts()
+        if target > counts[-1]:
+            return self.size
+        block = bisect_left(counts, target) - 1
+        position = block * CHUNK_BYTES
+        for _ in range(target - counts[block]):
+            position = self.data.find(b"\n", position) + 1
+        return position
+
+    def head_offset(self, lines: int, max_bytes: Optional[int] = None) -> int:
+        """Byte offset just past the first `lines` lines.
+
+        Args:
+            lines: Number of lines
+            max_bytes: Stop scanning one byte past this many; the result is
+                then more than max_bytes and the read is truncated anyway
+        """
+        end = self.size if max_bytes is None else min(self.size, max_bytes + 1)
+        position = 0
+        for _ in range(lines):
+            found = self.data.find(b"\n", position, end)
+            if found == -1:
+                return end
+            position = found + 1
+        return position
+
+    def tail_offset(self, lines: int, max_bytes: Optional[int] = None) -> int:
+        """Byte offset at which the last `lines` lines start.
+
+        Args:
+            lines: Number of lines
+            max_bytes: Stop scanning one byte before the last max_bytes, as
+                in head_offset
+        """
+        low = 0 if max_bytes is None else max(0, self.size - max_bytes - 1)
+        # A final newline ends the last line rather than starting another
+        position = self.size - 1 if self.data[-1:] == b"\n" else self.size
+        for _ in range(lines):
+            found = self.data.rfind(b"\n", low, position)
+            if found == -1:
+                return low
+            position = found
+        return position + 1 if lines else self.size
+
+    def count_lines(self, start: int, end: int) -> int:
+        """Number of lines, complete or not, in a byte range."""
+        if end <= start:
+            return 0
+        return self.data[start:end].count(b"\n") + (self.data[end - 1:end] != b"\n")
+
+
+def get_read_limit() -> Optional[int]:
+    """Get the most bytes one read returns, from KAZURI_READ_MAX_BYTES.
+
+    Returns:
+        The limit, or None if it is set to 0
+    """
+    max_bytes = int(os.getenv('KAZURI_READ_MAX_BYTES') or DEFAULT_READ_BYTES)
+    return max_bytes if max_bytes > 0 else None
+
+
+def read_range(
+    path: str,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    head: Optional[int] = None,
+    tail: Optional[int] = None,
+    byte_start: Optional[int] = None,
+    byte_end: Optional[int] = None,
+    max_bytes: Optional[int] = DEFAULT_READ_BYTES,
+    encoding: str = "utf-8"
+) -> Dict[str, Any]:
+    """Read part of a text file.
+
+    Exactly one way of selecting the part applies: a line range
+    (start_line/end_line), the first `head` or last `tail` lines, or a
+    byte range (byte_start/byte_end); with none, the whole file is read.
+    At most max_bytes are returned, cut at a line boundary when possible;
+    a truncated result tells where to continue.
+
+    Args:
+        path: File to read
+        start_line: 1-based first line
+        end_line: 1-based last line (inclusive)
+        head: Number of lines from the start
+        tail: Number of lines from the end
+        byte_start: Offset of the first byte
+        byte_end: Offset just past the last byte
+        max_bytes: Maximum bytes of content returned (None for no limit)
+        encoding: Text encoding; undecodable bytes are replaced
+
+    Returns:
+        Dict with the content, the size of the file, the range returned
+        (start_line/end_line when known, byte_start/byte_end) and whether
+        it was truncated, with next_start_line or next_byte_start to
+        continue from; binary files return an error instead of content
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If more than one way of selecting the part is given
+    """
+    modes = [start_line is not None or end_line is not None, head is not None,
+             tail is not None, byte_start is not None or byte_end is not None]
+    if sum(modes) > 1:
+        raise ValueError("Use only one of start_line/end_line, head, tail and byte_start/byte_end")
+
+    with TextFile(path, encoding) as text:
+        result: Dict[str, Any] = {"success": True, "content": None, "size": text.size, "error": None}
+        if text.is_binary():
+            return dict(result, success=False, binary=True, error=f"Binary file ({text.size} bytes): {path}")
+
+        first_line: Optional[int] = 1
+        by_bytes = modes[3]
+        if modes[0]:
+            first_line = max(1, start_line or 1)
+            start = text.line_offset(first_line)
+            end = text.size if end_line is None else text.line_offset(end_line + 1)
+            result["total_lines"] = text.total_lines()
+        elif head is not None:
+            start, end = 0, text.head_offset(head, max_bytes)
+        elif tail is not None:
+            start, end = text.tail_offset(tail, max_bytes), text.size
+            first_line = None
+        elif by_bytes:
+            start = min(max(0, byte_start or 0), text.size)
+            end = text.size if byte_end is None else min(byte_end, text.size)
+            first_line = None
+        else:
+            start, end = 0, text.size
+        end = max(start, end)
+
+        truncated = max_bytes is not None and end - start > max_bytes
+        if truncated:
+            if tail is not None:
+                # Keep the end of the file, starting at a whole line
+                cut = text.data.find(b"\n", end - max_bytes, end)
+                start = cut + 1 if cut != -1 else end - max_bytes
+            else:
+                cut = -1 if by_bytes else text.data.rfind(b"\n", start, start + max_bytes)
+                end = cut + 1 if cut != -1 else start + max_bytes
+
+        result["content"] = text.decode(start, end)
+        result.update(byte_start=start, byte_end=end, truncated=truncated)
+        if first_line is not None:
+            result["start_line"] = first_line
+            result["end_line"] = first_line + text.count_lines(start, end) - 1
+        if truncated and tail is None:
+            if first_line is not None and text.data[end - 1:end] == b"\n":
+                result["next_start_line"] = result["end_line"] + 1
+            else:
+                result["next_byte_start"] = end
+        return result
+
+
+def iter_chunks(
+    path: str,
+    chunk_bytes: int = CHUNK_BYTES,
+    start: int = 0,
+    end: Optional[int] = None,
+    encoding: str = "utf-8"
+) -> Iterator[str]:
+    """Stream a file as text in chunks of about chunk_bytes.
+
+    Characters split across chunk boundaries are decoded whole, so the
+    chunks join up to the decoded file.
+
+    Args:
+        path: File to read
+        chunk_bytes: Bytes read per chunk
+        start: Offset to start at
+        end: Offset to stop at (defaults to the end of the file)
+        encoding: Text encoding; undecodable bytes are replaced
+
+    Yields:
+        Decoded chunks
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = None if end is None else max(0, end - start)
+        while remaining is None or remaining > 0:
+            block = f.read(chunk_bytes if remaining is None else min(chunk_bytes, remaining))
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            text = decoder.decode(block)
+            if text:
+                yield text
+    tail_text = decoder.decode(b"", final=True)
+    if tail_text:
+        yield tail_text
@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from .context import estimate_tokens
+from .ignore import MISSING, Watch, walk_files
+from .symbols import CACHE_FILE, PARSERS, PARSER_VERSION, SymbolIndex, default_cache_dir
+from .trigram import RACY_NANOSECONDS
+
+DEFAULT_MAP_TOKENS = 1024
+
+MAP_CACHE_FILE = "repomap.json"
+
+# Only the most recently modified source files are mapped, so the first
+# prompt in a huge repository does not have to parse all of it
+MAX_MAP_FILES = 2000
+
+# Files walked at most, so starting in a home directory or a huge
+# monorepo maps the first part of it instead of stalling the prompt
+MAX_WALK_FILES = 50000
+
+# Symbols listed per file at most
+MAX_FILE_SYMBOLS = 12
+
+KIND_WEIGHTS = {"class": 3.0, "interface": 2.5, "function": 2.0, "method": 1.5, "type": 1.5, "enum": 1.5}
+
+# Files edited more recently rank higher; the boost halves every this
+# many days before the newest file's modification time
+RECENCY_HALF_LIFE_DAYS = 7.0
+
+# Maps shared by every prompt of this process, by root and token budget
+_repo_maps: Dict[Tuple[str, int], "RepoMap"] = {}
+_repo_maps_lock = threading.Lock()
+
+
+class RepoMap:
+    """Token-bounded outline of a repository's most relevant definitions.
+
+    Symbols come from the SymbolIndex, so only files whose modification
+    time or size changed are parsed again. A symbol ranks by how many
+    other files use its name and by its kind; a file by its best symbols
+    and by how recently it was modified. The outline lists the best files
+    with their best symbols, in line order, until the token budget is
+    spent. The rendered map is cached until a mapped file changes, and
+    outline() keeps it in memory until a file or directory it read changes.
+    """
+
+    def __init__(
+        self,
+        root: str = ".",
+        max_tokens: int = DEFAULT_MAP_TOKENS,
+        cache_dir: Optional[str] = None
+    ):
+        """Initialize repository map.
+
+        Args:
+            root: Repository directory
+            max_tokens: Estimated token budget of the rendered map
+            cache_dir: Directory of the symbol and map caches (defaults to
+                default_cache_dir(root))
+        """
+        self.root = Path(root).resolve()
+        self.max_tokens = max_tokens
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir(self.root)
+        self._outline: Optional[str] = None
+        self._watch: Optional[Watch] = None
+        self._lock = threading.Lock()
+
+    def _source_files(self, watch: Optional[Watch] = None) -> List[Tuple[str, str, os.stat_result]]:
+        """Get the most recently modified source files under the root.
+
+        Args:
+            watch: Dict in which the directories and ignore files walked and
+                the source files found are recorded (see walk_files)
+        """
+        files = []
+        for path, rel_path in islice(walk_files(str(self.root), watch=watch), MAX_WALK_FILES):
+            if os.path.splitext(rel_path)[1].lower() not in PARSERS:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, rel_path, stat))
+            if watch is not None:
+                watch[path] = (stat.st_mtime_ns, stat.st_size)
+        if len(files) > MAX_MAP_FILES:
+            files = sorted(files, key=lambda f: f[2].st_mtime_ns, reverse=True)[:MAX_MAP_FILES]
+        return files
+
+    def rank(self, files: Optional[List[Tuple[str, str, os.stat_result]]] = None) -> List[Tuple[str, float, List[Dict[str, Any]]]]:
+        """Rank files and their symbols.
+
+        Args:
+            files: Files from _source_files (walked if not given)
+
+        Returns:
+            (relative path, score, symbols sorted by descending score)
+            tuples, best file first; each symbol gains "score" and "refs"
+        """
+        files = self._source_files() if files is None else files
+        if not files:
+            return []
+        with SymbolIndex(str(self.cache_dir / CACHE_FILE)) as index:
+            entries = index.entries_for([(path, rel_path) for path, rel_path, _ in files])
+
+        # Files using each identifier, and files defining each short name
+        users = Counter(identifier for entry in entries.values() for identifier in entry["identifiers"])
+        definers = Counter(
+            name for entry in entries.values()
+            for name in {symbol["name"].rsplit(".", 1)[-1] for symbol in entry["symbols"]}
+        )
+        newest = max(stat.st_mtime for _, _, stat in files)
+
+        ranked = []
+        for _, rel_path, stat in files:
+            entry = entries.get(rel_path)
+            if not entry:
+                continue
+            identifiers = set(entry["identifiers"])
+            scored = []
+            seen = set()
+            for symbol in entry["symbols"]:
+                name = symbol["name"].rsplit(".", 1)[-1]
+                # Dunders rank on name alone; repeats are property setters,
+                # overloads and conditional definitions
+                if name.startswith("__") and name.endswith("__") or symbol["name"] in seen:
+                    continue
+                seen.add(symbol["name"])
+                # Uses in other files, shared between the files defining the name
+                refs = max(0, users[name] - (name in identifiers)) / max(1, definers[name])
+                score = KIND_WEIGHTS.get(symbol["type"], 1.0) * (1 + refs)
+                if name.startswith("_"):
+                    score *= 0.3
+                scored.append(dict(symbol, score=score, refs=round(refs, 2)))
+            if not scored:
+                continue
+            scored.sort(key=lambda s: (-s["score"], s["line"]))
+            age_days = (newest - stat.st_mtime) / 86400
+            recency = 1 + 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+            score = sum(s["score"] for s in scored[:MAX_FILE_SYMBOLS]) * recency
+            ranked.append((rel_path, score, scored))
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+    def _render(self, ranked: List[Tuple[str, float, List[Dict[str, Any]]]]) -> str:
+        lines: List[str] = []
+        used = 0
+        for rel_path, _, scored in ranked:
+            header = f"{rel_path}:"
+            used += estimate_tokens(header) + 1
+            if used > self.max_tokens:
+                break
+            symbol_lines = []
+            for symbol in sorted(scored[:MAX_FILE_SYMBOLS], key=lambda s: s["line"]):
+                line = f"  {symbol['line']}: {symbol['type']} {symbol['name']}"
+                cost = estimate_tokens(line) + 1
+                if used + cost > self.max_tokens:
+                    break
+                used += cost
+                symbol_lines.append(line)
+            if not symbol_lines:
+                break
+            lines.append(header)
+            lines.extend(symbol_lines)
+        return "\n".join(lines)
+
+    def render(self, watch: Optional[Watch] = None) -> str:
+        """Render the map, reusing the cached one if no mapped file changed.
+
+        Args:
+            watch: Dict in which everything the walk read is recorded
+
+        Returns:
+            Outline of "path:" lines followed by "  line: type name" lines
+        """
+        files = self._source_files(watch)
+        fingerprint = hashlib.sha256(
+            f"{PARSER_VERSION}:{self.root}:{self.max_tokens}".encode()
+        )
+        for _, rel_path, stat in sorted(files, key=lambda f: f[1]):
+            fingerprint.update(f"\0{rel_path}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        cache_file = self.cache_dir / MAP_CACHE_FILE
+        try:
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+            if cached.get("fingerprint") == fingerprint.hexdigest():
+                return cached["map"]
+        except (OSError, ValueError):
+            pass
+
+        repo_map = self._render(self.rank(files))
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({"fingerprint": fingerprint.hexdigest(), "map": repo_map}, f)
+            os.replace(tmp_path, cache_file)
+        except OSError:
+            pass
+        return repo_map
+
+    def outline(self) -> str:
+        """Get the map, rendering it again only if the repository changed.
+
+        The last map is kept with the modification time and size of every
+        directory, ignore file and source file its walk read. While none
+        of them has changed it is returned after re-stat-ing them, without
+        walking the tree; any edit, including one made through the tools,
+        renders the map again. Concurrent callers wait for one render
+        instead of repeating it.
+
+        Returns:
+            Rendered map, as from render()
+        """
+        with self._lock:
+            if self._outline is not None and self._watch is not None and _unchanged(self._watch):
+                return self._outline
+            watch: Watch = {}
+            self._outline = self.render(watch)
+            # A path modified too recently may change again without its
+            # modification time telling, so walk again next time
+            racy_after = time.time_ns() - RACY_NANOSECONDS
+            self._watch = None if any(mtime_ns >= racy_after for mtime_ns, _ in watch.values()) else watch
+            return self._outline
+
+
+def _unchanged(watch: Watch) -> bool:
+    """Whether every path in a watch still has its recorded time and size."""
+    for path, recorded in watch.items():
+        current: Tuple[int, int] = MISSING
+        try:
+            stat = os.stat(path)
+            current = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        if current != recorded:
+            return False
+    return True
+
+
+def get_repo_map(root: str = ".") -> Optional[RepoMap]:
+    """Get the repository map configured from the environment.
+
+    The map of a root is created once per process and shared, so its
+    outline() is only rendered again when the repository changes.
+
+    Args:
+        root: Repository directory
+
+    Returns:
+        RepoMap with a budget of KAZURI_REPO_MAP_TOKENS, or None if that
+        is set to 0
+    """
+    max_tokens = int(os.getenv('KAZURI_REPO_MAP_TOKENS') or DEFAULT_MAP_TOKENS)
+    if max_tokens <= 0:
+        return None
+    key = (str(Path(root).resolve()), max_tokens)
+    with _repo_maps_lock:
+        repo_map = _repo_maps.get(key)
+        if repo_map is None:
+            repo_map = _repo_maps[key] = RepoMap(root, max_tokens=max_tokens)
+    return repo_map
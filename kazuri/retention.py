@@ -0,0 +1,375 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from .artifacts import BlobStore
+from .session import (
+    DEFAULT_SESSION_DIR, SESSION_SUFFIX, LEGACY_SUFFIX, LATEST_POINTER, SESSION_IDLE_SECONDS, BLOBS_DIR,
+    session_in_use, session_lock_path
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+ARCHIVE_DIR = "archive"
+
+# Session directories `kazuri batch` creates inside the session directory
+BATCH_DIR_PATTERN = "batch_*"
+ARCHIVE_SUFFIX = ".gz"
+
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_MAX_SESSIONS = 200
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+DEFAULT_ARTIFACTS_MAX_BYTES = 200 * 1024 * 1024
+
+
+def _files_by_age(paths) -> List[Tuple[float, int, Path]]:
+    """Stat files and sort them oldest first as (mtime, size, path)."""
+    entries = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return sorted(entries)
+
+
+class _ByteCounter:
+    """Write-only file object that only counts what is written to it."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def _compress(path: Path, fileobj):
+    """Gzip a file into a file object."""
+    with open(path, 'rb') as src, gzip.GzipFile(filename=path.name, mode='wb', fileobj=fileobj) as dst:
+        shutil.copyfileobj(src, dst)
+
+
+def compressed_size(path: Path) -> int:
+    """Get the size a session file has once archived, without writing it."""
+    counter = _ByteCounter()
+    _compress(path, counter)
+    return counter.size
+
+
+def archived_session_path(session_file: Path) -> Path:
+    """Get where a session file is kept once archived."""
+    return session_file.parent / ARCHIVE_DIR / (session_file.name + ARCHIVE_SUFFIX)
+
+
+def restore_archived_session(session_file: Path) -> bool:
+    """Decompress an archived session back into the session directory.
+
+    Args:
+        session_file: Path the live session file should have
+
+    Returns:
+        True if an archive was found and restored
+    """
+    archive = archived_session_path(session_file)
+    if not archive.exists():
+        return False
+    tmp_path = session_file.with_name(session_file.name + ".tmp")
+    with gzip.open(archive, 'rb') as src, open(tmp_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    stat = archive.stat()
+    os.utime(tmp_path, (stat.st_atime, stat.st_mtime))
+    os.replace(tmp_path, session_file)
+    archive.unlink()
+    return True
+
+
+class SessionRetention:
+    """Prunes a session directory according to a retention policy.
+
+    Sessions idle past the rollover window are gzipped into archive/,
+    unless a process still has them open (e.g. a long-running shell).
+    The batch_* directories of `kazuri batch` are pruned along with the
+    session directory, and removed once nothing is left in them.
+    Archives are deleted once they are older than max_age, or, oldest
+    first, while there are more than max_sessions sessions or they take
+    more than max_bytes. Artifacts are evicted least recently used first
+    once they exceed artifacts_max_bytes. Sessions in a SQLite session
+    database are pruned by the same age and count limits.
+    """
+
+    def __init__(
+        self,
+        session_dir: str = DEFAULT_SESSION_DIR,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        artifacts_max_bytes: int = DEFAULT_ARTIFACTS_MAX_BYTES
+    ):
+        """Initialize retention policy.
+
+        Args:
+            session_dir: Session directory to prune
+            max_age_days: Days after which archived sessions are deleted
+            max_sessions: Maximum number of live and archived sessions kept
+            max_bytes: Maximum total size of live and archived sessions
+            artifacts_max_bytes: Maximum total size of saved artifacts
+        """
+        self.session_dir = Path(session_dir)
+        self.archive_dir = self.session_dir / ARCHIVE_DIR
+        self.artifacts_dir = self.session_dir / "artifacts"
+        self.max_age = max_age_days * 24 * 3600
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.artifacts_max_bytes = artifacts_max_bytes
+
+    def _current_session(self) -> Optional[Path]:
+        try:
+            return self.session_dir / (self.session_dir / LATEST_POINTER).read_text().strip()
+        except OSError:
+            return None
+
+    def _batch_dirs(self) -> List[Path]:
+        return sorted(path for path in self.session_dir.glob(BATCH_DIR_PATTERN) if path.is_dir())
+
+    def _live_sessions(self) -> List[Path]:
+        return [
+            path for directory in [self.session_dir] + self._batch_dirs()
+            for path in directory.glob("session_*")
+            if path.suffix in (SESSION_SUFFIX, LEGACY_SUFFIX)
+        ]
+
+    def _archives(self) -> List[Path]:
+        return [
+            path for directory in [self.session_dir] + self._batch_dirs()
+            for path in (directory / ARCHIVE_DIR).glob(f"*{ARCHIVE_SUFFIX}")
+        ]
+
+    def collect(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Apply the retention policy.
+
+        Args:
+            dry_run: Report what would be done without changing anything
+
+        Returns:
+            Dictionary of counts and bytes reclaimed
+        """
+        report = {
+            "archived": 0,
+            "deleted_sessions": 0,
+            "evicted_artifacts": 0,
+            "bytes_reclaimed": 0,
+            "dry_run": dry_run
+        }
+        if not self.session_dir.exists():
+            return report
+
+        now = time.time()
+        current = self._current_session()
+
+        # Compress sessions that can no longer be resumed automatically
+        live = []
+        for mtime, size, path in _files_by_age(self._live_sessions()):
+            if path == current or now - mtime <= SESSION_IDLE_SECONDS:
+                live.append((mtime, size, path))
+                continue
+            if dry_run:
+                archived = None if session_in_use(path) else compressed_size(path)
+            else:
+                archived = self._archive(path, mtime)
+            if archived is None:
+                live.append((mtime, size, path))
+                continue
+            report["archived"] += 1
+            report["bytes_reclaimed"] += size - archived
+
+        # Delete archives past the age, count and size limits, oldest first
+        archives = _files_by_age(self._archives())
+        session_count = len(live) + len(archives)
+        total_bytes = sum(size for _, size, _ in live + archives)
+        for mtime, size, path in archives:
+            if (now - mtime <= self.max_age
+                    and session_count <= self.max_sessions
+                    and total_bytes <= self.max_bytes):
+                break
+            if not dry_run:
+                path.unlink(missing_ok=True)
+            session_count -= 1
+            total_bytes -= size
+            report["deleted_sessions"] += 1
+            report["bytes_reclaimed"] += size
+
+        # Evict the least recently used artifacts over the size limit
+        if self.artifacts_dir.exists():
+            evicted, reclaimed = self._collect_artifacts(dry_run)
+            report["evicted_artifacts"] += evicted
+            report["bytes_reclaimed"] += reclaimed
+
+        for directory in [self.session_dir] + self._batch_dirs():
+            database = directory / "sessions.db"
+            if database.exists():
+                deleted, reclaimed = self._collect_database(database, now, dry_run)
+                report["deleted_sessions"] += deleted
+                report["bytes_reclaimed"] += reclaimed
+
+        if not dry_run:
+            self._remove_finished_batches()
+        return report
+
+    def _collect_artifacts(self, dry_run: bool) -> Tuple[int, int]:
+        """Evict artifacts least recently used first until under the size limit.
+
+        Artifacts are writable copies of blobs in the blob store, which
+        records the artifacts made from each blob. A blob is kept while one
+        of them is left: it is deleted together with its last artifact, and
+        blobs whose artifacts are all gone are deleted as well.
+
+        Returns:
+            Tuple of artifacts evicted and bytes reclaimed
+        """
+        artifacts: Dict[str, Tuple[float, int, Path]] = {}
+        for path in self.artifacts_dir.iterdir():
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                artifacts[path.name] = (max(st.st_atime, st.st_mtime), st.st_size, path)
+
+        store = BlobStore(self.artifacts_dir / BLOBS_DIR)
+        blobs: Dict[str, Dict[str, Any]] = {}
+        blob_of: Dict[str, str] = {}
+        for digest, path in store.blobs():
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            readers = set(store.readers(digest))
+            blobs[digest] = {"size": size, "readers": readers & artifacts.keys(), "stale": readers - artifacts.keys()}
+            blob_of.update(dict.fromkeys(readers, digest))
+
+        evicted = reclaimed = 0
+        total = sum(size for _, size, _ in artifacts.values()) + sum(blob["size"] for blob in blobs.values())
+
+        def release(digest: str, name: Optional[str] = None):
+            """Drop a reader of a blob, and the blob if it has none left."""
+            nonlocal reclaimed, total
+            blob = blobs[digest]
+            if name is not None:
+                blob["readers"].discard(name)
+                blob["stale"].add(name)
+            if blob["readers"]:
+                if not dry_run:
+                    for stale in blob["stale"]:
+                        store.remove_reader(digest, stale)
+                return
+            if not dry_run:
+                store.remove(digest)
+            del blobs[digest]
+            reclaimed += blob["size"]
+            total -= blob["size"]
+
+        for digest, blob in list(blobs.items()):
+            if not blob["readers"] or blob["stale"]:
+                release(digest)
+        for name, (_, size, path) in sorted(artifacts.items(), key=lambda item: item[1][0]):
+            if total <= self.artifacts_max_bytes:
+                break
+            if not dry_run:
+                path.unlink(missing_ok=True)
+            evicted += 1
+            reclaimed += size
+            total -= size
+            if blob_of.get(name) in blobs:
+                release(blob_of[name], name)
+        return evicted, reclaimed
+
+    def _archive(self, path: Path, mtime: float) -> Optional[int]:
+        """Gzip a session file into the archive, keeping its mtime.
+
+        The session's lock is held exclusively while it is archived, so a
+        process opening the session meanwhile waits and then restores it.
+
+        Args:
+            path: Session file
+            mtime: Modification time the file had when it was found idle
+
+        Returns:
+            Size of the compressed file, or None if the session is open or
+            was written since
+        """
+        lock_path = session_lock_path(path)
+        with open(lock_path, 'ab') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return None
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return None
+            if stat.st_mtime != mtime:
+                return None
+            archive = archived_session_path(path)
+            archive.parent.mkdir(exist_ok=True)
+            tmp_path = archive.with_name(archive.name + ".tmp")
+            with open(tmp_path, 'wb') as dst:
+                _compress(path, dst)
+            os.utime(tmp_path, (stat.st_atime, stat.st_mtime))
+            os.replace(tmp_path, archive)
+            path.unlink()
+            lock_path.unlink(missing_ok=True)
+        return archive.stat().st_size
+
+    def _remove_finished_batches(self):
+        """Remove batch directories left with no sessions, archives or artifacts."""
+        for directory in self._batch_dirs():
+            if any(path.is_file() and path.name != LATEST_POINTER for path in directory.rglob("*")):
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _collect_database(self, database: Path, now: float, dry_run: bool) -> Tuple[int, int]:
+        """Delete old sessions from a SQLite session database.
+
+        Returns:
+            Tuple of sessions deleted and bytes reclaimed
+        """
+        conn = sqlite3.connect(str(database), timeout=30)
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            rows = conn.execute("SELECT id, updated_at FROM sessions ORDER BY updated_at DESC").fetchall()
+            expired = [
+                session_id for position, (session_id, updated_at) in enumerate(rows)
+                if position >= self.max_sessions or now - updated_at > self.max_age
+            ]
+            if dry_run or not expired:
+                return len(expired), 0
+            size_before = database.stat().st_size
+            with conn:
+                conn.executemany("DELETE FROM sessions WHERE id = ?", [(i,) for i in expired])
+            conn.execute("VACUUM")
+            return len(expired), max(0, size_before - database.stat().st_size)
+        finally:
+            conn.close()
+
+
+def get_session_retention(session_dir: str = DEFAULT_SESSION_DIR) -> SessionRetention:
+    """Get the retention policy for a session directory configured from the environment."""
+    return SessionRetention(
+        session_dir=session_dir,
+        max_age_days=float(os.getenv('KAZURI_SESSION_MAX_AGE_DAYS') or DEFAULT_MAX_AGE_DAYS),
+        max_sessions=int(os.getenv('KAZURI_SESSION_MAX_COUNT') or DEFAULT_MAX_SESSIONS),
+        max_bytes=int(os.getenv('KAZURI_SESSION_MAX_BYTES') or DEFAULT_MAX_BYTES),
+        artifacts_max_bytes=int(os.getenv('KAZURI_ARTIFACTS_MAX_BYTES') or DEFAULT_ARTIFACTS_MAX_BYTES)
+    )
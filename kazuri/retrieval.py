@@ -0,0 +1,119 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Iterable, List, Dict, Any, Tuple, Optional
+
+# BM25 term frequency saturation and length normalization
+K1 = 1.5
+B = 0.75
+
+# Only the start of very large tool results (e.g. whole files) is indexed
+MAX_INDEXED_CHARS = 20000
+
+TOKEN = re.compile(r'[A-Za-z0-9]+')
+CAMEL_BOUNDARY = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms.
+
+    Identifiers are split on underscores and camelCase boundaries, so
+    "parse_tool_calls" and "ToolCallParser" both match "tool".
+    """
+    terms = []
+    for word in TOKEN.findall(CAMEL_BOUNDARY.sub(' ', text)):
+        if len(word) > 1:
+            terms.append(word.lower())
+    return terms
+
+
+def interaction_text(interaction: Dict[str, Any]) -> str:
+    """Get the text of an interaction that is indexed for retrieval."""
+    parts = [str(interaction.get('task', '')), str(interaction.get('response', ''))]
+    for tool_use in interaction.get('tool_uses', []):
+        if isinstance(tool_use, dict):
+            parts.append(str(tool_use.get('tool', '')))
+            parts.append(str(tool_use.get('parameters', ''))[:MAX_INDEXED_CHARS])
+            parts.append(str(tool_use.get('result', ''))[:MAX_INDEXED_CHARS])
+    return "\n".join(parts)
+
+
+class HistoryIndex:
+    """Incremental BM25 index over session interactions.
+
+    Documents are numbered in the order they are added, starting at
+    `start`, which matches their position in the session history; an index
+    over only the most recent part of a long history starts part-way.
+    Adding a document only touches the postings of its own terms.
+    """
+
+    def __init__(self, interactions: Iterable[Dict[str, Any]] = (), start: int = 0):
+        """Initialize history index.
+
+        Args:
+            interactions: Interactions to index, oldest first
+            start: History position of the first interaction
+        """
+        self.start = start
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: List[int] = []
+        self._total_length = 0
+        for interaction in interactions:
+            self.add(interaction)
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @property
+    def end(self) -> int:
+        """History position just past the last indexed interaction."""
+        return self.start + len(self._lengths)
+
+    def add(self, interaction: Dict[str, Any]) -> int:
+        """Index an interaction.
+
+        Args:
+            interaction: Interaction to index
+
+        Returns:
+            Document number of the interaction
+        """
+        doc = self.end
+        terms = Counter(tokenize(interaction_text(interaction)))
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[doc] = count
+        length = sum(terms.values())
+        self._lengths.append(length)
+        self._total_length += length
+        return doc
+
+    def search(self, query: str, k: int, before: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Find the interactions most relevant to a query.
+
+        Args:
+            query: Query text, typically the new task
+            k: Maximum number of results
+            before: Only consider documents numbered below this
+
+        Returns:
+            List of (document number, score), best first; documents that
+            share no terms with the query are not returned
+        """
+        count = len(self._lengths)
+        if not count or k <= 0:
+            return []
+        limit = self.end if before is None else min(before, self.end)
+        average_length = self._total_length / count or 1
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings.items():
+                if doc >= limit:
+                    continue
+                norm = K1 * (1 - B + B * self._lengths[doc - self.start] / average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
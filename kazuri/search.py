@@ -0,0 +1,301 @@
+import fnmatch
+import os
+import re
+from bisect import bisect_right
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+from itertools import accumulate
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+from .ignore import Watch, record_stat, walk_files
+
+DEFAULT_MAX_RESULTS = 1000
+
+# Files are searched in chunks so workers get enough to do per task
+CHUNK_FILES = 128
+
+# Files with a NUL byte in their first block are treated as binary
+SNIFF_BYTES = 8192
+
+# Larger files are skipped; they are rarely source and would stall a worker
+MAX_FILE_BYTES = 20 * 1024 * 1024
+
+CONTEXT_LINES = 2
+
+
+class LineIndex:
+    """Table of line start offsets in a piece of text.
+
+    Built once per file in a single pass, it maps a character offset to
+    its line number with a binary search and slices out ranges of lines
+    without splitting the whole text, so each lookup is O(log n) however
+    many matches a file has.
+    """
+
+    def __init__(self, content: str):
+        """Initialize line index.
+
+        Args:
+            content: Text to index; lines are separated by "\\n"
+        """
+        self.content = content
+        # starts[i] is the offset of line i + 1; the final entry is one past
+        # the end so line i always ends at starts[i + 1] - 1
+        self.starts = list(accumulate(map((1).__add__, map(len, content.split('\n'))), initial=0))
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    def line_number(self, position: int) -> int:
+        """Get the 1-based line number of a character offset."""
+        return bisect_right(self.starts, position)
+
+    def lines(self, first: int, last: int) -> str:
+        """Get a range of lines joined by newlines.
+
+        Args:
+            first: 1-based number of the first line, clamped to the text
+            last: 1-based number of the last line (inclusive), clamped
+
+        Returns:
+            The lines' text without a trailing newline
+        """
+        first = max(1, first)
+        last = min(len(self), last)
+        if first > last:
+            return ""
+        return self.content[self.starts[first - 1]:self.starts[last] - 1]
+
+    def context(self, line: int, context_lines: int = CONTEXT_LINES) -> str:
+        """Get a line with up to context_lines lines on either side."""
+        return self.lines(line - context_lines, line + context_lines)
+
+
+@lru_cache(maxsize=32)
+def _compile(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+def search_text(
+    regex: re.Pattern,
+    content: str,
+    path: str,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Find the matches of a compiled pattern in a file's content.
+
+    Args:
+        regex: Compiled pattern
+        content: File content
+        path: Path reported in the results
+        limit: Stop after this many matches
+
+    Returns:
+        List of matches with file, line, match and surrounding context
+    """
+    results = []
+    line_index = None
+    for match in regex.finditer(content):
+        # Built on the first match so files without any are not indexed
+        if line_index is None:
+            line_index = LineIndex(content)
+        line_num = line_index.line_number(match.start())
+        results.append({
+            'file': path,
+            'line': line_num,
+            'match': match.group(),
+            'context': line_index.context(line_num)
+        })
+        if limit is not None and len(results) >= limit:
+            break
+    return results
+
+
+def read_text_file(path: str) -> Optional[str]:
+    """Read a file as text, or return None if it is binary, huge or unreadable."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+            if b"\0" in head:
+                return None
+            if os.fstat(f.fileno()).st_size > MAX_FILE_BYTES:
+                return None
+            data = head + f.read()
+    except OSError:
+        return None
+    return data.decode('utf-8', errors='replace')
+
+
+def _search_chunk(paths: List[str], pattern: str, limit: Optional[int]) -> List[Dict[str, Any]]:
+    """Search a chunk of files (runs in a worker thread or process)."""
+    regex = _compile(pattern)
+    results = []
+    for path in paths:
+        content = read_text_file(path)
+        if content is None:
+            continue
+        results.extend(search_text(regex, content, path, None if limit is None else limit - len(results)))
+        if limit is not None and len(results) >= limit:
+            break
+    return results
+
+
+def _record_files(files: Iterable[Tuple[str, str]], watch: Watch) -> Iterable[Tuple[str, str]]:
+    """Record each walked file's stat before it is searched."""
+    for path, rel_path in files:
+        try:
+            record_stat(watch, path)
+        except OSError:
+            continue
+        yield path, rel_path
+
+
+def _chunks(paths: Iterable[str], size: int) -> Iterable[List[str]]:
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _matches_file_pattern(rel_path: str, file_pattern: str) -> bool:
+    if file_pattern in ("*", ""):
+        return True
+    if "/" in file_pattern:
+        return fnmatch.fnmatch(rel_path, file_pattern) or fnmatch.fnmatch(rel_path, f"*/{file_pattern}")
+    return fnmatch.fnmatch(rel_path.rsplit("/", 1)[-1], file_pattern)
+
+
+def get_search_settings() -> Dict[str, Any]:
+    """Get search engine settings from KAZURI_SEARCH_* environment variables."""
+    return {
+        "workers": int(os.getenv('KAZURI_SEARCH_WORKERS') or min(32, (os.cpu_count() or 1) + 4)),
+        "executor": (os.getenv('KAZURI_SEARCH_EXECUTOR') or 'thread').lower(),
+        "index": (os.getenv('KAZURI_SEARCH_INDEX') or '1').lower() in ('1', 'true', 'yes', 'on')
+    }
+
+
+def _indexed_candidates(root: str, pattern: str, watch: Optional[Watch] = None) -> Optional[List[Tuple[str, str]]]:
+    """Narrow the files to search with the workspace's trigram index.
+
+    Returns:
+        Candidate (path, relative path) tuples in walk order, or None if
+        there is no index, the pattern has no usable literals or the index
+        cannot be read, in which case the whole tree is scanned
+    """
+    import sqlite3
+    from .trigram import TrigramIndex
+
+    try:
+        index = TrigramIndex.find(root)
+        if index is None:
+            return None
+        with index:
+            return index.candidates(root, pattern, watch)
+    except sqlite3.Error:
+        return None
+
+
+def search_files(
+    root: str,
+    pattern: str,
+    file_pattern: str = "*",
+    max_results: Optional[int] = DEFAULT_MAX_RESULTS,
+    workers: Optional[int] = None,
+    executor: Optional[str] = None,
+    use_ignore_files: bool = True,
+    use_index: Optional[bool] = None,
+    watch: Optional[Watch] = None
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Search files under a directory for a regular expression.
+
+    The pattern is compiled once per worker. The tree is walked with
+    walk_files (default excludes and .gitignore rules), binary files are
+    skipped, and chunks of files are searched in a thread or process pool.
+    Results come back in walk order; once one match past max_results is
+    found no more files are read and queued chunks are cancelled.
+
+    If the workspace has a trigram index (`kazuri index build`), it is
+    brought up to date and only the files containing the pattern's
+    literals are read; patterns without usable literals scan every file.
+
+    Args:
+        root: Directory to search
+        pattern: Regular expression
+        file_pattern: Glob the file name (or relative path if it contains
+            a "/") must match
+        max_results: Maximum number of matches, or None for all
+        workers: Pool size (defaults to KAZURI_SEARCH_WORKERS)
+        executor: "thread" or "process" (defaults to KAZURI_SEARCH_EXECUTOR)
+        use_ignore_files: Honor .gitignore files (the index is only used
+            when set)
+        use_index: Use the trigram index if there is one (defaults to
+            KAZURI_SEARCH_INDEX)
+        watch: Dict in which the directories walked and the files
+            searched are recorded (see walk_files)
+
+    Returns:
+        Tuple of matches and whether they were cut off at max_results
+
+    Raises:
+        re.error: If the pattern is invalid
+    """
+    _compile(pattern)
+    settings = get_search_settings()
+    workers = workers or settings["workers"]
+    executor = executor or settings["executor"]
+    use_index = settings["index"] if use_index is None else use_index
+    files = _indexed_candidates(root, pattern, watch) if use_index and use_ignore_files else None
+    if files is None:
+        files = walk_files(root, use_ignore_files=use_ignore_files, watch=watch)
+        if watch is not None:
+            files = _record_files(files, watch)
+    paths = (path for path, rel_path in files if _matches_file_pattern(rel_path, file_pattern))
+    chunks = _chunks(paths, CHUNK_FILES)
+    # One match past the limit tells a cut-off result from an exact fit
+    wanted = None if max_results is None else max_results + 1
+
+    if workers <= 1:
+        results = []
+        for chunk in chunks:
+            limit = None if wanted is None else wanted - len(results)
+            results.extend(_search_chunk(chunk, pattern, limit))
+            if wanted is not None and len(results) >= wanted:
+                return results[:max_results], True
+        return results, False
+
+    pool: Executor = ProcessPoolExecutor(workers) if executor == "process" else ThreadPoolExecutor(workers)
+    results: List[Dict[str, Any]] = []
+    completed: Dict[int, List[Dict[str, Any]]] = {}
+    pending: Dict[Any, int] = {}
+    next_chunk = next_result = 0
+    truncated = False
+    try:
+        while True:
+            # Keep a bounded number of chunks in flight so the walk does not
+            # run far ahead of the search
+            while len(pending) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending[pool.submit(_search_chunk, chunk, pattern, wanted)] = next_chunk
+                next_chunk += 1
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                completed[pending.pop(future)] = future.result()
+            # Results are taken in walk order so the output is deterministic
+            while next_result in completed:
+                results.extend(completed.pop(next_result))
+                next_result += 1
+            if wanted is not None and len(results) >= wanted:
+                truncated = True
+                break
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    if truncated:
+        results = results[:max_results]
+    return results, truncated
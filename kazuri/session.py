@@ -1,62 +1,609 @@
+import atexit
 import json
+import os
+import re
+import weakref
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
-import shutil
+from .artifacts import BlobStore
+from .retrieval import HistoryIndex
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Session logs are append-only JSONL; sessions written by older versions
+# as a single JSON document are still read and migrated on load
+SESSION_SUFFIX = ".jsonl"
+LEGACY_SUFFIX = ".json"
+
+DEFAULT_SESSION_DIR = ".kazuri_sessions"
+
+# File in the session directory naming the most recently used session, so
+# startup does not have to scan every session file to find it
+LATEST_POINTER = "latest_session"
+
+# Sessions idle for longer than this are not resumed automatically
+SESSION_IDLE_SECONDS = 3600
+
+# An open session holds a shared lock on <session file>.lock so retention
+# can tell it is in use, however long it has been idle
+LOCK_SUFFIX = ".lock"
+
+# Subdirectory of artifacts/ holding the content-addressed blobs
+BLOBS_DIR = "blobs"
+
+# Number of appended records after which the log is compacted to a snapshot
+COMPACT_AFTER_RECORDS = 500
+
+# Write-behind defaults: buffered records are flushed after this many
+# seconds, once this many are pending, or at exit
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_FLUSH_RECORDS = 50
+
+# Sessions with buffered records, flushed when the process exits
+_write_behind_sessions: "weakref.WeakSet[Session]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_write_behind_sessions():
+    for session in list(_write_behind_sessions):
+        session.flush()
+
+
+# Number of parsed interactions SessionHistory keeps in memory
+HISTORY_CACHE_SIZE = 32
+
+# Most recent interactions searched for turns relevant to a new task
+HISTORY_INDEX_WINDOW = 200
+
+# Interaction records start with these keys, so they can be located and
+# dated without parsing the (possibly huge) interaction itself
+INTERACTION_PREFIX = b'{"op": "interaction"'
+TIMESTAMP_PREFIX = re.compile(rb'\{"op": "interaction", "timestamp": ("(?:[^"\\]|\\.)*"|null)')
+
+
+def session_lock_path(session_file: Path) -> Path:
+    """Get the lock file held while a session file is open."""
+    return session_file.with_name(session_file.name + LOCK_SUFFIX)
+
+
+def session_in_use(session_file: Path) -> bool:
+    """Whether a process has a session file open.
+
+    Always False where file locks are unavailable.
+    """
+    if fcntl is None:
+        return False
+    try:
+        with open(session_lock_path(session_file), 'rb') as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+    except OSError:
+        return False
+    return False
+
+
+def _repair_torn_tail(f):
+    """Finish or cut off a last record a crashed writer left incomplete.
+
+    Called with the log open for appending and exclusively locked, so no
+    live writer can be partway through a record. A last line that is
+    complete JSON only lacks its newline; anything else is cut off.
+    """
+    end = f.seek(0, os.SEEK_END)
+    if not end:
+        return
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        return
+    start, position = 0, end
+    while position > 0:
+        block_start = max(0, position - 64 * 1024)
+        f.seek(block_start)
+        found = f.read(position - block_start).rfind(b"\n")
+        if found != -1:
+            start = block_start + found + 1
+            break
+        position = block_start
+    f.seek(start)
+    try:
+        json.loads(f.read())
+    except ValueError:
+        f.truncate(start)
+        return
+    f.write(b"\n")
+
+
+@contextmanager
+def _open_log_for_append(session_file: Path):
+    """Open a session log for appending under an exclusive lock.
+
+    Writers append one after the other, and a torn record left by a
+    crashed writer is repaired before anything is written after it.
+    Readers take no lock and ignore a torn last record instead.
+    """
+    with open(session_file, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        _repair_torn_tail(f)
+        yield f
+
+
+def _interaction_record(interaction: Dict[str, Any]) -> Dict[str, Any]:
+    return {"op": "interaction", "timestamp": interaction.get("timestamp"), "data": interaction}
+
+
+def _header_line(header: Dict[str, Any], count: Optional[int]) -> bytes:
+    # Padded so the line length does not depend on the count
+    line = json.dumps({**header, "count": count})
+    return (line + " " * (20 - len(json.dumps(count))) + "\n").encode()
+
+
+# Last characters of the first line of a session export
+EXPORT_HISTORY_START = '"history": ['
+
+
+def _read_exported_history(f) -> Iterator[Dict[str, Any]]:
+    """Parse the interactions of an export, one line at a time."""
+    for line in f:
+        line = line.strip()
+        if line == "]}":
+            return
+        if line:
+            interaction = json.loads(line.rstrip(","))
+            if not isinstance(interaction, dict):
+                raise ValueError("Invalid session file format")
+            yield interaction
+    raise ValueError("Invalid session file format")
+
+
+class SessionHistory(Sequence):
+    """Session history that reads interactions from the session log on demand.
+    
+    Each entry is either an interaction already in memory or the position
+    of its record in the log. Records are parsed when accessed and the most
+    recently used ones are cached, so only the part of a long history that
+    is actually used is ever loaded.
+    """
+    
+    def __init__(self, path: Path, entries: List[Any]):
+        """Initialize session history.
+        
+        Args:
+            path: Session log file
+            entries: Interactions, or (offset, length, timestamp) tuples
+                locating their records in the log, oldest first
+        """
+        self.path = path
+        self._entries = entries
+        self._cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return list(self._iter_range(*index.indices(len(self._entries))))
+        if index < 0:
+            index += len(self._entries)
+        if not 0 <= index < len(self._entries):
+            raise IndexError("history index out of range")
+        entry = self._entries[index]
+        if isinstance(entry, dict):
+            return entry
+        cached = self._cache.get(index)
+        if cached is None:
+            with open(self.path, 'rb') as f:
+                cached = self._parse(f, entry)
+            self._remember(index, cached)
+        else:
+            self._cache.move_to_end(index)
+        return cached
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self._iter_range(0, len(self._entries), 1)
+    
+    def iter_slice(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over history[start:stop] without building a list."""
+        return self._iter_range(*slice(start, stop).indices(len(self._entries)))
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+    
+    def __repr__(self) -> str:
+        return f"SessionHistory({str(self.path)!r}, {len(self)} interactions)"
+    
+    def _remember(self, index: int, interaction: Dict[str, Any]):
+        self._cache[index] = interaction
+        if len(self._cache) > HISTORY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    @staticmethod
+    def _read_line(f, entry: Tuple[int, int, Optional[str]]) -> bytes:
+        offset, length, _ = entry
+        f.seek(offset)
+        return f.read(length)
+    
+    def _parse(self, f, entry: Tuple[int, int, Optional[str]]) -> Dict[str, Any]:
+        try:
+            data = json.loads(self._read_line(f, entry)).get("data")
+        except (ValueError, AttributeError):
+            data = None
+        if not isinstance(data, dict):
+            # A damaged record keeps its place so positions stay stable
+            return {"timestamp": entry[2], "task": "", "response": "", "tool_uses": []}
+        return data
+    
+    def _iter_range(self, start: int, stop: int, step: int) -> Iterator[Dict[str, Any]]:
+        """Iterate over part of the history, keeping the log open throughout."""
+        f = None
+        try:
+            for index in range(start, stop, step):
+                entry = self._entries[index]
+                if isinstance(entry, dict):
+                    yield entry
+                elif index in self._cache:
+                    yield self._cache[index]
+                else:
+                    if f is None:
+                        f = open(self.path, 'rb')
+                    yield self._parse(f, entry)
+        finally:
+            if f is not None:
+                f.close()
+    
+    def append(self, interaction: Dict[str, Any]):
+        """Add an interaction that has just been recorded."""
+        self._entries.append(interaction)
+    
+    def timestamp(self, index: int) -> Optional[str]:
+        """Get the timestamp of an interaction without loading it."""
+        entry = self._entries[index]
+        if isinstance(entry, dict):
+            return entry.get("timestamp")
+        if entry[2] is None:
+            return self[index].get("timestamp")
+        return entry[2]
+    
+    def raw_lines(self) -> Iterator[Tuple[bytes, Optional[str]]]:
+        """Yield each interaction's log record and timestamp, copying on-disk records verbatim."""
+        with open(self.path, 'rb') as f:
+            for entry in self._entries:
+                if isinstance(entry, dict):
+                    yield json.dumps(_interaction_record(entry)).encode() + b"\n", entry.get("timestamp")
+                else:
+                    yield self._read_line(f, entry), entry[2]
 
 class Session:
     """Manages session state and conversation history."""
     
-    def __init__(self, session_dir: str = ".kazuri_sessions"):
+    _history_index: Optional[HistoryIndex] = None
+    _lock_file = None
+    write_behind = False
+    
+    def __init__(
+        self,
+        session_dir: str = DEFAULT_SESSION_DIR,
+        session_name: Optional[str] = None,
+        write_behind: Optional[bool] = None
+    ):
         """Initialize session manager.
         
         Args:
             session_dir: Directory to store session files
+            session_name: Optional fixed session name; the session file
+                session_<name>.jsonl is loaded or created instead of the
+                most recent session
+            write_behind: Buffer log records in memory and write them in
+                batches (defaults to KAZURI_SESSION_WRITE_BEHIND)
         """
         self.session_dir = Path(session_dir)
-        self.session_dir.mkdir(exist_ok=True)
+        self.session_dir.mkdir(parents=True, exist_ok=True)
         # Create artifacts directory for storing generated files
         self.artifacts_dir = self.session_dir / "artifacts"
         self.artifacts_dir.mkdir(exist_ok=True)
-        self.current_session = None
+        self._current_session: Optional[Path] = None
         self.history = []
         self.saved_files = {}  # Track saved files and their metadata
-        self.load_or_create_session()
+        self._records_since_snapshot = 0
+        if write_behind is None:
+            write_behind = os.getenv('KAZURI_SESSION_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes', 'on')
+        self.write_behind = write_behind
+        self.flush_interval = float(os.getenv('KAZURI_SESSION_FLUSH_INTERVAL') or DEFAULT_FLUSH_INTERVAL)
+        self.flush_records = int(os.getenv('KAZURI_SESSION_FLUSH_RECORDS') or DEFAULT_FLUSH_RECORDS)
+        self._pending: List[bytes] = []
+        self._flush_lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
+        if session_name:
+            self.load_named_session(session_name)
+        else:
+            self.load_or_create_session()
     
-    def load_or_create_session(self):
-        """Load existing session or create new one."""
-        # Find most recent session file
-        session_files = list(self.session_dir.glob("session_*.json"))
-        if session_files:
-            latest_session = max(session_files, key=lambda x: x.stat().st_mtime)
-            # If session is older than 1 hour, create new one
-            if (datetime.now().timestamp() - latest_session.stat().st_mtime) > 3600:
-                self.create_new_session()
-            else:
-                self.current_session = latest_session
-                with open(latest_session, 'r') as f:
+    @property
+    def current_session(self) -> Optional[Path]:
+        """Path of the session log being written."""
+        return self._current_session
+    
+    @current_session.setter
+    def current_session(self, session_file: Optional[Path]):
+        self._current_session = session_file
+        self._release_lock()
+        if fcntl is None or session_file is None or session_file.suffix not in (SESSION_SUFFIX, LEGACY_SUFFIX):
+            return
+        lock_path = session_lock_path(session_file)
+        existed = session_file.exists()
+        while True:
+            try:
+                lock_file = open(lock_path, 'ab')
+            except OSError:
+                return
+            try:
+                # Waits while retention is archiving the session
+                fcntl.flock(lock_file, fcntl.LOCK_SH)
+                # ...which unlinks the lock file it held; lock a fresh one
+                if os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            except OSError:
+                lock_file.close()
+                return
+            lock_file.close()
+        self._lock_file = lock_file
+        if existed and not session_file.exists():
+            from .retention import restore_archived_session
+            restore_archived_session(session_file)
+    
+    def _release_lock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+    
+    def close(self):
+        """Flush buffered records and release the session so it can be archived."""
+        self.flush()
+        self._release_lock()
+    
+    def load_named_session(self, name: str):
+        """Load the session with the given name, creating it if needed."""
+        self.flush()
+        session_file = self.session_dir / f"session_{name}{SESSION_SUFFIX}"
+        if not session_file.exists():
+            from .retention import restore_archived_session
+            legacy_file = session_file.with_suffix(LEGACY_SUFFIX)
+            if legacy_file.exists():
+                session_file = legacy_file
+            elif not restore_archived_session(session_file):
+                self.create_new_session(name)
+                return
+        self.current_session = session_file
+        if not self._read_session_file(session_file):
+            self.create_new_session(name)
+            return
+        self._write_latest_pointer()
+    
+    def _read_session_file(self, session_file: Path) -> bool:
+        """Read history and saved files from a session file.
+        
+        Interaction records are not parsed here; only their position in the
+        file is recorded and they are read on demand through SessionHistory.
+        
+        Returns:
+            False if the file is corrupted
+        """
+        if session_file.suffix == LEGACY_SUFFIX:
+            return self._migrate_legacy_session(session_file)
+        
+        entries: List[Any] = []
+        self.saved_files = {}
+        self._records_since_snapshot = 0
+        snapshot_interactions = 0
+        good_end = 0
+        with open(session_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Only the last line can lack a newline: a record being
+                    # appended by another process, or torn by a crash. The
+                    # file is left alone; the next writer repairs it
+                    try:
+                        json.loads(line)
+                    except ValueError:
+                        break
+
+                if line.startswith(INTERACTION_PREFIX):
+                    match = TIMESTAMP_PREFIX.match(line)
+                    timestamp = json.loads(match.group(1)) if match else None
+                    entries.append((good_end, len(line), timestamp))
+                    if snapshot_interactions:
+                        snapshot_interactions -= 1
+                    else:
+                        self._records_since_snapshot += 1
+                else:
                     try:
-                        data = json.load(f)
-                        # Handle both old format (list) and new format (dict)
-                        if isinstance(data, list):
-                            self.history = data
-                            self.saved_files = {}
-                        else:
-                            self.history = data.get('history', [])
-                            self.saved_files = data.get('saved_files', {})
-                    except json.JSONDecodeError:
-                        # If file is corrupted, create new session
-                        self.create_new_session()
+                        record = json.loads(line)
+                    except ValueError:
+                        record = None
+                    if isinstance(record, dict):
+                        if record.get("op") == "snapshot":
+                            entries = list(record.get("history", []))
+                            snapshot_interactions = record.get("count") or 0
+                        self._apply_record(record)
+                good_end += len(line)
+        
+        self.history = SessionHistory(session_file, entries)
+        return True
+    
+    def _migrate_legacy_session(self, session_file: Path) -> bool:
+        """Load a single-document JSON session and convert it to a log."""
+        with open(session_file, 'r') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                return False
+        # Handle both old format (list) and new format (dict)
+        if isinstance(data, list):
+            self.history = data
+            self.saved_files = {}
         else:
+            self.history = data.get('history', [])
+            self.saved_files = data.get('saved_files', {})
+        
+        self.current_session = session_file.with_suffix(SESSION_SUFFIX)
+        self.save_session()
+        # Keep the original modification time so the rollover rule still applies
+        stat = session_file.stat()
+        os.utime(self.current_session, (stat.st_atime, stat.st_mtime))
+        session_file.unlink()
+        return True
+    
+    def _apply_record(self, record: Dict[str, Any]):
+        """Apply one session log record, other than an interaction, to the in-memory state."""
+        op = record.get("op")
+        if op == "snapshot":
+            self.saved_files = record.get("saved_files", {})
+            self._records_since_snapshot = 0
+            return
+        if op == "saved_file" and record.get("name"):
+            self.saved_files[record["name"]] = record.get("data", {})
+        self._records_since_snapshot += 1
+    
+    def _append_record(self, record: Dict[str, Any]):
+        """Append a record to the session log.
+        
+        The cost is independent of the session length; the log is compacted
+        into a fresh snapshot once enough records have accumulated. In
+        write-behind mode the record is buffered and written by flush().
+        """
+        if self._records_since_snapshot >= COMPACT_AFTER_RECORDS:
+            self.save_session()
+            return
+        line = json.dumps(record).encode() + b"\n"
+        self._records_since_snapshot += 1
+        if not self.write_behind:
+            with _open_log_for_append(self.current_session) as f:
+                f.write(line)
+            return
+        
+        with self._flush_lock:
+            self._pending.append(line)
+            _write_behind_sessions.add(self)
+            if len(self._pending) < self.flush_records:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+        self.flush()
+    
+    def _discard_pending(self):
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._pending = []
+    
+    def flush(self):
+        """Write buffered records to the session log.
+        
+        All pending records go out in a single write followed by one fsync.
+        A crash mid-write can only leave a torn final record, which is
+        ignored when the session is loaded and cut off before the next
+        append.
+        """
+        if not self._pending:
+            return
+        with self._flush_lock:
+            data = b"".join(self._pending)
+            self._discard_pending()
+            if not data:
+                return
+            with _open_log_for_append(self.current_session) as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def _read_latest_pointer(self) -> Optional[Path]:
+        """Get the session file named by the latest-session pointer, if valid."""
+        try:
+            name = (self.session_dir / LATEST_POINTER).read_text().strip()
+        except OSError:
+            return None
+        if not name.startswith("session_") or "/" in name or "\\" in name:
+            return None
+        return self.session_dir / name
+    
+    def _write_latest_pointer(self):
+        """Point the latest-session pointer at the current session file."""
+        pointer = self.session_dir / LATEST_POINTER
+        tmp_path = pointer.with_name(f"{LATEST_POINTER}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(self.current_session.name + "\n")
+        os.replace(tmp_path, pointer)
+    
+    def _scan_latest_session(self) -> Optional[Path]:
+        """Find the most recently modified session file by scanning the directory.
+        
+        Only used when the latest-session pointer is missing or stale.
+        """
+        latest, latest_mtime = None, None
+        for pattern in (f"session_*{LEGACY_SUFFIX}", f"session_*{SESSION_SUFFIX}"):
+            for session_file in self.session_dir.glob(pattern):
+                try:
+                    mtime = session_file.stat().st_mtime
+                except OSError:
+                    continue
+                if latest_mtime is None or mtime > latest_mtime:
+                    latest, latest_mtime = session_file, mtime
+        return latest
+    
+    def load_or_create_session(self):
+        """Load existing session or create new one."""
+        # The pointer finds the most recent session with a single stat; the
+        # directory is only scanned if the pointer is missing or stale
+        latest_session = self._read_latest_pointer()
+        try:
+            mtime = latest_session.stat().st_mtime if latest_session else None
+        except OSError:
+            mtime = None
+        if mtime is None:
+            latest_session = self._scan_latest_session()
+            mtime = latest_session.stat().st_mtime if latest_session else None
+        
+        # If session is older than 1 hour, create new one
+        if latest_session is None or datetime.now().timestamp() - mtime > SESSION_IDLE_SECONDS:
+            self.create_new_session()
+            return
+        self.current_session = latest_session
+        if not self._read_session_file(latest_session):
+            # If file is corrupted, create new session
             self.create_new_session()
+        elif self._read_latest_pointer() != self.current_session:
+            self._write_latest_pointer()
     
-    def create_new_session(self):
-        """Create a new session file."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.current_session = self.session_dir / f"session_{timestamp}.json"
+    def create_new_session(self, name: Optional[str] = None):
+        """Create a new session file.
+        
+        Args:
+            name: Optional session name (defaults to the current timestamp)
+        """
+        self.flush()
+        name = name or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.current_session = self.session_dir / f"session_{name}{SESSION_SUFFIX}"
         self.history = []
         self.saved_files = {}
         self.save_session()
+        self._write_latest_pointer()
     
     def add_interaction(self, task: str, response: str, tool_uses: Optional[List[Dict[str, Any]]] = None):
         """Add a new interaction to the session history.
@@ -84,25 +631,78 @@ class Session:
                 }
                 validated_tool_uses.append(validated_tool_use)
         
-        self.history.append({
+        interaction = {
             "timestamp": datetime.now().isoformat(),
             "task": task,
             "response": response,
             "tool_uses": validated_tool_uses
-        })
-        self.save_session()
+        }
+        self._record_interaction(interaction)
+        if self._history_index is not None:
+            self._history_index.add(interaction)
     
-    def save_session(self):
-        """Save current session to file."""
-        with open(self.current_session, 'w') as f:
-            json.dump({
-                'history': self.history,
-                'saved_files': self.saved_files
-            }, f, indent=2)
+    def _record_interaction(self, interaction: Dict[str, Any]):
+        """Store a validated interaction."""
+        self.history.append(interaction)
+        self._append_record(_interaction_record(interaction))
+    
+    def save_session(self, history: Optional[Iterable[Dict[str, Any]]] = None):
+        """Save the whole session as a compacted log.
+        
+        The log is a snapshot header holding the saved files followed by one
+        record per interaction; interactions that are still on disk are
+        copied without being parsed. It is written to a temporary file and
+        renamed into place, so a crash leaves either the old or the new log,
+        never a mix.
+        
+        Args:
+            history: Interactions to save instead of the current history,
+                e.g. streamed from an import
+        """
+        if history is None:
+            history = self.history
+        # Buffered records are part of the in-memory state being saved
+        self._discard_pending()
+        count = len(history) if isinstance(history, (list, SessionHistory)) else None
+        tmp_path = self.current_session.with_name(self.current_session.name + ".tmp")
+        entries = []
+        try:
+            with open(tmp_path, 'wb') as f:
+                # A placeholder count keeps the header the same length if it
+                # has to be rewritten once a streamed history is counted
+                header = {"op": "snapshot", "saved_files": self.saved_files, "count": count}
+                f.write(_header_line(header, count))
+                lines = history.raw_lines() if isinstance(history, SessionHistory) else (
+                    (json.dumps(_interaction_record(i)).encode() + b"\n", i.get("timestamp"))
+                    for i in history
+                )
+                for line, timestamp in lines:
+                    entries.append((f.tell(), len(line), timestamp))
+                    f.write(line)
+                if count is None:
+                    f.seek(0)
+                    f.write(_header_line(header, len(entries)))
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_path, self.current_session)
+        self.history = SessionHistory(self.current_session, entries)
+        self._records_since_snapshot = 0
+    
+    @property
+    def blobs(self) -> BlobStore:
+        """Content-addressed store backing the artifacts directory."""
+        return BlobStore(self.artifacts_dir / BLOBS_DIR)
     
     def save_generated_content(self, content: str, filename: str, description: str = "", content_type: str = "code") -> str:
         """Save generated content to a file in the artifacts directory.
         
+        The content is stored once in the blob store and the artifact is a
+        writable reflink or copy of it, so identical content has one blob
+        and, where reflinks are supported, shares its blocks.
+        
         Args:
             content: The content to save
             filename: Desired filename
@@ -116,23 +716,27 @@ class Session:
         safe_filename = f"{timestamp}_{filename}"
         file_path = self.artifacts_dir / safe_filename
         
-        with open(file_path, 'w') as f:
-            f.write(content)
+        data = content.encode()
+        digest = self.blobs.put_bytes(data)
+        self.blobs.checkout(digest, file_path)
         
-        self.saved_files[safe_filename] = {
+        self._record_saved_file(safe_filename, {
             'original_name': filename,
             'description': description,
             'type': content_type,
             'timestamp': timestamp,
-            'path': str(file_path)
-        }
-        self.save_session()
+            'path': str(file_path),
+            'blob': digest,
+            'size': len(data)
+        })
         
         return str(file_path)
     
     def save_file_copy(self, source_path: str, description: str = "") -> str:
         """Save a copy of an existing file to the artifacts directory.
         
+        Like save_generated_content, identical copies share one blob.
+        
         Args:
             source_path: Path to the source file
             description: Optional description of the file
@@ -145,19 +749,26 @@ class Session:
         safe_filename = f"{timestamp}_{source.name}"
         dest_path = self.artifacts_dir / safe_filename
         
-        shutil.copy2(source, dest_path)
+        digest = self.blobs.put_file(source)
+        self.blobs.checkout(digest, dest_path)
         
-        self.saved_files[safe_filename] = {
+        self._record_saved_file(safe_filename, {
             'original_name': source.name,
             'description': description,
             'type': 'file_copy',
             'timestamp': timestamp,
-            'path': str(dest_path)
-        }
-        self.save_session()
+            'path': str(dest_path),
+            'blob': digest,
+            'size': self.blobs.path_for(digest).stat().st_size
+        })
         
         return str(dest_path)
     
+    def _record_saved_file(self, filename: str, metadata: Dict[str, Any]):
+        """Store metadata for a saved artifact."""
+        self.saved_files[filename] = metadata
+        self._append_record({"op": "saved_file", "name": filename, "data": metadata})
+    
     def get_saved_file(self, filename: str) -> Optional[Dict[str, Any]]:
         """Get information about a saved file.
         
@@ -229,48 +840,141 @@ class Session:
             return self.history[-1].get("tool_uses", [])
         return []
     
+    def get_history_index(self) -> HistoryIndex:
+        """Get a relevance index over the most recent session history.
+        
+        The index covers the last HISTORY_INDEX_WINDOW interactions, read
+        with iter_history, so opening a long session does not parse all of
+        it. It is built on first use and then updated incrementally by
+        add_interaction; it is rebuilt if the history was replaced.
+        """
+        count = len(self.history)
+        if self._history_index is None or self._history_index.end != count:
+            start = max(0, count - HISTORY_INDEX_WINDOW)
+            self._history_index = HistoryIndex(self.iter_history(start), start=start)
+        return self._history_index
+    
     def clear_history(self):
         """Clear the current session history."""
         self.history = []
+        self._history_index = None
+        # Compacting drops the cleared interactions from the log as well
         self.save_session()
     
+    def iter_history(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over part of the history without loading all of it.
+        
+        Args:
+            start: Position of the first interaction (negative counts from the end)
+            stop: Position to stop before (defaults to the end)
+        
+        Yields:
+            Interactions, oldest first
+        """
+        history = self.history
+        if isinstance(history, SessionHistory):
+            return history.iter_slice(start, stop)
+        return iter(history[start:stop])
+    
     def get_session_info(self) -> Dict[str, Any]:
-        """Get information about the current session."""
+        """Get information about the current session.
+        
+        Only the positions and timestamps of interactions are needed, so
+        this does not read the history itself.
+        """
+        history = self.history
+        start_time = last_interaction = None
+        if isinstance(history, SessionHistory) and len(history):
+            start_time, last_interaction = history.timestamp(0), history.timestamp(-1)
+        elif history:
+            start_time, last_interaction = history[0].get("timestamp"), history[-1].get("timestamp")
         return {
             "session_file": str(self.current_session),
-            "interaction_count": len(self.history),
+            "interaction_count": len(history),
             "saved_files_count": len(self.saved_files),
-            "start_time": self.history[0].get("timestamp") if self.history else None,
-            "last_interaction": self.history[-1].get("timestamp") if self.history else None
+            "start_time": start_time,
+            "last_interaction": last_interaction
         }
     
     def export_session(self, output_file: str):
         """Export the current session to a file.
         
+        The export is a single JSON document, written with one interaction
+        per line so it can be streamed without holding the history in memory.
+        
         Args:
             output_file: Path to save the exported session
         """
+        header = json.dumps({
+            "session_info": self.get_session_info(),
+            "saved_files": self.saved_files
+        })
         with open(output_file, 'w') as f:
-            json.dump({
-                "session_info": self.get_session_info(),
-                "history": self.history,
-                "saved_files": self.saved_files
-            }, f, indent=2)
+            f.write(header[:-1] + ', "history": [\n')
+            separator = ""
+            for interaction in self.iter_history():
+                f.write(separator + json.dumps(interaction))
+                separator = ",\n"
+            f.write("\n]}\n")
     
     def import_session(self, input_file: str):
         """Import a session from a file.
         
+        Files written by export_session are streamed one interaction at a
+        time; any other JSON document with a "history" list is read whole.
+        
         Args:
             input_file: Path to the session file to import
         """
         with open(input_file, 'r') as f:
+            first_line = f.readline().rstrip()
             try:
+                if first_line.endswith(EXPORT_HISTORY_START):
+                    header = json.loads(first_line + "]}")
+                    self._replace_history(_read_exported_history(f), header.get("saved_files", {}))
+                    return
+                f.seek(0)
                 data = json.load(f)
-                if isinstance(data, dict) and "history" in data:
-                    self.history = data["history"]
-                    self.saved_files = data.get("saved_files", {})
-                    self.save_session()
-                else:
-                    raise ValueError("Invalid session file format")
             except json.JSONDecodeError:
                 raise ValueError("Invalid JSON in session file")
+        if isinstance(data, dict) and isinstance(data.get("history"), list):
+            self._replace_history(data["history"], data.get("saved_files", {}))
+        else:
+            raise ValueError("Invalid session file format")
+    
+    def _replace_history(self, history: Iterable[Dict[str, Any]], saved_files: Dict[str, Any]):
+        """Replace the stored history and saved files, e.g. on import."""
+        previous = self.saved_files
+        self.saved_files = saved_files
+        try:
+            self.save_session(history)
+        except BaseException:
+            self.saved_files = previous
+            raise
+        self._history_index = None
+
+
+def open_session(
+    session_dir: str = DEFAULT_SESSION_DIR,
+    session_name: Optional[str] = None,
+    backend: Optional[str] = None
+) -> Session:
+    """Open a session with the configured storage backend.
+    
+    Args:
+        session_dir: Directory to store session data
+        session_name: Optional fixed session name
+        backend: "jsonl" (per-session log files, the default) or "sqlite"
+            (one shared database that is safe for concurrent processes);
+            defaults to KAZURI_SESSION_BACKEND
+    
+    Returns:
+        Session instance
+    """
+    backend = (backend or os.getenv('KAZURI_SESSION_BACKEND') or 'jsonl').lower()
+    if backend == 'sqlite':
+        from .session_sqlite import SQLiteSession
+        return SQLiteSession(session_dir=session_dir, session_name=session_name)
+    if backend != 'jsonl':
+        raise ValueError(f"Unknown session backend: {backend}")
+    return Session(session_dir=session_dir, session_name=session_name)
@@ -0,0 +1,428 @@
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Sequence
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Dict, Any, Optional, Iterator, Union
+from .session import Session, DEFAULT_SESSION_DIR, SESSION_IDLE_SECONDS
+
+DATABASE_NAME = "sessions.db"
+
+# Interactions read per query when iterating over the history
+HISTORY_PAGE_SIZE = 100
+
+# Seconds a writer waits for another process's transaction to finish
+BUSY_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at);
+
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    timestamp TEXT NOT NULL,
+    task TEXT NOT NULL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_session ON interactions(session_id, id);
+
+CREATE TABLE IF NOT EXISTS tool_uses (
+    id INTEGER PRIMARY KEY,
+    interaction_id INTEGER NOT NULL REFERENCES interactions(id) ON DELETE CASCADE,
+    tool TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tool_uses_interaction ON tool_uses(interaction_id, id);
+
+CREATE TABLE IF NOT EXISTS saved_files (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    filename TEXT NOT NULL,
+    type TEXT,
+    metadata TEXT NOT NULL,
+    PRIMARY KEY (session_id, filename)
+);
+CREATE INDEX IF NOT EXISTS idx_saved_files_type ON saved_files(session_id, type);
+"""
+
+
+class SQLiteHistory(Sequence):
+    """Read-only view of a SQLite session's interactions.
+    
+    Its length is a COUNT query and items and slices are read with
+    LIMIT/OFFSET queries, so only the interactions used are loaded.
+    """
+    
+    def __init__(self, session: "SQLiteSession"):
+        self.session = session
+    
+    def __len__(self) -> int:
+        return self.session._count_interactions()
+    
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            interactions = list(self.session.iter_history(start, stop))
+            return interactions[::step] if step != 1 else interactions
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("history index out of range")
+        return next(self.session.iter_history(index, index + 1))
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.session.iter_history()
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+    
+    def __repr__(self) -> str:
+        return f"SQLiteHistory({self.session.session_name!r}, {len(self)} interactions)"
+
+
+class SQLiteSession(Session):
+    """Session stored in a shared SQLite database.
+
+    All sessions in a directory live in one WAL-mode database with indexed
+    tables for interactions, tool uses and saved files. Every write is its
+    own transaction, so several kazuri processes can record interactions
+    in the same repository concurrently without losing or corrupting each
+    other's data.
+
+    `history` is a view that reads interactions from the database as they
+    are used and `saved_files` is read on access; assigning to either
+    replaces the stored values.
+    """
+
+    def __init__(self, session_dir: str = DEFAULT_SESSION_DIR, session_name: Optional[str] = None):
+        """Initialize SQLite session.
+
+        Args:
+            session_dir: Directory containing the session database
+            session_name: Optional fixed session name to load or create
+                instead of the most recent session
+        """
+        self.session_dir = Path(session_dir)
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        self.artifacts_dir = self.session_dir / "artifacts"
+        self.artifacts_dir.mkdir(exist_ok=True)
+        self.db_path = self.session_dir / DATABASE_NAME
+        self.current_session = self.db_path
+        self.session_name = None
+        self.session_id = None
+        # Records are committed as they are made, so nothing is ever pending
+        self._pending: List[bytes] = []
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._transaction() as conn:
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+        if session_name:
+            self.load_named_session(session_name)
+        else:
+            self.load_or_create_session()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in a write transaction.
+
+        BEGIN IMMEDIATE takes the write lock up front, so concurrent writers
+        queue on the busy timeout instead of failing mid-transaction.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: Any = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def _touch(self, conn: sqlite3.Connection):
+        conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (time.time(), self.session_id))
+
+    def load_named_session(self, name: str):
+        """Load the session with the given name, creating it if needed."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO sessions (name, created_at, updated_at) VALUES (?, ?, ?)",
+                (name, now, now)
+            )
+            self.session_id = conn.execute("SELECT id FROM sessions WHERE name = ?", (name,)).fetchone()[0]
+        self.session_name = name
+
+    def load_or_create_session(self):
+        """Resume the most recently updated session or create a new one."""
+        rows = self._query("SELECT name, updated_at FROM sessions ORDER BY updated_at DESC LIMIT 1")
+        if rows and time.time() - rows[0][1] <= SESSION_IDLE_SECONDS:
+            self.load_named_session(rows[0][0])
+        else:
+            self.create_new_session()
+
+    def create_new_session(self, name: Optional[str] = None):
+        """Create a new session.
+
+        Args:
+            name: Optional session name (defaults to the current timestamp)
+        """
+        self.load_named_session(name or datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+    @property
+    def history(self) -> SQLiteHistory:
+        """Interactions in the session, oldest first, read on access."""
+        return SQLiteHistory(self)
+
+    @history.setter
+    def history(self, interactions: List[Dict[str, Any]]):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM interactions WHERE session_id = ?", (self.session_id,))
+            for interaction in interactions:
+                self._insert_interaction(conn, interaction)
+            self._touch(conn)
+
+    @property
+    def saved_files(self) -> Dict[str, Dict[str, Any]]:
+        """Metadata of saved artifacts keyed by filename."""
+        rows = self._query(
+            "SELECT filename, metadata FROM saved_files WHERE session_id = ? ORDER BY rowid",
+            (self.session_id,)
+        )
+        return {filename: json.loads(metadata) for filename, metadata in rows}
+
+    @saved_files.setter
+    def saved_files(self, saved_files: Dict[str, Dict[str, Any]]):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM saved_files WHERE session_id = ?", (self.session_id,))
+            for filename, metadata in saved_files.items():
+                self._insert_saved_file(conn, filename, metadata)
+            self._touch(conn)
+
+    def _load_interactions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read interactions with their tool uses, oldest first.
+
+        Args:
+            limit: Only read the most recent `limit` interactions
+        """
+        sql = "SELECT id, timestamp, task, response FROM interactions WHERE session_id = ? ORDER BY id DESC"
+        params = (self.session_id,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return self._with_tool_uses(self._query(sql, params)[::-1])
+
+    def _count_interactions(self) -> int:
+        return self._query("SELECT COUNT(*) FROM interactions WHERE session_id = ?", (self.session_id,))[0][0]
+
+    def _with_tool_uses(self, rows: List[tuple]) -> List[Dict[str, Any]]:
+        """Build interactions from rows of the interactions table, oldest first."""
+        if not rows:
+            return []
+
+        tool_uses: Dict[int, List[Dict[str, Any]]] = {row[0]: [] for row in rows}
+        for interaction_id, tool, parameters, result in self._query(
+            "SELECT t.interaction_id, t.tool, t.parameters, t.result FROM tool_uses t "
+            "JOIN interactions i ON i.id = t.interaction_id "
+            "WHERE i.session_id = ? AND t.interaction_id BETWEEN ? AND ? ORDER BY t.id",
+            (self.session_id, rows[0][0], rows[-1][0])
+        ):
+            if interaction_id in tool_uses:
+                tool_uses[interaction_id].append({
+                    "tool": tool,
+                    "parameters": json.loads(parameters),
+                    "result": json.loads(result)
+                })
+        return [
+            {"timestamp": timestamp, "task": task, "response": response, "tool_uses": tool_uses[interaction_id]}
+            for interaction_id, timestamp, task, response in rows
+        ]
+
+    def iter_history(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over part of the history, reading it a page at a time.
+
+        Args:
+            start: Position of the first interaction (negative counts from the end)
+            stop: Position to stop before (defaults to the end)
+
+        Yields:
+            Interactions, oldest first
+        """
+        start, stop, _ = slice(start, stop).indices(self._count_interactions())
+        last_id = None
+        while start < stop:
+            # Keyset pagination: each page continues after the last id seen
+            if last_id is None:
+                sql, params = "ORDER BY id LIMIT ? OFFSET ?", (min(HISTORY_PAGE_SIZE, stop - start), start)
+            else:
+                sql, params = "AND id > ? ORDER BY id LIMIT ?", (last_id, min(HISTORY_PAGE_SIZE, stop - start))
+            rows = self._query(
+                "SELECT id, timestamp, task, response FROM interactions WHERE session_id = ? " + sql,
+                (self.session_id,) + params
+            )
+            if not rows:
+                return
+            yield from self._with_tool_uses(rows)
+            last_id = rows[-1][0]
+            start += len(rows)
+
+    def _replace_history(self, history: Iterable[Dict[str, Any]], saved_files: Dict[str, Any]):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM interactions WHERE session_id = ?", (self.session_id,))
+            conn.execute("DELETE FROM saved_files WHERE session_id = ?", (self.session_id,))
+            for interaction in history:
+                self._insert_interaction(conn, interaction)
+            for filename, metadata in saved_files.items():
+                self._insert_saved_file(conn, filename, metadata)
+            self._touch(conn)
+        self._history_index = None
+
+    def _insert_interaction(self, conn: sqlite3.Connection, interaction: Dict[str, Any]):
+        cursor = conn.execute(
+            "INSERT INTO interactions (session_id, timestamp, task, response) VALUES (?, ?, ?, ?)",
+            (self.session_id, interaction.get("timestamp", ""),
+             interaction.get("task", ""), interaction.get("response", ""))
+        )
+        conn.executemany(
+            "INSERT INTO tool_uses (interaction_id, tool, parameters, result) VALUES (?, ?, ?, ?)",
+            [
+                (cursor.lastrowid, tool_use.get("tool", "unknown_tool"),
+                 json.dumps(tool_use.get("parameters", {})),
+                 json.dumps(tool_use.get("result", "No result"), default=str))
+                for tool_use in interaction.get("tool_uses", [])
+                if isinstance(tool_use, dict)
+            ]
+        )
+
+    def _insert_saved_file(self, conn: sqlite3.Connection, filename: str, metadata: Dict[str, Any]):
+        conn.execute(
+            "INSERT OR REPLACE INTO saved_files (session_id, filename, type, metadata) VALUES (?, ?, ?, ?)",
+            (self.session_id, filename, metadata.get("type"), json.dumps(metadata))
+        )
+
+    def _record_interaction(self, interaction: Dict[str, Any]):
+        with self._transaction() as conn:
+            self._insert_interaction(conn, interaction)
+            self._touch(conn)
+
+    def _record_saved_file(self, filename: str, metadata: Dict[str, Any]):
+        with self._transaction() as conn:
+            self._insert_saved_file(conn, filename, metadata)
+            self._touch(conn)
+
+    def save_session(self):
+        """Nothing to do; every change is committed as it is made."""
+
+    def get_saved_file(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Get information about a saved file.
+
+        Args:
+            filename: Name of the saved file
+
+        Returns:
+            Dictionary containing file metadata or None if not found
+        """
+        rows = self._query(
+            "SELECT metadata FROM saved_files WHERE session_id = ? AND filename = ?",
+            (self.session_id, filename)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def list_saved_files(self, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List all saved files, optionally filtered by type.
+
+        Args:
+            content_type: Optional filter by content type
+
+        Returns:
+            List of file metadata dictionaries
+        """
+        sql = "SELECT filename, metadata FROM saved_files WHERE session_id = ?"
+        params = (self.session_id,)
+        if content_type:
+            sql += " AND type = ?"
+            params += (content_type,)
+        return [
+            {**json.loads(metadata), 'filename': filename}
+            for filename, metadata in self._query(sql + " ORDER BY rowid", params)
+        ]
+
+    def get_recent_context(self, limit: int = 5) -> str:
+        """Get recent conversation context.
+
+        Args:
+            limit: Maximum number of recent interactions to include
+
+        Returns:
+            String containing recent conversation history
+        """
+        context = []
+        for interaction in self._load_interactions(limit):
+            context.append(f"Human: {interaction['task']}")
+            context.append(f"Assistant: {interaction['response']}")
+            if interaction['tool_uses']:
+                context.append("Tool Uses:")
+                for tool_use in interaction['tool_uses']:
+                    context.append(f"- {tool_use['tool']}: {tool_use['result']}")
+        return "\n\n".join(context)
+
+    def get_last_response(self) -> Optional[str]:
+        """Get the last response from history."""
+        rows = self._query(
+            "SELECT response FROM interactions WHERE session_id = ? ORDER BY id DESC LIMIT 1",
+            (self.session_id,)
+        )
+        return rows[0][0] if rows else None
+
+    def get_last_tool_uses(self) -> List[Dict[str, Any]]:
+        """Get the last tool uses from history."""
+        last = self._load_interactions(limit=1)
+        return last[0]["tool_uses"] if last else []
+
+    def clear_history(self):
+        """Clear the current session history."""
+        self.history = []
+
+    def get_session_info(self) -> Dict[str, Any]:
+        """Get information about the current session."""
+        interaction_count, saved_files_count, start_time, last_interaction = self._query(
+            "SELECT "
+            "(SELECT COUNT(*) FROM interactions WHERE session_id = :id), "
+            "(SELECT COUNT(*) FROM saved_files WHERE session_id = :id), "
+            "(SELECT timestamp FROM interactions WHERE session_id = :id ORDER BY id LIMIT 1), "
+            "(SELECT timestamp FROM interactions WHERE session_id = :id ORDER BY id DESC LIMIT 1)",
+            {"id": self.session_id}
+        )[0]
+        return {
+            "session_file": str(self.current_session),
+            "session_name": self.session_name,
+            "interaction_count": interaction_count,
+            "saved_files_count": saved_files_count,
+            "start_time": start_time,
+            "last_interaction": last_interaction
+        }
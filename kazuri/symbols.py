@@ -0,0 +1,422 @@
+import ast
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, List, Dict, Any, Optional, Tuple
+from .ignore import Watch, walk_files
+from .search import LineIndex
+from .trigram import RACY_NANOSECONDS
+
+CACHE_FILE = "symbols.db"
+
+# Bump when a parser's output changes so cached symbols are re-parsed
+PARSER_VERSION = 2
+
+# Fewer uncached files than this are parsed in-process; starting a pool
+# costs more than it saves
+POOL_MIN_FILES = 64
+
+
+def default_cache_dir(root: Path) -> Path:
+    """Get the cache directory of a repository's symbols and map, outside the repository.
+
+    Args:
+        root: Resolved repository directory
+
+    Returns:
+        KAZURI_REPO_MAP_CACHE_DIR if set, else a directory named after the
+        root's path under $XDG_CACHE_HOME/kazuri/repomap (~/.cache by default)
+    """
+    configured = os.getenv('KAZURI_REPO_MAP_CACHE_DIR')
+    if configured:
+        return Path(configured)
+    base = Path(os.getenv('XDG_CACHE_HOME') or Path.home() / ".cache")
+    return base / "kazuri" / "repomap" / hashlib.sha256(str(root).encode()).hexdigest()[:16]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    hash TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+Parser = Callable[[str], List[Dict[str, Any]]]
+
+# Names a file may refer to other files' symbols by
+IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]{2,}')
+
+
+def _symbol(kind: str, name: str, line: int, end_line: Optional[int] = None) -> Dict[str, Any]:
+    return {"type": kind, "name": name, "line": line, "end_line": end_line or line}
+
+
+def _assigned_names(target: ast.expr) -> Iterable[str]:
+    if isinstance(target, ast.Name):
+        yield target.id
+    elif isinstance(target, (ast.Tuple, ast.List)):
+        for element in target.elts:
+            yield from _assigned_names(element)
+
+
+def parse_python(source: str) -> List[Dict[str, Any]]:
+    """List the definitions in Python source with the ast module.
+
+    Classes, functions and methods (including nested classes' methods) and
+    module and class level variables are listed with qualified names.
+    Function bodies are not descended into, so locals and keyword
+    arguments are not mistaken for definitions.
+
+    Args:
+        source: Python source code
+
+    Returns:
+        Symbols with type, name, line and end_line
+
+    Raises:
+        SyntaxError: If the source does not parse
+    """
+    symbols = []
+
+    def visit(body: List[ast.stmt], scope: str, in_class: bool):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                name = f"{scope}{node.name}"
+                symbols.append(_symbol("class", name, node.lineno, node.end_lineno))
+                visit(node.body, f"{name}.", True)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if in_class else "function"
+                symbols.append(_symbol(kind, f"{scope}{node.name}", node.lineno, node.end_lineno))
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    for name in _assigned_names(target):
+                        symbols.append(_symbol("variable", f"{scope}{name}", node.lineno, node.end_lineno))
+            elif isinstance(node, (ast.If, ast.Try)) and not in_class:
+                # Definitions under `if TYPE_CHECKING:` or `try: import ...`
+                visit(node.body + node.orelse + getattr(node, "finalbody", []), scope, in_class)
+
+    visit(ast.parse(source).body, "", False)
+    return symbols
+
+
+JS_CLASS = re.compile(r'^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)')
+JS_FUNCTION = re.compile(r'^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)')
+JS_ARROW = re.compile(
+    r'^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*'
+    r'(?:async\s+)?(?:function\b|(?:\([^)]*\)|[A-Za-z_$][\w$]*)\s*(?::[^=]+)?=>)'
+)
+JS_VARIABLE = re.compile(r'^(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)')
+TS_TYPE = re.compile(r'^\s*(?:export\s+)?(?:declare\s+)?(interface|type|enum)\s+([A-Za-z_$][\w$]*)')
+JS_METHOD = re.compile(
+    r'^\s*(?:(?:public|private|protected|static|readonly|override|abstract|async|get|set)\s+)*'
+    r'\*?([A-Za-z_$][\w$]*)\s*(?:<[^>]*>)?\s*\('
+)
+JS_KEYWORDS = frozenset({"if", "for", "while", "switch", "catch", "function", "return", "with", "constructor"})
+JS_STRINGS_AND_COMMENTS = re.compile(r'//.*$|/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`')
+
+
+def parse_javascript(source: str) -> List[Dict[str, Any]]:
+    """List the definitions in JavaScript or TypeScript source.
+
+    A line-based scanner, not a full parser: it recognizes TypeScript
+    interface, type and enum declarations, top-level classes, functions,
+    arrow functions and const/let/var, and methods directly inside a class
+    body, by tracking brace depth with strings and comments stripped.
+
+    Args:
+        source: JavaScript or TypeScript source code
+
+    Returns:
+        Symbols with type, name, line and end_line (the declaring line)
+    """
+    symbols = []
+    depth = 0
+    classes: List[Tuple[str, int]] = []
+    in_comment = False
+    for line_num, line in enumerate(source.split('\n'), 1):
+        if in_comment:
+            end = line.find("*/")
+            if end == -1:
+                continue
+            line, in_comment = line[end + 2:], False
+        code = JS_STRINGS_AND_COMMENTS.sub('""', line)
+        if "/*" in code:
+            code, in_comment = code[:code.index("/*")], True
+        while classes and depth <= classes[-1][1]:
+            classes.pop()
+
+        match = JS_CLASS.match(code)
+        if match:
+            symbols.append(_symbol("class", match.group(1), line_num))
+            classes.append((match.group(1), depth))
+        elif classes and depth == classes[-1][1] + 1:
+            match = JS_METHOD.match(code)
+            if match and match.group(1) not in JS_KEYWORDS:
+                symbols.append(_symbol("method", f"{classes[-1][0]}.{match.group(1)}", line_num))
+        elif TS_TYPE.match(code):
+            match = TS_TYPE.match(code)
+            symbols.append(_symbol(match.group(1), match.group(2), line_num))
+        elif depth == 0:
+            # Functions and variables declared inside functions are locals
+            match = JS_FUNCTION.match(code) or JS_ARROW.match(code)
+            if match:
+                symbols.append(_symbol("function", match.group(1), line_num))
+            elif JS_VARIABLE.match(code):
+                symbols.append(_symbol("variable", JS_VARIABLE.match(code).group(1), line_num))
+        depth += code.count("{") - code.count("}")
+    return symbols
+
+
+PARSERS: Dict[str, Parser] = {}
+
+
+def register_parser(extensions: Iterable[str], parser: Parser):
+    """Register a symbol parser for file extensions.
+
+    Args:
+        extensions: Extensions including the dot, e.g. [".go"]
+        parser: Function from source text to a list of symbols with type,
+            name, line and end_line
+    """
+    for extension in extensions:
+        PARSERS[extension.lower()] = parser
+
+
+register_parser([".py", ".pyi"], parse_python)
+register_parser([".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts"], parse_javascript)
+
+
+def parse_symbols(path: str, source: str) -> List[Dict[str, Any]]:
+    """Parse a file's symbols with the parser registered for its extension.
+
+    Python that does not parse (e.g. Python 2) falls back to matching
+    def and class lines.
+    """
+    parser = PARSERS.get(os.path.splitext(path)[1].lower())
+    if parser is None:
+        return []
+    try:
+        return parser(source)
+    except (SyntaxError, ValueError):
+        line_index = LineIndex(source)
+        return [
+            _symbol("function" if match.group(1) == "def" else "class", match.group(2), line_index.line_number(match.start()))
+            for match in re.finditer(r'^[ \t]*(def|class)\s+([A-Za-z_]\w*)', source, re.MULTILINE)
+        ]
+
+
+def _content_hash(path: str, data: bytes) -> str:
+    """Hash a file's content together with what decides how it is parsed."""
+    digest = hashlib.sha256(f"{PARSER_VERSION}:{os.path.splitext(path)[1].lower()}:".encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _parse_file(path: str, source: str) -> Dict[str, Any]:
+    """Get a file's symbols and the identifiers it uses."""
+    return {"symbols": parse_symbols(path, source), "identifiers": sorted(set(IDENTIFIER.findall(source)))}
+
+
+def _parse_chunk(files: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Parse (path, source) pairs (runs in a worker process)."""
+    return [_parse_file(path, source) for path, source in files]
+
+
+class SymbolIndex:
+    """Symbols of source files, cached by content hash.
+
+    Files are parsed with the parser registered for their extension, and
+    the symbols and the identifiers each file uses are stored in a SQLite
+    database keyed by the hash of the file's content. The hash of each file is remembered with its
+    modification time and size, so files that have not changed are not
+    even read again.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, workers: Optional[int] = None):
+        """Initialize symbol index.
+
+        Args:
+            cache_path: Cache database (defaults to symbols.db in the
+                default_cache_dir of the working directory)
+            workers: Processes parsing uncached files (defaults to the CPU count)
+        """
+        self.cache_path = Path(cache_path or default_cache_dir(Path.cwd().resolve()) / CACHE_FILE)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
+        self._conn = sqlite3.connect(str(self.cache_path), isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "SymbolIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _source_files(self, path: Path, watch: Optional[Watch] = None) -> List[Tuple[str, str]]:
+        if path.is_file():
+            return [(str(path), path.name)]
+        return [
+            (file_path, rel_path) for file_path, rel_path in walk_files(str(path), watch=watch)
+            if os.path.splitext(rel_path)[1].lower() in PARSERS
+        ]
+
+    def symbols(self, path: str, watch: Optional[Watch] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the symbols of a file or of the source files under a directory.
+
+        Args:
+            path: File, or directory walked with walk_files (ignore rules apply)
+            watch: Dict in which the directories walked and the files
+                found are recorded (see walk_files)
+
+        Returns:
+            Dict from path relative to `path` (the file name for a file) to
+            its symbols, in walk order
+        """
+        return {rel_path: entry["symbols"] for rel_path, entry in self.entries(path, watch).items()}
+
+    def entries(self, path: str, watch: Optional[Watch] = None) -> Dict[str, Dict[str, Any]]:
+        """Get the symbols and identifiers of a file or the source files under a directory.
+
+        Args:
+            path: File, or directory walked with walk_files (ignore rules apply)
+            watch: Dict in which the directories walked and the files
+                found are recorded (see walk_files)
+
+        Returns:
+            Dict from path relative to `path` to a dict with the file's
+            "symbols" and the sorted "identifiers" it uses
+        """
+        root = Path(path).resolve()
+        return self._entries(self._source_files(root, watch), self._known_files(root), watch)
+
+    def entries_for(self, files: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """Get the symbols and identifiers of specific files.
+
+        Args:
+            files: (path, key to return it under) tuples
+
+        Returns:
+            Dict from key to a dict with the file's "symbols" and "identifiers"
+        """
+        files = [(str(Path(file_path).resolve()), key) for file_path, key in files]
+        return self._entries(files, self._known_paths([file_path for file_path, _ in files]))
+
+    def _entries(
+        self,
+        files: List[Tuple[str, str]],
+        known: Dict[str, Tuple[int, int, str]],
+        watch: Optional[Watch] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        started_ns = time.time_ns()
+        hashes: Dict[str, str] = {}
+        sources: Dict[str, Tuple[str, str]] = {}
+        updated = []
+        for file_path, _ in files:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            if watch is not None:
+                watch[file_path] = (stat.st_mtime_ns, stat.st_size)
+            row = known.pop(file_path, None)
+            if row and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+                hashes[file_path] = row[2]
+                continue
+            try:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            digest = _content_hash(file_path, data)
+            hashes[file_path] = digest
+            sources[digest] = (file_path, data.decode('utf-8', errors='replace'))
+            mtime_ns = -1 if stat.st_mtime_ns >= started_ns - RACY_NANOSECONDS else stat.st_mtime_ns
+            updated.append((file_path, mtime_ns, stat.st_size, digest))
+
+        cached = self._cached_entries(set(hashes.values()))
+        missing = [digest for digest in sources if digest not in cached]
+        for digest, entry in zip(missing, self._parse([sources[digest] for digest in missing])):
+            cached[digest] = entry
+
+        # Anything left in known no longer exists
+        if updated or missing or known:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", ((file_path,) for file_path in known))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size, hash) VALUES (?, ?, ?, ?)", updated
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO symbols (hash, data) VALUES (?, ?)",
+                    ((digest, json.dumps(cached[digest])) for digest in missing)
+                )
+                # Symbols of content no file has any more
+                self._conn.execute("DELETE FROM symbols WHERE hash NOT IN (SELECT hash FROM files)")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+        return {rel_path: cached[hashes[file_path]] for file_path, rel_path in files if file_path in hashes}
+
+    def _known_files(self, root: Path) -> Dict[str, Tuple[int, int, str]]:
+        """Get the cached mtime, size and hash of a file or of the files under a directory."""
+        if root.is_file():
+            rows = self._conn.execute("SELECT path, mtime_ns, size, hash FROM files WHERE path = ?", (str(root),))
+        else:
+            # Everything under "root/": "0" is the character after "/"
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, size, hash FROM files WHERE path > ? AND path < ?",
+                (f"{root}{os.sep}", f"{root}{chr(ord(os.sep) + 1)}")
+            )
+        return {file_path: (mtime_ns, size, digest) for file_path, mtime_ns, size, digest in rows}
+
+    def _known_paths(self, paths: List[str]) -> Dict[str, Tuple[int, int, str]]:
+        """Get the cached mtime, size and hash of specific files."""
+        known = {}
+        for i in range(0, len(paths), 500):
+            chunk = paths[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT path, mtime_ns, size, hash FROM files WHERE path IN ({','.join('?' * len(chunk))})", chunk
+            )
+            known.update((file_path, (mtime_ns, size, digest)) for file_path, mtime_ns, size, digest in rows)
+        return known
+
+    def _cached_entries(self, digests: set) -> Dict[str, Dict[str, Any]]:
+        cached = {}
+        for digest in digests:
+            row = self._conn.execute("SELECT data FROM symbols WHERE hash = ?", (digest,)).fetchone()
+            if row:
+                cached[digest] = json.loads(row[0])
+        return cached
+
+    def _parse(self, files: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Parse files, in a process pool when there are enough of them.
+
+        Forking the pool while other threads run (a batch, or the refresh
+        thread of a live display) can deadlock the children, so the files
+        are parsed in this thread then.
+        """
+        if len(files) < POOL_MIN_FILES or self.workers <= 1 or threading.active_count() > 1:
+            return _parse_chunk(files)
+        chunk_size = max(1, len(files) // (self.workers * 4))
+        chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+        with ProcessPoolExecutor(self.workers) as pool:
+            return [entry for chunk in pool.map(_parse_chunk, chunks) for entry in chunk]
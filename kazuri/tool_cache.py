@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from .ignore import MISSING, Watch
+from .trigram import RACY_NANOSECONDS
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _current_stat(path: str) -> Tuple[int, int]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return MISSING
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ToolResultCache:
+    """In-memory LRU cache of read-only tool results.
+
+    An entry is keyed by tool name and parameters and remembers the
+    modification time and size of every file and directory the tool read
+    (its "watch", see kazuri.ignore.walk_files). A hit re-stats them and
+    is discarded if any changed, so edits made outside Kazuri are never
+    served stale. Writes made through the tools call invalidate() to drop
+    the entries depending on a path, or on any directory above it, right
+    away. Results are kept as JSON, so each hit returns a fresh copy, and
+    the least recently used ones are evicted past the byte limit.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initialize tool result cache.
+
+        Args:
+            max_bytes: Maximum total size of the cached results as JSON
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[str, Watch]]" = OrderedDict()
+        self._by_path: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "stale": 0}
+
+    @staticmethod
+    def make_key(tool: str, params: Dict[str, Any]) -> str:
+        """Build the cache key of a tool call."""
+        return json.dumps([tool, params], sort_keys=True, default=str)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached result if none of the paths it read has changed.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Copy of the result, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            data, watch = entry
+            if any(_current_stat(path) != recorded for path, recorded in watch.items()):
+                self._remove(key)
+                self._counters["stale"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+        return json.loads(data)
+
+    def put(self, key: str, result: Dict[str, Any], watch: Watch) -> bool:
+        """Cache a result.
+
+        Results that were not successful, read nothing, or read a path
+        modified too recently for its modification time to tell a later
+        write apart are not cached.
+
+        Args:
+            key: Key from make_key
+            result: Tool result
+            watch: Path -> (mtime_ns, size) of everything the tool read
+
+        Returns:
+            Whether the result was cached
+        """
+        if not result.get("success") or not watch:
+            return False
+        racy_after = time.time_ns() - RACY_NANOSECONDS
+        if any(mtime_ns >= racy_after for mtime_ns, _ in watch.values()):
+            return False
+        data = json.dumps(result, default=str)
+        size = len(data)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (data, dict(watch))
+            self._bytes += size
+            for path in watch:
+                self._by_path.setdefault(path, set()).add(key)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+        return True
+
+    def call(self, tool: str, params: Dict[str, Any], run: Callable[[Watch], Dict[str, Any]]) -> Dict[str, Any]:
+        """Get a tool result from the cache, or run the tool and cache it.
+
+        Args:
+            tool: Tool name
+            params: Parameters identifying the call
+            run: Runs the tool, recording what it reads in the given watch
+
+        Returns:
+            Tool result
+        """
+        key = self.make_key(tool, params)
+        result = self.get(key)
+        if result is None:
+            watch: Watch = {}
+            result = run(watch)
+            self.put(key, result, watch)
+        return result
+
+    def invalidate(self, path: str) -> int:
+        """Drop the entries that read a path or any directory above it.
+
+        Args:
+            path: Absolute path written or removed
+
+        Returns:
+            Number of entries dropped
+        """
+        path = os.path.realpath(path)
+        removed = 0
+        with self._lock:
+            while True:
+                for key in list(self._by_path.get(path, ())):
+                    self._remove(key)
+                    removed += 1
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+            self._counters["invalidations"] += removed
+        return removed
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        data, watch = entry
+        self._bytes -= len(data)
+        for path in watch:
+            keys = self._by_path.get(path)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_path[path]
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._by_path.clear()
+            self._bytes = 0
+            self._counters = dict.fromkeys(self._counters, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+
+
+def get_tool_result_cache() -> Optional[ToolResultCache]:
+    """Get the tool result cache configured from the environment.
+
+    Returns:
+        ToolResultCache limited to KAZURI_TOOL_CACHE_BYTES, or None if that
+        is set to 0
+    """
+    max_bytes = int(os.getenv('KAZURI_TOOL_CACHE_BYTES') or DEFAULT_MAX_BYTES)
+    if max_bytes <= 0:
+        return None
+    return ToolResultCache(max_bytes)
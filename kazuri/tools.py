@@ -1,30 +1,64 @@
 import os
-import re
 import glob
 import subprocess
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional
+
+if TYPE_CHECKING:
+    from .ignore import Watch
+
+# Files returned by one list_files call; the rest are fetched with its cursor
+DEFAULT_LIST_LIMIT = 1000
+
+# Matches returned by one search_files call (kazuri.search.DEFAULT_MAX_RESULTS;
+# the search engine pulls in concurrent.futures, so it is imported on use)
+DEFAULT_MAX_RESULTS = 1000
+
+# Optional integer parameters of read_file
+READ_RANGE_PARAMS = ("start_line", "end_line", "head", "tail", "byte_start", "byte_end", "max_bytes")
 
 class ToolManager:
     """Manages the execution of various tools available to Kazuri."""
     
+    TOOLS = [
+        "execute_command",
+        "read_file",
+        "write_to_file",
+        "search_files",
+        "list_files",
+        "list_code_definitions",
+        "browser_action"
+    ]
+    
     def __init__(self):
+        from .tool_cache import get_tool_result_cache
+        
         self.working_dir = os.getcwd()
-        # Create a directory for saving generated code
-        self.code_dir = Path(self.working_dir) / "generated_code"
-        self.code_dir.mkdir(exist_ok=True)
+        self._code_dir: Optional[Path] = None
+        self.result_cache = get_tool_result_cache()
+    
+    @property
+    def code_dir(self) -> Path:
+        """Directory for saving generated code, created on first use."""
+        if self._code_dir is None:
+            self._code_dir = Path(self.working_dir) / "generated_code"
+            self._code_dir.mkdir(exist_ok=True)
+        return self._code_dir
     
     def list_tools(self) -> List[str]:
         """List all available tools."""
-        return [
-            "execute_command",
-            "read_file",
-            "write_to_file",
-            "search_files",
-            "list_files",
-            "list_code_definitions",
-            "browser_action"
-        ]
+        return list(self.TOOLS)
+    
+    def _cached(self, tool: str, params: Dict[str, Any], run: Callable[[Optional["Watch"]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run a read-only tool through the result cache, if enabled."""
+        if self.result_cache is None:
+            return run(None)
+        return self.result_cache.call(tool, dict(params, working_dir=self.working_dir), run)
+    
+    def _invalidate(self, path: Path):
+        if self.result_cache is not None:
+            self.result_cache.invalidate(str(path))
     
     def execute_tool(self, tool: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a tool with given parameters."""
@@ -42,12 +76,21 @@ class ToolManager:
             if tool == "list_files":
                 return self.list_files(
                     params.get("path", "."),
-                    params.get("recursive", "false").lower() == "true"
+                    params.get("recursive", "false").lower() == "true",
+                    int(params["max_depth"]) if params.get("max_depth") else None,
+                    int(params.get("limit", DEFAULT_LIST_LIMIT)),
+                    params.get("cursor") or None
                 )
             elif tool == "read_file":
                 if "path" not in params:
                     return {"success": False, "error": "Path parameter is required"}
-                return self.read_file(params["path"])
+                return self.read_file(
+                    params["path"],
+                    **{
+                        name: int(params[name]) for name in READ_RANGE_PARAMS
+                        if params.get(name) not in (None, "")
+                    }
+                )
             elif tool == "write_to_file":
                 if "path" not in params or "content" not in params:
                     return {"success": False, "error": "Path and content parameters are required"}
@@ -58,7 +101,8 @@ class ToolManager:
                 return self.search_files(
                     params["path"],
                     params["regex"],
-                    params.get("file_pattern", "*")
+                    params.get("file_pattern", "*"),
+                    int(params.get("max_results", DEFAULT_MAX_RESULTS))
                 )
             elif tool == "execute_command":
                 if "command" not in params:
@@ -90,6 +134,7 @@ class ToolManager:
             # Save the file
             with open(file_path, 'w') as f:
                 f.write(content)
+            self._invalidate(file_path)
             
             result = {
                 "success": True,
@@ -122,6 +167,7 @@ class ToolManager:
                 if '<html' in content or 'document.' in content:
                     # Browser JavaScript - create HTML wrapper
                     html_path = file_path.with_suffix('.html')
+                    self._invalidate(html_path)
                     with open(html_path, 'w') as f:
                         f.write(f'''
                         <!DOCTYPE html>
@@ -282,8 +328,51 @@ class ToolManager:
         except Exception as e:
             return {"success": False, "error": f"Browser action error: {str(e)}"}
     
-    def read_file(self, path: str) -> Dict[str, Any]:
-        """Read file contents safely."""
+    def read_file(
+        self,
+        path: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        head: Optional[int] = None,
+        tail: Optional[int] = None,
+        byte_start: Optional[int] = None,
+        byte_end: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Read file contents safely.
+
+        The file is memory-mapped and only the part asked for is decoded;
+        see kazuri.reader.read_range. Binary files are refused and large
+        reads are truncated at a line boundary, with a hint to continue.
+
+        Args:
+            path: File to read
+            start_line: 1-based first line
+            end_line: 1-based last line (inclusive)
+            head: Number of lines from the start
+            tail: Number of lines from the end
+            byte_start: Offset of the first byte
+            byte_end: Offset just past the last byte
+            max_bytes: Maximum bytes of content (defaults to
+                KAZURI_READ_MAX_BYTES, 0 for no limit)
+
+        Returns:
+            Dict with the content, the range returned and whether it was
+            truncated
+        """
+        from .reader import get_read_limit
+        
+        ranges = {
+            "start_line": start_line, "end_line": end_line, "head": head, "tail": tail,
+            "byte_start": byte_start, "byte_end": byte_end,
+            "max_bytes": get_read_limit() if max_bytes is None else max_bytes or None
+        }
+        return self._cached("read_file", dict(ranges, path=path), lambda watch: self._read_file(path, ranges, watch))
+    
+    def _read_file(self, path: str, ranges: Dict[str, Any], watch: Optional["Watch"] = None) -> Dict[str, Any]:
+        from .ignore import record_stat
+        from .reader import read_range
+        
         try:
             file_path = Path(path)
             if not file_path.is_absolute():
@@ -296,14 +385,9 @@ class ToolManager:
                     "content": None
                 }
             
-            with open(file_path, 'r') as f:
-                content = f.read()
-            
-            return {
-                "success": True,
-                "content": content,
-                "error": None
-            }
+            if watch is not None:
+                record_stat(watch, os.path.realpath(file_path))
+            return read_range(str(file_path), **ranges)
         except Exception as e:
             return {
                 "success": False,
@@ -311,35 +395,45 @@ class ToolManager:
                 "content": None
             }
     
-    def search_files(self, path: str, pattern: str, file_pattern: str = "*") -> Dict[str, Any]:
-        """Search files with pattern matching."""
+    def search_files(
+        self,
+        path: str,
+        pattern: str,
+        file_pattern: str = "*",
+        max_results: Optional[int] = DEFAULT_MAX_RESULTS
+    ) -> Dict[str, Any]:
+        """Search files with pattern matching.
+        
+        Skips .gitignore'd paths, dependency and VCS directories and binary
+        files, and searches in parallel; see kazuri.search.search_files.
+        """
+        params = {"path": path, "pattern": pattern, "file_pattern": file_pattern, "max_results": max_results}
+        return self._cached(
+            "search_files", params, lambda watch: self._search_files(path, pattern, file_pattern, max_results, watch)
+        )
+    
+    def _search_files(
+        self,
+        path: str,
+        pattern: str,
+        file_pattern: str,
+        max_results: Optional[int],
+        watch: Optional["Watch"] = None
+    ) -> Dict[str, Any]:
+        from . import search
+        
         try:
-            results = []
             search_path = Path(path)
             if not search_path.is_absolute():
                 search_path = Path(self.working_dir) / path
             
-            for file_path in search_path.rglob(file_pattern):
-                if file_path.is_file():
-                    try:
-                        with open(file_path, 'r') as f:
-                            content = f.read()
-                            matches = re.finditer(pattern, content)
-                            for match in matches:
-                                line_num = content.count('\n', 0, match.start()) + 1
-                                results.append({
-                                    'file': str(file_path),
-                                    'line': line_num,
-                                    'match': match.group(),
-                                    'context': self._get_context(content, match.start())
-                                })
-                    except Exception:
-                        # Skip files that can't be read
-                        continue
-            
+            results, truncated = search.search_files(
+                str(search_path), pattern, file_pattern, max_results, watch=watch
+            )
             return {
                 "success": True,
                 "results": results,
+                "truncated": truncated,
                 "error": None
             }
         except Exception as e:
@@ -349,21 +443,73 @@ class ToolManager:
                 "error": str(e)
             }
     
-    def list_files(self, path: str = ".", recursive: bool = False) -> Dict[str, Any]:
-        """List files in directory."""
+    def list_files(
+        self,
+        path: str = ".",
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        limit: Optional[int] = DEFAULT_LIST_LIMIT,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """List files in directory.
+
+        The tree is walked lazily with kazuri.ignore.walk_files, so .git,
+        node_modules, virtualenvs and .gitignored paths are skipped and
+        only as much of it is read as the page needs. Files are listed in
+        walk order: each directory's files, then its subdirectories.
+
+        Args:
+            path: Directory to list
+            recursive: Include files in subdirectories
+            max_depth: Levels of subdirectories to include when recursive
+                (None for no limit)
+            limit: Maximum number of files to return, or None for all
+            cursor: next_cursor from a previous call, to continue after it
+
+        Returns:
+            Dict with the files, whether more remain and the cursor to
+            fetch them with
+        """
+        params = {"path": path, "recursive": recursive, "max_depth": max_depth, "limit": limit, "cursor": cursor}
+        return self._cached(
+            "list_files", params, lambda watch: self._list_files(path, recursive, max_depth, limit, cursor, watch)
+        )
+    
+    def _list_files(
+        self,
+        path: str,
+        recursive: bool,
+        max_depth: Optional[int],
+        limit: Optional[int],
+        cursor: Optional[str],
+        watch: Optional["Watch"] = None
+    ) -> Dict[str, Any]:
+        from .ignore import walk_files
+        
         try:
             list_path = Path(path)
             if not list_path.is_absolute():
                 list_path = Path(self.working_dir) / path
+            if not list_path.is_dir():
+                return {
+                    "success": False,
+                    "files": [],
+                    "error": f"Directory not found: {path}"
+                }
             
-            if recursive:
-                files = [str(p.relative_to(list_path)) for p in list_path.rglob("*") if p.is_file()]
-            else:
-                files = [str(p.relative_to(list_path)) for p in list_path.glob("*") if p.is_file()]
+            walk = walk_files(
+                str(list_path), max_depth=max_depth if recursive else 0, start_after=cursor, watch=watch
+            )
+            files = [rel_path for _, rel_path in islice(walk, None if limit is None else limit + 1)]
+            truncated = limit is not None and len(files) > limit
+            if truncated:
+                files = files[:limit]
             
             return {
                 "success": True,
-                "files": sorted(files),
+                "files": files,
+                "truncated": truncated,
+                "next_cursor": files[-1] if truncated else None,
                 "error": None
             }
         except Exception as e:
@@ -374,9 +520,27 @@ class ToolManager:
             }
     
     def list_code_definitions(self, path: str) -> Dict[str, Any]:
-        """List code definitions in files."""
+        """List code definitions in a file or the source files under a directory.
+
+        Symbols come from kazuri.symbols: the ast module for Python and a
+        lightweight scanner for JavaScript and TypeScript. They are cached
+        by content hash, so unchanged files are not parsed again.
+
+        Args:
+            path: File or directory
+
+        Returns:
+            Dict with the definitions (type, name, line, end_line, and file
+            for a directory)
+        """
+        return self._cached(
+            "list_code_definitions", {"path": path}, lambda watch: self._list_code_definitions(path, watch)
+        )
+    
+    def _list_code_definitions(self, path: str, watch: Optional["Watch"] = None) -> Dict[str, Any]:
+        from .symbols import CACHE_FILE, SymbolIndex, default_cache_dir
+        
         try:
-            definitions = []
             file_path = Path(path)
             if not file_path.is_absolute():
                 file_path = Path(self.working_dir) / path
@@ -388,28 +552,19 @@ class ToolManager:
                     "error": f"File not found: {path}"
                 }
             
-            # Simple regex patterns for common definitions
-            patterns = {
-                'function': r'def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(',
-                'class': r'class\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*[:\(]',
-                'variable': r'([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*'
-            }
-            
-            with open(file_path, 'r') as f:
-                content = f.read()
-                
-                for def_type, pattern in patterns.items():
-                    matches = re.finditer(pattern, content)
-                    for match in matches:
-                        definitions.append({
-                            'type': def_type,
-                            'name': match.group(1),
-                            'line': content.count('\n', 0, match.start()) + 1
-                        })
+            cache_path = default_cache_dir(Path(self.working_dir).resolve()) / CACHE_FILE
+            with SymbolIndex(str(cache_path)) as index:
+                symbols = index.symbols(str(file_path), watch)
+            if file_path.is_file():
+                definitions = next(iter(symbols.values()), [])
+            else:
+                definitions = [
+                    dict(symbol, file=rel_path) for rel_path, file_symbols in symbols.items() for symbol in file_symbols
+                ]
             
             return {
                 "success": True,
-                "definitions": sorted(definitions, key=lambda x: x['line']),
+                "definitions": definitions,
                 "error": None
             }
         except Exception as e:
@@ -418,13 +573,3 @@ class ToolManager:
                 "definitions": [],
                 "error": str(e)
             }
-    
-    def _get_context(self, content: str, position: int, context_lines: int = 2) -> str:
-        """Get context around a match position."""
-        lines = content.split('\n')
-        line_num = content.count('\n', 0, position)
-        
-        start = max(0, line_num - context_lines)
-        end = min(len(lines), line_num + context_lines + 1)
-        
-        return '\n'.join(lines[start:end])
@@ -0,0 +1,425 @@
+import os
+import sqlite3
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+from itertools import accumulate, groupby
+from pathlib import Path
+from typing import Iterator, List, Dict, Any, Optional, Set, Tuple, Union
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+from .cache import DEFAULT_CACHE_DIR
+from .ignore import Watch, walk_files
+from .search import read_text_file
+
+INDEX_FILE = "trigrams.db"
+
+# Postings gathered in memory before they are merged into the database,
+# which bounds memory use while building the index of a large tree
+FLUSH_POSTINGS = 2_000_000
+
+# Files modified this close to an update may change again within the
+# mtime granularity without their mtime changing; they are re-read on the
+# next update instead of being trusted
+RACY_NANOSECONDS = 2_000_000_000
+
+# Each update appends a chunk to the posting lists it touches; past this
+# many chunks they are merged so a lookup reads few rows
+MAX_CHUNKS = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram TEXT NOT NULL,
+    first_id INTEGER NOT NULL,
+    ids BLOB NOT NULL,
+    PRIMARY KEY (trigram, first_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+# A query is None (any file may match), a literal string, or an
+# ("and" | "or", [queries]) node
+Query = Union[None, str, Tuple[str, List[Any]]]
+
+
+def trigrams(text: str) -> Set[str]:
+    """Get the set of case-folded trigrams of a piece of text."""
+    text = text.casefold()
+    return set(map(''.join, zip(text, text[1:], text[2:])))
+
+
+def _encode(ids: List[int]) -> bytes:
+    """Encode sorted file IDs as compressed deltas."""
+    deltas = array('I', [ids[0]])
+    deltas.extend(b - a for a, b in zip(ids, ids[1:]))
+    return zlib.compress(deltas.tobytes(), 1)
+
+
+def _decode(data: bytes) -> List[int]:
+    deltas = array('I')
+    deltas.frombytes(zlib.decompress(data))
+    return list(accumulate(deltas))
+
+
+def _and(queries: List[Query]) -> Query:
+    queries = [q for q in queries if q is not None]
+    if not queries:
+        return None
+    return queries[0] if len(queries) == 1 else ("and", queries)
+
+
+def _or(queries: List[Query]) -> Query:
+    if not queries or any(q is None for q in queries):
+        return None
+    return queries[0] if len(queries) == 1 else ("or", queries)
+
+
+def _literal_query(items, ignore_case: bool) -> Query:
+    """Build the query for a parsed sequence of regular expression items."""
+    queries: List[Query] = []
+    run: List[str] = []
+
+    def end_run():
+        if len(run) >= 3:
+            queries.append(''.join(run))
+        run.clear()
+
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            char = chr(av)
+            # Under IGNORECASE, "i" also matches the dotless i and non-ASCII
+            # letters have equivalents case folding does not capture
+            if ignore_case and (not char.isascii() or char in "iI"):
+                end_run()
+            else:
+                run.append(char)
+            continue
+        if op is sre_constants.AT:
+            # Anchors match no characters, so literals on both sides are adjacent
+            continue
+        end_run()
+        if op is sre_constants.SUBPATTERN:
+            add_flags, del_flags, sub_items = av[1], av[2], av[3]
+            sub_ignore_case = (ignore_case or bool(add_flags & sre_constants.SRE_FLAG_IGNORECASE)) \
+                and not del_flags & sre_constants.SRE_FLAG_IGNORECASE
+            queries.append(_literal_query(sub_items, sub_ignore_case))
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            queries.append(_literal_query(av, ignore_case))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+                    getattr(sre_constants, "POSSESSIVE_REPEAT", None)):
+            if av[0] >= 1:
+                queries.append(_literal_query(av[2], ignore_case))
+        elif op is sre_constants.BRANCH:
+            queries.append(_or([_literal_query(branch, ignore_case) for branch in av[1]]))
+    end_run()
+    return _and(queries)
+
+
+def pattern_query(pattern: str) -> Query:
+    """Extract the literals a regular expression's matches must contain.
+
+    The query is conservative: every file the pattern can match satisfies
+    it, so it can be used to rule files out but not in.
+
+    Args:
+        pattern: Regular expression
+
+    Returns:
+        Query over literals of at least three characters, or None if the
+        pattern has no usable literals
+    """
+    parsed = sre_parse.parse(pattern)
+    return _literal_query(parsed, bool(parsed.state.flags & sre_constants.SRE_FLAG_IGNORECASE))
+
+
+class TrigramIndex:
+    """Persistent trigram index of the files in a workspace.
+
+    Maps every trigram of the (case-folded) text files under a directory
+    to the files containing it, in a SQLite database under the workspace's
+    .kazuri_cache directory. The walk is the same as search_files': default
+    excludes and .gitignore rules apply and binary files have no trigrams.
+
+    The index is updated incrementally: files whose modification time and
+    size are unchanged are not read again. Changed and removed files leave
+    their old IDs in the posting lists until enough of them pile up to
+    compact the index; queries skip IDs that no longer exist.
+    """
+
+    def __init__(self, root: str, index_path: Optional[str] = None):
+        """Initialize trigram index.
+
+        Args:
+            root: Directory the index covers
+            index_path: Index database (defaults to .kazuri_cache/trigrams.db
+                under root)
+        """
+        self.root = Path(root).resolve()
+        self.index_path = Path(index_path) if index_path else self.root / DEFAULT_CACHE_DIR / INDEX_FILE
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.index_path), isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def find(cls, path: str) -> Optional["TrigramIndex"]:
+        """Open the index covering a directory, if one has been built.
+
+        Args:
+            path: Directory inside the indexed workspace
+
+        Returns:
+            TrigramIndex of the nearest enclosing indexed directory, or None
+        """
+        path = Path(path).resolve()
+        for top in [path, *path.parents]:
+            if (top / DEFAULT_CACHE_DIR / INDEX_FILE).is_file():
+                return cls(str(top))
+        return None
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "TrigramIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _meta(self, key: str, default: Any = None) -> Any:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: Any):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _prefix(self, directory: Optional[str]) -> str:
+        """Get a directory's path relative to the root, "" for the root itself."""
+        if directory is None:
+            return ""
+        prefix = Path(directory).resolve().relative_to(self.root).as_posix()
+        return "" if prefix == "." else prefix
+
+    def _known_files(self, prefix: str) -> Dict[str, Tuple[int, int, int]]:
+        if prefix:
+            # Everything under "prefix/": "0" is the character after "/"
+            rows = self._conn.execute(
+                "SELECT path, id, mtime_ns, size FROM files WHERE path > ? AND path < ?",
+                (f"{prefix}/", f"{prefix}0")
+            )
+        else:
+            rows = self._conn.execute("SELECT path, id, mtime_ns, size FROM files")
+        return {path: (file_id, mtime_ns, size) for path, file_id, mtime_ns, size in rows}
+
+    def update(
+        self,
+        directory: Optional[str] = None,
+        watch: Optional[Watch] = None
+    ) -> Tuple[List[Tuple[str, str, int]], Dict[str, int]]:
+        """Bring the index up to date with the files on disk.
+
+        Args:
+            directory: Only update this directory inside the root (defaults
+                to the whole root)
+            watch: Dict in which the directories walked and the files
+                found are recorded (see walk_files)
+
+        Returns:
+            Tuple of the directory's files in walk order, as (path, path
+            relative to the directory, file ID) tuples, and counts of added,
+            updated, removed and unchanged files
+        """
+        prefix = self._prefix(directory)
+        known = self._known_files(prefix)
+        started_ns = time.time_ns()
+        walked: List[Tuple[str, str, str]] = []
+        changed: List[Tuple[str, str, os.stat_result]] = []
+        ids: Dict[str, int] = {}
+        stale: List[str] = []
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+
+        for path, rel_path in walk_files(str(self.root / prefix), watch=watch):
+            key = f"{prefix}/{rel_path}" if prefix else rel_path
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if watch is not None:
+                watch[path] = (stat.st_mtime_ns, stat.st_size)
+            walked.append((path, rel_path, key))
+            row = known.pop(key, None)
+            if row and row[1] == stat.st_mtime_ns and row[2] == stat.st_size:
+                ids[key] = row[0]
+                stats["unchanged"] += 1
+            else:
+                changed.append((path, key, stat))
+                stats["updated" if row else "added"] += 1
+                if row:
+                    stale.append(key)
+        stats["removed"] = len(known)
+        stale.extend(known)
+
+        if changed or stale:
+            with self._transaction() as conn:
+                conn.executemany("DELETE FROM files WHERE path = ?", ((key,) for key in stale))
+                pending: Dict[str, List[int]] = {}
+                pending_count = 0
+                for path, key, stat in changed:
+                    mtime_ns = -1 if stat.st_mtime_ns >= started_ns - RACY_NANOSECONDS else stat.st_mtime_ns
+                    file_id = conn.execute(
+                        "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)", (key, mtime_ns, stat.st_size)
+                    ).lastrowid
+                    ids[key] = file_id
+                    content = read_text_file(path)
+                    if content is None:
+                        continue
+                    file_trigrams = trigrams(content)
+                    for trigram in file_trigrams:
+                        pending.setdefault(trigram, []).append(file_id)
+                    pending_count += len(file_trigrams)
+                    if pending_count >= FLUSH_POSTINGS:
+                        self._merge_postings(conn, pending)
+                        pending, pending_count = {}, 0
+                self._merge_postings(conn, pending)
+                self._set_meta(conn, "dead", self._meta("dead", 0) + len(stale))
+                self._set_meta(conn, "updated_at", time.time())
+            self._maybe_compact()
+
+        return [(path, rel_path, ids[key]) for path, rel_path, key in walked], stats
+
+    def _merge_postings(self, conn: sqlite3.Connection, pending: Dict[str, List[int]]):
+        """Append new file IDs to the stored posting lists as a new chunk.
+
+        IDs only grow, so chunks ordered by their first ID concatenate into
+        a sorted posting list and existing chunks never have to be rewritten.
+        """
+        if not pending:
+            return
+        conn.executemany(
+            "INSERT INTO postings (trigram, first_id, ids) VALUES (?, ?, ?)",
+            ((trigram, ids[0], _encode(ids)) for trigram, ids in pending.items())
+        )
+        self._set_meta(conn, "chunks", self._meta("chunks", 0) + 1)
+
+    def _maybe_compact(self):
+        """Merge posting list chunks and drop the IDs of changed and removed files.
+
+        Runs once the dead IDs outnumber the live files or the posting lists
+        have been appended to too many times.
+        """
+        live = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        if self._meta("dead", 0) <= max(live, 1000) and self._meta("chunks", 0) <= MAX_CHUNKS:
+            return
+        with self._transaction() as conn:
+            live_ids = {row[0] for row in conn.execute("SELECT id FROM files")}
+            conn.execute("CREATE TABLE postings_compact AS SELECT * FROM postings WHERE 0")
+            rows = conn.execute("SELECT trigram, ids FROM postings ORDER BY trigram, first_id")
+            for trigram, chunks in groupby(rows, key=lambda row: row[0]):
+                ids = [file_id for _, data in chunks for file_id in _decode(data) if file_id in live_ids]
+                if ids:
+                    conn.execute(
+                        "INSERT INTO postings_compact (trigram, first_id, ids) VALUES (?, ?, ?)",
+                        (trigram, ids[0], _encode(ids))
+                    )
+            conn.execute("DELETE FROM postings")
+            conn.execute("INSERT INTO postings SELECT * FROM postings_compact")
+            conn.execute("DROP TABLE postings_compact")
+            self._set_meta(conn, "dead", 0)
+            self._set_meta(conn, "chunks", 1)
+        self._conn.execute("VACUUM")
+
+    def _posting(self, trigram: str, cache: Dict[str, Set[int]]) -> Set[int]:
+        if trigram not in cache:
+            rows = self._conn.execute("SELECT ids FROM postings WHERE trigram = ?", (trigram,))
+            cache[trigram] = {file_id for (data,) in rows for file_id in _decode(data)}
+        return cache[trigram]
+
+    def _evaluate(self, query: Query, cache: Dict[str, Set[int]]) -> Set[int]:
+        if isinstance(query, str):
+            postings = sorted((self._posting(t, cache) for t in trigrams(query)), key=len)
+            return set.intersection(*postings)
+        op, children = query
+        sets = [self._evaluate(child, cache) for child in children]
+        if op == "and":
+            return set.intersection(*sorted(sets, key=len))
+        return set.union(*sets)
+
+    def candidates(
+        self,
+        directory: str,
+        pattern: str,
+        watch: Optional[Watch] = None
+    ) -> Optional[List[Tuple[str, str]]]:
+        """Update the index and find the files a pattern could match.
+
+        Args:
+            directory: Directory being searched, inside the root
+            pattern: Regular expression
+            watch: Dict in which the directories walked and the files
+                found are recorded (see walk_files)
+
+        Returns:
+            (path, path relative to directory) of the candidate files in walk
+            order, or None if the pattern has no literals to narrow them by
+        """
+        query = pattern_query(pattern)
+        if query is None:
+            return None
+        files, _ = self.update(directory, watch)
+        matching = self._evaluate(query, {})
+        return [(path, rel_path) for path, rel_path, file_id in files if file_id in matching]
+
+    def status(self) -> Dict[str, Any]:
+        """Get index statistics without updating it.
+
+        Returns:
+            Counts of indexed files and trigrams, files changed on disk since
+            the last update, the database size and the last update time
+        """
+        known = self._known_files("")
+        stale = 0
+        for path, rel_path in walk_files(str(self.root)):
+            row = known.pop(rel_path, None)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not row or row[1] != stat.st_mtime_ns or row[2] != stat.st_size:
+                stale += 1
+        updated_at = self._meta("updated_at")
+        return {
+            "root": str(self.root),
+            "files": self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+            "trigrams": self._conn.execute("SELECT COUNT(DISTINCT trigram) FROM postings").fetchone()[0],
+            "stale_files": stale + len(known),
+            "bytes": sum(
+                p.stat().st_size for p in self.index_path.parent.glob(f"{INDEX_FILE}*") if p.is_file()
+            ),
+            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(updated_at)) if updated_at else "never"
+        }
@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+from kazuri.artifacts import BlobStore
+from kazuri.retention import SessionRetention
+from kazuri.session import Session
+
+
+def blob_files(session):
+    return [path for _, path in session.blobs.blobs()]
+
+
+def test_identical_saves_share_one_blob(tmp_path):
+    """Test that saving the same content twice stores it once."""
+    session = Session(session_dir=str(tmp_path / "sessions"))
+    source = tmp_path / "copy.py"
+    source.write_text("print('hello')\n")
+
+    first = session.save_generated_content("print('hello')\n", "module.py")
+    second = session.save_file_copy(str(source))
+    session.save_generated_content("something else", "other.py")
+
+    assert Path(first).read_text() == Path(second).read_text() == "print('hello')\n"
+    assert len(blob_files(session)) == 2
+
+    saved = session.list_saved_files()
+    assert saved[0]["blob"] == saved[1]["blob"]
+    assert saved[0]["size"] == len("print('hello')\n")
+    assert session.blobs.readers(saved[0]["blob"]) == sorted([Path(first).name, Path(second).name])
+
+    # Artifacts stay writable, and editing one leaves the blob and the other copy alone
+    Path(first).write_text("edited\n")
+    assert Path(second).read_text() == "print('hello')\n"
+    assert session.blobs.path_for(saved[0]["blob"]).read_text() == "print('hello')\n"
+
+
+def test_blob_store_put_file_existing_skips_copy(tmp_path, monkeypatch):
+    """Test that storing known content does not copy it again."""
+    store = BlobStore(tmp_path / "blobs")
+    source = tmp_path / "data.bin"
+    source.write_bytes(b"x" * 1000)
+    digest = store.put_file(source)
+    assert store.put_bytes(b"x" * 1000) == digest
+
+    monkeypatch.setattr("kazuri.artifacts.clone_file", lambda *args: (_ for _ in ()).throw(AssertionError("copied")))
+    assert store.put_file(source) == digest
+    assert not os.access(store.path_for(digest), os.W_OK) or os.geteuid() == 0
+
+
+def test_retention_evicts_artifact_with_its_blob(tmp_path):
+    """Test that evicting the last name of a blob frees the blob too."""
+    session = Session(session_dir=str(tmp_path))
+    old = Path(session.save_generated_content("a" * 1000, "old.txt"))
+    Path(session.save_generated_content("b" * 1000, "new.txt"))
+    then = os.stat(old).st_mtime - 100
+    os.utime(old, (then, then))
+
+    report = SessionRetention(str(tmp_path), artifacts_max_bytes=2500).collect()
+
+    # The artifact and its blob, which has no other reader
+    assert report["evicted_artifacts"] == 1 and report["bytes_reclaimed"] == 2000
+    assert not old.exists()
+    assert len(blob_files(session)) == 1
+
+
+def test_retention_keeps_blobs_with_a_reader(tmp_path):
+    """Test only blobs whose artifacts are all gone are deleted."""
+    session = Session(session_dir=str(tmp_path))
+    kept = Path(session.save_generated_content("a" * 100, "kept.txt"))
+    removed = Path(session.save_generated_content("b" * 100, "removed.txt"))
+    removed.unlink()
+
+    report = SessionRetention(str(tmp_path)).collect()
+
+    assert report["evicted_artifacts"] == 0 and report["bytes_reclaimed"] == 100
+    digest = session.get_saved_file(kept.name)["blob"]
+    assert [path.name for path in blob_files(session)] == [digest]
+    assert session.blobs.readers(digest) == [kept.name]
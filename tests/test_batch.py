@@ -0,0 +1,103 @@
+import io
+import json
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+from typer.testing import CliRunner
+from kazuri.cli import app
+from kazuri.batch import read_tasks, run_batch
+from kazuri.bedrock import reset_bedrock_clients
+from kazuri.session import Session
+
+runner = CliRunner()
+
+
+class StubBedrock:
+    """Local stand-in for the Bedrock runtime client."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def invoke_model(self, modelId, body):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+
+        prompt = json.loads(body)["messages"][-1]["content"][0]["text"]
+        task = prompt.split("\n")[0]
+        payload = {
+            "content": [{"text": f"Done: {task}"}],
+            "usage": {"input_tokens": len(prompt), "output_tokens": 3}
+        }
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+
+def test_read_tasks():
+    """Test reading objects, bare strings and invalid lines."""
+    tasks = list(read_tasks(['{"id": "a", "task": "one"}', '', '"two"', 'not json', '{"x": 1}']))
+    assert [t["id"] for t in tasks] == ["a", "3", "4", "5"]
+    assert tasks[1]["task"] == "two"
+    assert "error" in tasks[2] and "error" in tasks[3]
+
+
+def test_run_batch_bounded_concurrency(tmp_path, monkeypatch):
+    """Test tasks run concurrently, capped, each in its own session."""
+    monkeypatch.setenv("KAZURI_REPO_MAP_TOKENS", "0")
+    stub = StubBedrock()
+    tasks = [{"id": str(i), "task": f"task {i}"} for i in range(8)]
+    results = []
+
+    summary = run_batch(stub, iter(tasks), results.append, concurrency=3, session_dir=str(tmp_path))
+
+    assert summary["succeeded"] == 8 and summary["failed"] == 0
+    assert 1 < stub.max_active <= 3
+    by_id = {r["id"]: r for r in results}
+    assert by_id["5"]["completion"] == "Done: task 5"
+    assert by_id["5"]["usage"]["output_tokens"] == 3
+    assert by_id["5"]["latency_ms"] > 0
+    assert len({r["session_file"] for r in results}) == 8
+
+    # Histories stay separate per task
+    session = Session(session_dir=str(tmp_path), session_name="3-2")
+    assert [h["task"] for h in session.history] == ["task 2"]
+    session.close()
+
+
+def test_run_batch_colliding_ids_get_separate_sessions(tmp_path, monkeypatch):
+    """Test repeated IDs, and IDs that clash once made file-safe, do not share a session."""
+    monkeypatch.setenv("KAZURI_REPO_MAP_TOKENS", "0")
+    lines = ['{"id": "2", "task": "one"}', '"two"', '{"id": "2", "task": "three"}',
+             '{"id": "a/b", "task": "four"}', '{"id": "a_b", "task": "five"}']
+    results = []
+
+    summary = run_batch(StubBedrock(delay=0), read_tasks(lines), results.append, session_dir=str(tmp_path))
+
+    assert summary["succeeded"] == 5
+    assert len({r["session_file"] for r in results}) == 5
+    for result in results:
+        name = Path(result["session_file"]).stem[len("session_"):]
+        session = Session(session_dir=str(tmp_path), session_name=name)
+        assert len(session.history) == 1
+        session.close()
+
+
+def test_batch_command_streams_ndjson(tmp_path, monkeypatch):
+    """Test the batch command against a stubbed client."""
+    monkeypatch.setenv("AWS_REGION", "eu-west-1")
+    monkeypatch.setenv("KAZURI_REPO_MAP_TOKENS", "0")
+    reset_bedrock_clients()
+    stdin = '{"id": "x", "task": "hello"}\n"world"\nbroken\n'
+    with patch('boto3.client', return_value=StubBedrock(delay=0)):
+        result = runner.invoke(app, ["batch", "-", "--session-dir", str(tmp_path)], input=stdin)
+    reset_bedrock_clients()
+
+    assert result.exit_code == 0
+    lines = [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+    assert {r["id"]: r["success"] for r in lines} == {"x": True, "2": True, "3": False}
@@ -0,0 +1,86 @@
+import os
+import time
+from kazuri.cache import ResponseCache, referenced_files, get_response_cache
+from kazuri.batch import run_batch
+
+BODY = {"messages": [{"role": "user", "content": "explain app.py"}]}
+RESPONSE = {"content": [{"text": "It prints hello"}]}
+
+
+def test_cache_hit_and_miss(tmp_path):
+    """Test storing and retrieving a response with hit/miss stats."""
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    key = cache.make_key("model", BODY)
+    assert cache.get(key) is None
+    cache.put(key, RESPONSE)
+    assert cache.get(key) == RESPONSE
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert cache.make_key("other-model", BODY) != key
+
+
+def test_cache_key_tracks_referenced_files(tmp_path):
+    """Test that editing a referenced file changes the key."""
+    source = tmp_path / "app.py"
+    source.write_text("print('hello')")
+    files = referenced_files("explain app.py and missing.py", root=str(tmp_path))
+    assert files == [source.resolve()]
+
+    cache = ResponseCache(cache_dir=str(tmp_path / "cache"))
+    before = cache.make_key("model", BODY, files)
+    source.write_text("print('bye')")
+    assert cache.make_key("model", BODY, files) != before
+
+
+def test_cache_ttl_and_lru_eviction(tmp_path):
+    """Test expiry and least-recently-used eviction under the size limit."""
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=60)
+    cache.put("aa1", RESPONSE)
+    entry = cache._entry_path("aa1")
+    size = entry.stat().st_size
+
+    cache = ResponseCache(cache_dir=str(tmp_path), max_bytes=size * 2 + size // 2, ttl=60)
+    cache.put("bb2", RESPONSE)
+    old = time.time() - 30
+    os.utime(cache._entry_path("bb2"), (old, old))
+    assert cache.get("aa1") == RESPONSE  # refreshes aa1
+    cache.put("cc3", RESPONSE)
+    assert cache.get("bb2") is None
+    assert cache.get("aa1") == RESPONSE
+    assert cache.stats()["evictions"] == 1
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get("aa1") is None
+    assert not entry.exists()
+
+
+def test_cache_is_opt_in(monkeypatch):
+    """Test the cache is only enabled explicitly."""
+    monkeypatch.delenv("KAZURI_CACHE", raising=False)
+    assert get_response_cache() is None
+    monkeypatch.setenv("KAZURI_CACHE", "1")
+    assert get_response_cache() is not None
+    assert get_response_cache(False) is None
+
+
+def test_batch_rerun_served_from_cache(tmp_path, monkeypatch):
+    """Test that re-running a batch answers every task from the cache."""
+    monkeypatch.setenv("KAZURI_REPO_MAP_TOKENS", "0")
+    from test_batch import StubBedrock
+
+    cache = ResponseCache(cache_dir=str(tmp_path / "cache"))
+    tasks = [{"id": str(i), "task": f"task {i}"} for i in range(4)]
+
+    first = run_batch(StubBedrock(delay=0), iter(tasks), lambda r: None,
+                      session_dir=str(tmp_path / "run1"), cache=cache)
+    stub = StubBedrock(delay=0)
+    stub.invoke_model = None  # any call would fail
+    results = []
+    second = run_batch(stub, iter(tasks), results.append,
+                       session_dir=str(tmp_path / "run2"), cache=cache)
+
+    assert first["cache_hits"] == 0
+    assert second["cache_hits"] == 4 and second["succeeded"] == 4
+    assert all(r["cached"] for r in results)
@@ -0,0 +1,50 @@
+from kazuri.context import ContextBuilder, estimate_tokens, truncate_text
+
+
+def make_history(count, result_size=100):
+    return [{
+        "timestamp": f"2024-01-01T00:00:{i:02d}",
+        "task": f"Task {i}",
+        "response": f"Response {i}\nmore detail",
+        "tool_uses": [{"tool": "read_file", "parameters": {}, "result": "x" * result_size}]
+    } for i in range(count)]
+
+
+def test_truncate_text():
+    """Test truncating text to a token budget."""
+    assert truncate_text("short", 10) == "short"
+    truncated = truncate_text("y" * 1000, 10)
+    assert truncated.startswith("y" * 40)
+    assert truncated.endswith("[truncated 960 characters]")
+
+
+def test_oversized_tool_results_are_truncated():
+    """Test that a huge tool result does not blow up the context."""
+    builder = ContextBuilder(max_tool_result_tokens=50)
+    summary, messages = builder.build(make_history(1, result_size=1_000_000))
+    assert summary == ""
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+    assert estimate_tokens(messages[1]["content"]) < 100
+
+
+def test_budget_compacts_older_turns():
+    """Test older turns become summaries once the budget is used up."""
+    builder = ContextBuilder(budget_tokens=150, max_turns=5, max_tool_result_tokens=25)
+    summary, messages = builder.build(make_history(40))
+
+    total = sum(estimate_tokens(m["content"]) for m in messages) + estimate_tokens(summary)
+    assert total <= 150
+    assert messages[-2]["content"] == "Task 39"
+    assert len(messages) < 10
+    assert "- Task" in summary and "[tools: read_file]" in summary
+    assert "Task 0 " not in summary
+
+
+def test_summaries_are_cached():
+    """Test each compacted turn is only summarized once."""
+    builder = ContextBuilder(budget_tokens=200, max_turns=1)
+    history = make_history(10)
+    builder.build(history)
+    cached = dict(builder._summaries)
+    builder.build(history + make_history(1))
+    assert all(builder._summaries[key] is value for key, value in cached.items())
@@ -1,14 +1,28 @@
 import pytest
 import os
 import json
+import time
 from pathlib import Path
 from typer.testing import CliRunner
 from kazuri.cli import app
 from kazuri.session import Session
+from kazuri.bedrock import TokenBucket, reset_bedrock_clients
 from unittest.mock import patch, MagicMock
 
 runner = CliRunner()
 
+@pytest.fixture(autouse=True)
+def fresh_bedrock_clients():
+    """Fixture to stop mocked clients being shared between tests."""
+    reset_bedrock_clients()
+    yield
+    reset_bedrock_clients()
+
+@pytest.fixture(autouse=True)
+def no_repo_map(monkeypatch):
+    """Fixture to keep prompts from mapping the repository under test."""
+    monkeypatch.setenv("KAZURI_REPO_MAP_TOKENS", "0")
+
 @pytest.fixture
 def temp_session_dir(tmp_path):
     """Fixture to provide temporary session directory."""
@@ -19,6 +33,19 @@ def session(temp_session_dir):
     """Fixture to provide a test session instance."""
     return Session(session_dir=temp_session_dir)
 
+def test_import_is_side_effect_free(tmp_path):
+    """Test that importing the CLI loads no heavy modules and creates no files."""
+    import subprocess
+    import sys
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parent.parent))
+    code = "import sys, kazuri.cli; print('boto3' in sys.modules, 'dotenv' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=tmp_path, env=env,
+        capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False False"
+    assert list(tmp_path.iterdir()) == []
+
 def test_version():
     """Test version command."""
     result = runner.invoke(app, ["version"])
@@ -43,6 +70,107 @@ def test_ask_command(mock_boto3):
     assert result.exit_code == 0
     assert "Kazuri's Response" in result.stdout
 
+def _stream_events(*texts):
+    """Build a fake Bedrock response stream yielding the given text deltas."""
+    events = [{"chunk": {"bytes": json.dumps({"type": "message_start"}).encode()}}]
+    for text in texts:
+        events.append({"chunk": {"bytes": json.dumps({
+            "type": "content_block_delta",
+            "delta": {"type": "text_delta", "text": text}
+        }).encode()}})
+    events.append({"chunk": {"bytes": json.dumps({"type": "message_stop"}).encode()}})
+    return events
+
+@patch('boto3.client')
+def test_ask_command_stream(mock_boto3, mock_env):
+    """Test ask command streaming the response."""
+    mock_boto3.return_value.invoke_model_with_response_stream.return_value = {
+        'body': iter(_stream_events("Here is ", "a streamed ", "example"))
+    }
+
+    result = runner.invoke(app, ["ask", "--stream", "Create a simple function"])
+    assert result.exit_code == 0
+    assert "Kazuri's Response" in result.stdout
+    assert "Here is a streamed example" in result.stdout
+    assert "Time to first token" in result.stdout
+    mock_boto3.return_value.invoke_model.assert_not_called()
+
+@patch('boto3.client')
+def test_shell_reuses_client(mock_boto3, mock_env):
+    """Test that the interactive shell builds one client for all turns."""
+    mock_boto3.return_value.invoke_model.side_effect = lambda **kwargs: {
+        'body': MagicMock(read=MagicMock(return_value='{"content": [{"text": "Done"}]}'))
+    }
+
+    result = runner.invoke(app, ["shell"], input="First task\n\nSecond task\nexit\n")
+    assert result.exit_code == 0
+    assert mock_boto3.call_count == 1
+    assert mock_boto3.return_value.invoke_model.call_count == 2
+    assert result.stdout.count("Kazuri's Response") == 2
+
+@patch('boto3.client')
+def test_bedrock_client_config(mock_boto3, mock_env, monkeypatch):
+    """Test the shared client is built once with tuned botocore settings."""
+    from kazuri.bedrock import get_bedrock_client
+    from kazuri.cli import get_aws_config
+    monkeypatch.setenv("KAZURI_BEDROCK_READ_TIMEOUT", "30")
+    monkeypatch.setenv("KAZURI_BEDROCK_MAX_POOL_CONNECTIONS", "25")
+
+    client = get_bedrock_client(get_aws_config())
+    assert get_bedrock_client(get_aws_config()) is client
+    assert mock_boto3.call_count == 1
+
+    config = mock_boto3.call_args.kwargs["config"]
+    assert config.read_timeout == 30
+    assert config.max_pool_connections == 25
+    assert config.retries["mode"] == "adaptive"
+    assert client.limiter is None
+
+def test_token_bucket():
+    """Test the token bucket paces requests to its rate."""
+    now = [0.0]
+    sleeps = []
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert sleeps == [pytest.approx(0.5)]
+
+def test_iter_stream_text():
+    """Test extracting text deltas and usage from a response stream."""
+    from kazuri.cli import iter_stream_text
+    events = _stream_events("a", "b") + [{"internalServerException": {}}]
+    events[0] = {"chunk": {"bytes": json.dumps({
+        "type": "message_start",
+        "message": {"usage": {"input_tokens": 10, "cache_read_input_tokens": 900}}
+    }).encode()}}
+    usage = {}
+    assert list(iter_stream_text(events, usage)) == ["a", "b"]
+    assert usage == {"input_tokens": 10, "cache_read_input_tokens": 900}
+
+def test_build_task_request_separates_static_prefix(session, monkeypatch):
+    """Test the request puts the system prompt and history before the task."""
+    from kazuri.cli import build_task_request, load_system_prompt
+    monkeypatch.setenv("KAZURI_PROMPT_CACHING", "1")
+    session.add_interaction("First task", "First response", [{"tool": "read_file", "result": "ok"}])
+
+    body = build_task_request("Second task", "env details", session)
+    assert body["system"][0]["text"] == load_system_prompt()
+    assert body["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert [m["role"] for m in body["messages"]] == ["user", "assistant", "user"]
+    assert body["messages"][0]["content"][0]["text"] == "First task"
+    assert "- read_file: ok" in body["messages"][1]["content"][0]["text"]
+    assert all("cache_control" not in m["content"][0] for m in body["messages"])
+    assert body["messages"][2]["content"][0]["text"].startswith("Second task")
+
+    monkeypatch.setenv("KAZURI_PROMPT_CACHING", "0")
+    body = build_task_request("Second task", None, session)
+    assert "cache_control" not in body["system"][0]
+
 @patch('kazuri.tools.ToolManager')
 def test_tool_execution(mock_tool_manager):
     """Test tool execution with mocked tool manager."""
@@ -194,3 +322,182 @@ def test_list_saved_files_filtering(session):
     
     all_files = session.list_saved_files()
     assert len(all_files) == 2
+
+def test_session_log_is_append_only(session):
+    """Test that each interaction appends one record instead of rewriting."""
+    session.add_interaction("Task 1", "Response 1")
+    size = session.current_session.stat().st_size
+    with open(session.current_session) as f:
+        first_line = f.readline()
+
+    session.add_interaction("Task 2", "Response 2")
+    with open(session.current_session) as f:
+        lines = f.readlines()
+    assert lines[0] == first_line
+    assert len(lines) == 3  # snapshot + two interactions
+    assert session.current_session.stat().st_size - size == len(lines[-1])
+
+def test_session_log_recovers_torn_tail(temp_session_dir):
+    """Test that a partially written last record is dropped on load."""
+    session1 = Session(session_dir=temp_session_dir)
+    session1.add_interaction("Task 1", "Response 1")
+    with open(session1.current_session, 'a') as f:
+        f.write('{"op": "interaction", "data": {"task": "Tas')
+
+    size = session1.current_session.stat().st_size
+
+    # Loading only ignores the tail, which may be another process's append
+    session2 = Session(session_dir=temp_session_dir)
+    assert [h["task"] for h in session2.history] == ["Task 1"]
+    assert session1.current_session.stat().st_size == size
+    # The next writer cuts it off
+    session2.add_interaction("Task 2", "Response 2")
+    assert len(Session(session_dir=temp_session_dir).history) == 2
+
+def test_session_log_finishes_record_missing_its_newline(temp_session_dir):
+    """Test that a complete last record without a newline is kept."""
+    session1 = Session(session_dir=temp_session_dir)
+    session1.add_interaction("Task 1", "Response 1")
+    with open(session1.current_session, 'rb+') as f:
+        f.truncate(session1.current_session.stat().st_size - 1)
+
+    session2 = Session(session_dir=temp_session_dir)
+    assert [h["task"] for h in session2.history] == ["Task 1"]
+    session2.add_interaction("Task 2", "Response 2")
+    assert [h["task"] for h in Session(session_dir=temp_session_dir).history] == ["Task 1", "Task 2"]
+
+def test_session_log_compaction(session, monkeypatch):
+    """Test that the log is compacted into a snapshot periodically."""
+    monkeypatch.setattr("kazuri.session.COMPACT_AFTER_RECORDS", 3)
+    for i in range(5):
+        session.add_interaction(f"Task {i}", f"Response {i}")
+    with open(session.current_session) as f:
+        lines = f.readlines()
+    # Snapshot header, the four compacted interactions, then one appended
+    assert len(lines) == 6
+    assert json.loads(lines[0]) == {"op": "snapshot", "saved_files": {}, "count": 4}
+    assert [json.loads(line)["data"]["task"] for line in lines[1:]] == [f"Task {i}" for i in range(5)]
+    assert Session(session_dir=session.session_dir)._records_since_snapshot == 1
+
+def test_legacy_json_session_is_migrated(temp_session_dir):
+    """Test that sessions in the old JSON formats still load."""
+    os.makedirs(temp_session_dir)
+    legacy = Path(temp_session_dir) / "session_20240101_000000.json"
+    legacy.write_text(json.dumps({
+        "history": [{"task": "Old task", "response": "Old response", "tool_uses": []}],
+        "saved_files": {"a.py": {"type": "code"}}
+    }, indent=2))
+
+    session = Session(session_dir=temp_session_dir)
+    assert session.history[0]["task"] == "Old task"
+    assert session.saved_files == {"a.py": {"type": "code"}}
+    assert session.current_session.suffix == ".jsonl"
+    assert not legacy.exists()
+
+    session.add_interaction("New task", "New response")
+    assert len(Session(session_dir=temp_session_dir).history) == 2
+
+def test_latest_session_pointer_avoids_scan(temp_session_dir, monkeypatch):
+    """Test the most recent session is found without scanning the directory."""
+    session1 = Session(session_dir=temp_session_dir)
+    session1.add_interaction("Task 1", "Response 1")
+    for i in range(20):
+        Path(temp_session_dir, f"session_2020010{i % 9}_{i:06d}.jsonl").write_text("")
+
+    monkeypatch.setattr(Session, "_scan_latest_session", lambda self: pytest.fail("scanned sessions"))
+    session2 = Session(session_dir=temp_session_dir)
+    assert session2.current_session == session1.current_session
+    assert len(session2.history) == 1
+
+def test_latest_session_pointer_rollover_and_rebuild(temp_session_dir):
+    """Test the one-hour rollover and recovery from a stale pointer."""
+    session1 = Session(session_dir=temp_session_dir)
+    old = time.time() - 7200
+    os.utime(session1.current_session, (old, old))
+    time.sleep(1)  # new sessions are named by timestamp
+    session2 = Session(session_dir=temp_session_dir)
+    assert session2.current_session != session1.current_session
+
+    session2.add_interaction("Task", "Response")
+    (Path(temp_session_dir) / "latest_session").write_text("session_missing.jsonl\n")
+    session3 = Session(session_dir=temp_session_dir)
+    assert session3.current_session == session2.current_session
+    assert (Path(temp_session_dir) / "latest_session").read_text().strip() == session2.current_session.name
+
+def test_session_history_loads_lazily(temp_session_dir, monkeypatch):
+    """Test that loading a session and its info do not parse the history."""
+    session1 = Session(session_dir=temp_session_dir)
+    for i in range(10):
+        session1.add_interaction(f"Task {i}", "x" * 10000)
+
+    session2 = Session(session_dir=temp_session_dir)
+    monkeypatch.setattr("kazuri.session.SessionHistory._parse", lambda *args: pytest.fail("parsed"))
+    info = session2.get_session_info()
+    assert info["interaction_count"] == 10
+    assert info["start_time"] == session1.history[0]["timestamp"]
+    assert info["last_interaction"] == session1.history[-1]["timestamp"]
+    monkeypatch.undo()
+
+    assert session2.history[-1]["task"] == "Task 9"
+    assert [h["task"] for h in session2.iter_history(-3)] == ["Task 7", "Task 8", "Task 9"]
+    assert [h["task"] for h in session2.history[2:4]] == ["Task 2", "Task 3"]
+    assert len(session2.history._cache) == 1
+
+def test_session_export_streams_and_imports(session, tmp_path):
+    """Test the line-per-interaction export format and importing older exports."""
+    for i in range(3):
+        session.add_interaction(f"Task {i}", f"Response {i}")
+    export_file = tmp_path / "export.json"
+    session.export_session(str(export_file))
+
+    lines = export_file.read_text().splitlines()
+    assert len(lines) == 5
+    assert json.loads(export_file.read_text())["history"][2]["task"] == "Task 2"
+
+    other = Session(session_dir=str(tmp_path / "other"))
+    other.import_session(str(export_file))
+    assert [h["task"] for h in other.history] == ["Task 0", "Task 1", "Task 2"]
+
+    legacy_export = tmp_path / "legacy.json"
+    legacy_export.write_text(json.dumps({"history": [{"task": "Old", "response": "R"}]}, indent=2))
+    other.import_session(str(legacy_export))
+    assert [h["task"] for h in other.history] == ["Old"]
+
+    export_file.write_text("\n".join(lines[:3]))
+    with pytest.raises(ValueError):
+        other.import_session(str(export_file))
+    assert [h["task"] for h in other.history] == ["Old"]
+
+def test_write_behind_coalesces_records(temp_session_dir, monkeypatch):
+    """Test buffered records are written together at the threshold."""
+    monkeypatch.setenv("KAZURI_SESSION_FLUSH_RECORDS", "3")
+    monkeypatch.setenv("KAZURI_SESSION_FLUSH_INTERVAL", "60")
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr("kazuri.session.os.fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    session = Session(session_dir=temp_session_dir, write_behind=True)
+    fsyncs.clear()
+
+    session.add_interaction("Task 1", "Response 1")
+    session.save_generated_content("x = 1", "x.py")
+    assert len(Session(session_dir=temp_session_dir).history) == 0
+
+    session.add_interaction("Task 2", "Response 2")
+    assert len(fsyncs) == 1
+    reloaded = Session(session_dir=temp_session_dir)
+    assert [h["task"] for h in reloaded.history] == ["Task 1", "Task 2"]
+    assert len(reloaded.saved_files) == 1
+
+def test_write_behind_flushes_on_timer_and_exit(temp_session_dir, monkeypatch):
+    """Test buffered records are flushed by the timer and at exit."""
+    from kazuri.session import _flush_write_behind_sessions
+    monkeypatch.setenv("KAZURI_SESSION_FLUSH_INTERVAL", "0.05")
+    session = Session(session_dir=temp_session_dir, write_behind=True)
+    session.add_interaction("Task 1", "Response 1")
+    time.sleep(0.3)
+    assert len(Session(session_dir=temp_session_dir).history) == 1
+
+    session.flush_interval = 60
+    session.add_interaction("Task 2", "Response 2")
+    _flush_write_behind_sessions()
+    assert len(Session(session_dir=temp_session_dir).history) == 2
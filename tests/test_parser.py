@@ -0,0 +1,58 @@
+from kazuri.parser import ToolCallParser, parse_tool_calls
+
+
+def test_parse_tool_name_format():
+    """Test parsing the <tool_name> form with parameters."""
+    response = (
+        "Let me look.\n<tool_name>read_file</tool_name>\n<path> app.py </path>\n"
+    )
+    assert parse_tool_calls(response) == [
+        {"tool": "read_file", "parameters": {"path": "app.py"}}
+    ]
+
+
+def test_parse_multiple_tool_calls():
+    """Test that every tool call in a response is returned in order."""
+    response = (
+        "<write_to_file><path>index.html</path>"
+        "<content><html><body></body></html></content></write_to_file>\n"
+        "Now read it back:\n"
+        "<tool_name>read_file</tool_name><path>index.html</path>\n"
+        "<tool_name>list_files</tool_name><path>.</path>"
+    )
+    calls = parse_tool_calls(response)
+    assert [c["tool"] for c in calls] == ["write_to_file", "read_file", "list_files"]
+    assert calls[0]["parameters"]["content"] == "<html><body></body></html>"
+
+
+def test_parse_write_file_alternative_format():
+    """Test the <write_file> filename: form."""
+    response = "<write_file> filename: hello.py\nprint('hi')\n\nprint('bye')\n</write_file>\nDone."
+    assert parse_tool_calls(response) == [{
+        "tool": "write_to_file",
+        "parameters": {"path": "hello.py", "content": "print('hi')\nprint('bye')"}
+    }]
+
+
+def test_streaming_emits_calls_as_they_close():
+    """Test feeding a response one character at a time."""
+    response = (
+        "<read_file><path>a.py</path></read_file> and then "
+        "<tool_name>search_files</tool_name><path>.</path><regex>def \\w+</regex>\nDone"
+    )
+    parser = ToolCallParser()
+    emitted_at = []
+    for i, char in enumerate(response):
+        for call in parser.feed(char):
+            emitted_at.append((i, call["tool"]))
+    assert parser.close() == []
+
+    assert emitted_at[0] == (response.index("</read_file>") + len("</read_file>") - 1, "read_file")
+    assert emitted_at[1] == (response.index("Done"), "search_files")
+
+
+def test_unterminated_parameter_is_dropped():
+    """Test closing the parser mid-parameter."""
+    parser = ToolCallParser()
+    assert parser.feed("<tool_name>write_to_file</tool_name><path>x.py</path><content>print(") == []
+    assert parser.close() == [{"tool": "write_to_file", "parameters": {"path": "x.py"}}]
@@ -0,0 +1,95 @@
+import pytest
+
+from kazuri import reader
+from kazuri.reader import iter_chunks, read_range
+from kazuri.tools import ToolManager
+
+LINES = "".join(f"line {i}\n" for i in range(1, 101))
+
+
+def test_line_ranges_across_index_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(reader, "CHUNK_BYTES", 16)
+    reader._newline_counts.cache_clear()
+    path = tmp_path / "f.txt"
+    path.write_text(LINES + "no newline")
+
+    result = read_range(str(path), start_line=50, end_line=52)
+    assert result["content"] == "line 50\nline 51\nline 52\n"
+    assert (result["start_line"], result["end_line"], result["total_lines"]) == (50, 52, 101)
+    assert read_range(str(path), start_line=101)["content"] == "no newline"
+    assert read_range(str(path), start_line=200)["content"] == ""
+    reader._newline_counts.cache_clear()
+
+
+def test_head_tail_and_bytes(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_bytes(b"\xef\xbb\xbf" + LINES.encode())
+
+    assert read_range(str(path), head=2)["content"] == "line 1\nline 2\n"
+    assert read_range(str(path), tail=2)["content"] == "line 99\nline 100\n"
+    assert read_range(str(path), byte_start=3, byte_end=9)["content"] == "line 1"
+    with pytest.raises(ValueError):
+        read_range(str(path), head=1, tail=1)
+
+
+def test_truncation_hints_continue_where_it_stopped(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text(LINES)
+
+    content = []
+    start_line = 1
+    while True:
+        result = read_range(str(path), start_line=start_line, max_bytes=100)
+        content.append(result["content"])
+        assert len(result["content"]) <= 100 and result["content"].endswith("\n")
+        if not result["truncated"]:
+            break
+        start_line = result["next_start_line"]
+    assert "".join(content) == LINES
+
+    result = read_range(str(path), byte_start=0, max_bytes=10)
+    assert (result["content"], result["next_byte_start"]) == ("line 1\nlin", 10)
+    result = read_range(str(path), tail=50, max_bytes=20)
+    assert result["truncated"] and result["content"] == "line 99\nline 100\n"
+
+
+def test_head_and_tail_scan_stops_past_max_bytes(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text(LINES)
+
+    with reader.TextFile(str(path)) as text:
+        assert text.head_offset(100, max_bytes=20) == 21
+        assert text.tail_offset(100, max_bytes=20) == text.size - 21
+        assert text.head_offset(2, max_bytes=20) == 14
+        assert text.tail_offset(100) == 0
+
+    result = read_range(str(path), head=100, max_bytes=20)
+    assert result["content"] == "line 1\nline 2\n" and result["next_start_line"] == 3
+    result = read_range(str(path), tail=100, max_bytes=20)
+    assert result["truncated"] and result["content"] == "line 99\nline 100\n"
+
+
+def test_binary_files_and_chunks(tmp_path):
+    binary = tmp_path / "b.bin"
+    binary.write_bytes(b"\x89PNG\0\0data")
+    result = read_range(str(binary))
+    assert not result["success"] and result["binary"] and result["content"] is None
+
+    text = tmp_path / "u.txt"
+    text.write_text("héllo wörld\n" * 100, encoding="utf-8")
+    chunks = list(iter_chunks(str(text), chunk_bytes=7))
+    assert "".join(chunks) == "héllo wörld\n" * 100
+    assert all("�" not in chunk for chunk in chunks)
+
+
+def test_read_file_tool_ranges(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("KAZURI_READ_MAX_BYTES", "50")
+    (tmp_path / "f.txt").write_text(LINES)
+    manager = ToolManager()
+
+    result = manager.read_file("f.txt")
+    assert result["truncated"] and result["next_start_line"] == 8
+    result = manager.execute_tool("read_file", {"path": "f.txt", "start_line": "8", "end_line": "9"})
+    assert result["content"] == "line 8\nline 9\n"
+    assert manager.read_file("f.txt", max_bytes=0)["content"] == LINES
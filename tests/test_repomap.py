@@ -0,0 +1,110 @@
+import os
+import pytest
+from kazuri.cli import get_environment_details
+from kazuri.context import estimate_tokens
+from kazuri.repomap import RepoMap, default_cache_dir, get_repo_map
+from kazuri.session import Session
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Create a repository where Engine is used by every other file."""
+    root = tmp_path / "repo"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "core.py").write_text(
+        "class Engine:\n    def start(self):\n        pass\n\n    def __repr__(self):\n        return ''\n"
+    )
+    (root / "pkg" / "util.py").write_text("def helper():\n    pass\n\ndef _private():\n    pass\n")
+    for name in ("a", "b", "c"):
+        (root / f"{name}.py").write_text(f"from pkg.core import Engine\n\ndef run_{name}():\n    Engine().start()\n")
+    for path in root.rglob("*.py"):
+        os.utime(path, (1_000_000, 1_000_000))
+    return root
+
+
+def test_rank_by_references(repo, tmp_path):
+    """Test files and symbols rank by uses in other files."""
+    ranked = RepoMap(str(repo), cache_dir=str(tmp_path / "cache")).rank()
+    assert ranked[0][0] == "pkg/core.py"
+    assert [(s["name"], s["refs"]) for s in ranked[0][2]] == [("Engine", 3), ("Engine.start", 3)]
+    assert [path for path, _, _ in ranked] == ["pkg/core.py", "pkg/util.py", "a.py", "b.py", "c.py"]
+    # Private names rank below public ones
+    assert [s["name"] for s in ranked[1][2]] == ["helper", "_private"]
+
+
+def test_recency_boost(repo, tmp_path):
+    """Test a recently modified file outranks an otherwise equal one."""
+    os.utime(repo / "c.py", (1_000_000 + 86400, 1_000_000 + 86400))
+    ranked = RepoMap(str(repo), cache_dir=str(tmp_path / "cache")).rank()
+    assert [path for path, _, _ in ranked[2:]] == ["c.py", "a.py", "b.py"]
+
+
+def test_render_budget_and_cache(repo, tmp_path, monkeypatch):
+    """Test the token budget and that the map is only re-ranked after a change."""
+    repo_map = RepoMap(str(repo), max_tokens=20, cache_dir=str(tmp_path / "cache"))
+    outline = repo_map.render()
+    assert outline.startswith("pkg/core.py:\n  1: class Engine\n  2: method Engine.start")
+    assert estimate_tokens(outline) <= 20
+    assert "util.py" not in outline
+
+    def fail(*args):
+        raise AssertionError("re-ranked an unchanged repository")
+    monkeypatch.setattr(RepoMap, "rank", fail)
+    assert repo_map.render() == outline
+
+    monkeypatch.undo()
+    (repo / "pkg" / "core.py").write_text("class Motor:\n    pass\n")
+    assert "class Motor" in repo_map.render()
+
+
+def test_environment_details_include_repo_map(repo, tmp_path, monkeypatch):
+    """Test the prompt's environment section carries the map."""
+    monkeypatch.chdir(repo)
+    monkeypatch.setenv("KAZURI_REPO_MAP_CACHE_DIR", str(tmp_path / "cache"))
+    details = get_environment_details(Session(session_dir=str(tmp_path / "sessions")))
+    assert "# Repository Map\npkg/core.py:\n  1: class Engine" in details
+    assert "VSCode" not in details
+    assert not (repo / ".kazuri_cache").exists()
+    assert get_repo_map() is get_repo_map()
+
+    monkeypatch.setenv("KAZURI_REPO_MAP_TOKENS", "0")
+    assert "# Repository Map" not in get_environment_details(Session(session_dir=str(tmp_path / "sessions")))
+
+
+def test_cache_stays_out_of_the_repository(repo, tmp_path, monkeypatch):
+    """Test the default cache lives in the user cache directory."""
+    monkeypatch.delenv("KAZURI_REPO_MAP_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    repo_map = RepoMap(str(repo))
+    assert repo_map.cache_dir == default_cache_dir(repo.resolve())
+    assert repo_map.cache_dir.parent == tmp_path / "xdg" / "kazuri" / "repomap"
+
+    assert "class Engine" in repo_map.outline()
+    assert (repo_map.cache_dir / "repomap.json").is_file()
+    assert not (repo / ".kazuri_cache").exists()
+
+
+def test_outline_rewalks_only_after_a_change(repo, tmp_path, monkeypatch):
+    """Test the in-memory map is reused until something it read changes."""
+    for directory in (repo, repo / "pkg"):
+        os.utime(directory, (1_000_000, 1_000_000))
+    repo_map = RepoMap(str(repo), cache_dir=str(tmp_path / "cache"))
+    outline = repo_map.outline()
+
+    def fail(*args):
+        raise AssertionError("walked an unchanged repository")
+    monkeypatch.setattr(RepoMap, "_source_files", fail)
+    assert repo_map.outline() == outline
+
+    monkeypatch.undo()
+    (repo / "pkg" / "core.py").write_text("class Motor:\n    pass\n")
+    assert "class Motor" in repo_map.outline()
+    (repo / "d.py").write_text("class Gearbox:\n    pass\n")
+    assert "class Gearbox" in repo_map.outline()
+
+
+def test_walk_is_capped(repo, tmp_path, monkeypatch):
+    """Test only the first files of a huge tree are walked."""
+    monkeypatch.setattr("kazuri.repomap.MAX_WALK_FILES", 3)
+    files = RepoMap(str(repo), cache_dir=str(tmp_path / "cache"))._source_files()
+    assert [rel_path for _, rel_path, _ in files] == ["a.py", "b.py", "c.py"]
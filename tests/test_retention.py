@@ -0,0 +1,118 @@
+import os
+import time
+from typer.testing import CliRunner
+from kazuri.cli import app
+from kazuri.retention import SessionRetention
+from kazuri.session import Session
+
+runner = CliRunner()
+
+
+def age(path, seconds):
+    """Backdate a file's modification time."""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_idle_sessions_are_archived_and_restored(tmp_path):
+    """Test that sessions past the rollover window are gzipped and can be reopened."""
+    old = Session(session_dir=str(tmp_path), session_name="old")
+    old.add_interaction("Old task", "x" * 5000)
+    old.close()
+    age(old.current_session, 7200)
+    current = Session(session_dir=str(tmp_path), session_name="current")
+
+    dry_run = SessionRetention(str(tmp_path)).collect(dry_run=True)
+    assert old.current_session.exists()
+    report = SessionRetention(str(tmp_path)).collect()
+
+    assert report["archived"] == 1 and report["bytes_reclaimed"] > 0
+    assert dry_run["bytes_reclaimed"] == report["bytes_reclaimed"]
+    assert not old.current_session.exists()
+    assert (tmp_path / "archive" / "session_old.jsonl.gz").exists()
+    assert current.current_session.exists()
+
+    reopened = Session(session_dir=str(tmp_path), session_name="old")
+    assert reopened.history[0]["task"] == "Old task"
+    assert not (tmp_path / "archive" / "session_old.jsonl.gz").exists()
+
+
+def test_open_sessions_are_not_archived(tmp_path):
+    """Test a session still open in a process is kept however long it is idle."""
+    shell = Session(session_dir=str(tmp_path), session_name="shell")
+    shell.add_interaction("Early task", "Response")
+    age(shell.current_session, 7200)
+    (tmp_path / "latest_session").unlink()
+
+    assert SessionRetention(str(tmp_path)).collect()["archived"] == 0
+    shell.add_interaction("Later task", "Response")
+    assert [h["task"] for h in Session(str(tmp_path), session_name="shell").history] == ["Early task", "Later task"]
+
+    shell.close()
+    age(shell.current_session, 7200)
+    (tmp_path / "latest_session").unlink()
+    assert SessionRetention(str(tmp_path)).collect()["archived"] == 1
+    assert not (tmp_path / "session_shell.jsonl.lock").exists()
+
+
+def test_batch_session_directories_are_pruned(tmp_path):
+    """Test the sessions of batch runs are archived, pruned and their directory removed."""
+    batch_dir = tmp_path / "batch_20240101_000000"
+    for name in ("1-a", "2-b"):
+        session = Session(session_dir=str(batch_dir), session_name=name)
+        session.add_interaction("Task", "Response")
+        session.close()
+        age(session.current_session, 7200)
+
+    report = SessionRetention(str(tmp_path)).collect()
+    assert report["archived"] == 2
+    assert sorted(p.name for p in (batch_dir / "archive").iterdir()) == [
+        "session_1-a.jsonl.gz", "session_2-b.jsonl.gz"
+    ]
+
+    report = SessionRetention(str(tmp_path), max_sessions=0).collect()
+    assert report["deleted_sessions"] == 2
+    assert not batch_dir.exists()
+
+
+def test_archives_pruned_by_age_and_count(tmp_path):
+    """Test that the oldest archives go once past the age or count limit."""
+    for i in range(5):
+        session = Session(session_dir=str(tmp_path), session_name=f"s{i}")
+        session.close()
+        age(session.current_session, 7200 + (5 - i) * 86400)
+    (tmp_path / "latest_session").unlink()
+    SessionRetention(str(tmp_path)).collect()
+
+    report = SessionRetention(str(tmp_path), max_age_days=4.5, max_sessions=3).collect(dry_run=True)
+    assert report["deleted_sessions"] == 2
+    assert len(list((tmp_path / "archive").iterdir())) == 5
+
+    SessionRetention(str(tmp_path), max_age_days=4.5, max_sessions=3).collect()
+    remaining = sorted(p.name for p in (tmp_path / "archive").iterdir())
+    assert remaining == ["session_s2.jsonl.gz", "session_s3.jsonl.gz", "session_s4.jsonl.gz"]
+
+
+def test_artifacts_evicted_least_recently_used(tmp_path):
+    """Test artifact eviction under the size limit."""
+    artifacts = tmp_path / "artifacts"
+    artifacts.mkdir()
+    for i, name in enumerate(["a.txt", "b.txt", "c.txt"]):
+        (artifacts / name).write_text("x" * 100)
+        age(artifacts / name, (3 - i) * 100)
+
+    report = SessionRetention(str(tmp_path), artifacts_max_bytes=250).collect()
+    assert report["evicted_artifacts"] == 1
+    assert sorted(p.name for p in artifacts.iterdir()) == ["b.txt", "c.txt"]
+
+
+def test_sessions_gc_command(tmp_path):
+    """Test the gc command reports reclaimed bytes."""
+    session = Session(session_dir=str(tmp_path), session_name="old")
+    session.close()
+    age(session.current_session, 7200)
+    (tmp_path / "latest_session").unlink()
+
+    result = runner.invoke(app, ["sessions", "gc", "--session-dir", str(tmp_path)])
+    assert result.exit_code == 0
+    assert "Reclaimed" in result.stdout and "1 sessions archived" in result.stdout
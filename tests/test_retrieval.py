@@ -0,0 +1,82 @@
+from kazuri.context import ContextBuilder
+from kazuri.retrieval import HistoryIndex, tokenize
+from kazuri.session import Session
+
+TOPICS = ["database migration", "css layout", "unit tests", "docker image", "logging setup"]
+
+
+def make_history(count):
+    return [{
+        "timestamp": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}",
+        "task": f"Help with the {TOPICS[i % len(TOPICS)]} (step {i})",
+        "response": f"Here is how to handle the {TOPICS[i % len(TOPICS)]}.",
+        "tool_uses": []
+    } for i in range(count)]
+
+
+def test_tokenize_splits_identifiers():
+    """Test identifiers are split into searchable terms."""
+    assert tokenize("parse_tool_calls ToolCallParser x") == [
+        "parse", "tool", "calls", "tool", "call", "parser"
+    ]
+
+
+def test_search_ranks_relevant_turns():
+    """Test BM25 ranking and the position cutoff."""
+    index = HistoryIndex(make_history(20))
+    results = index.search("fix the docker image build", k=3)
+    assert [doc % 5 for doc, _ in results] == [3, 3, 3]
+    assert results[0][1] >= results[-1][1] > 0
+    assert all(doc < 10 for doc, _ in index.search("docker", k=10, before=10))
+    assert index.search("unrelated words", k=3) == []
+
+
+def test_context_pulls_in_relevant_older_turns():
+    """Test the builder keeps the newest turns plus the relevant ones."""
+    history = make_history(50)
+    builder = ContextBuilder(max_turns=4, recent_turns=1)
+    summary, messages = builder.build(history, query="css layout is broken", index=HistoryIndex(history))
+
+    tasks = [m["content"] for m in messages if m["role"] == "user"]
+    assert tasks[-1] == history[-1]["task"]
+    assert all("css layout" in task for task in tasks[:-1])
+    assert len(tasks) == 4
+    # Chronological order is kept
+    steps = [int(task.rsplit(" ", 1)[1].rstrip(")")) for task in tasks]
+    assert steps == sorted(steps)
+    assert summary
+
+
+def test_session_index_updates_incrementally(tmp_path):
+    """Test add_interaction extends an existing index instead of rebuilding it."""
+    session = Session(session_dir=str(tmp_path))
+    session.add_interaction("Configure the logging setup", "Done")
+    index = session.get_history_index()
+    session.add_interaction("Write unit tests", "Done")
+    assert session.get_history_index() is index
+    assert [doc for doc, _ in index.search("unit tests", k=1)] == [1]
+
+    session.clear_history()
+    assert len(session.get_history_index()) == 0
+
+
+def test_session_index_covers_a_recent_window(tmp_path, monkeypatch):
+    """Test only the most recent interactions are read into the index."""
+    from kazuri import session as session_module
+    monkeypatch.setattr(session_module, "HISTORY_INDEX_WINDOW", 10)
+    session = Session(session_dir=str(tmp_path))
+    for interaction in make_history(30):
+        session.add_interaction(interaction["task"], interaction["response"])
+    session.flush()
+
+    reopened = Session(session_dir=str(tmp_path))
+    assert reopened.current_session == session.current_session
+    index = reopened.get_history_index()
+    assert (index.start, index.end) == (20, 30)
+    assert all(20 <= doc < 30 for doc, _ in index.search("docker image", k=10))
+
+    builder = ContextBuilder(max_turns=3, recent_turns=1)
+    _, messages = builder.build(reopened.history, query="docker image", index=index)
+    tasks = [m["content"] for m in messages if m["role"] == "user"]
+    assert tasks[-1] == "Help with the logging setup (step 29)"
+    assert all("docker image" in task for task in tasks[:-1]) and len(tasks) == 3
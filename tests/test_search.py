@@ -0,0 +1,144 @@
+import pytest
+from kazuri.ignore import IgnoreRules, walk_files
+from kazuri.search import LineIndex, search_files
+from kazuri.tools import ToolManager
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create a small repository with ignored and binary files."""
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config").write_text("needle in git")
+    (tmp_path / ".gitignore").write_text("*.log\nbuild/\n!keep.log\n/top_only.txt\n")
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "a.py").write_text("one\ntwo needle\nthree\nfour\nfive needle\n")
+    (tmp_path / "src" / "pkg" / "b.txt").write_text("needle\n")
+    (tmp_path / "src" / ".gitignore").write_text("generated_*.py\n")
+    (tmp_path / "src" / "generated_x.py").write_text("needle\n")
+    (tmp_path / "src" / "top_only.txt").write_text("needle\n")
+    (tmp_path / "top_only.txt").write_text("needle\n")
+    (tmp_path / "debug.log").write_text("needle\n")
+    (tmp_path / "keep.log").write_text("needle\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "out.py").write_text("needle\n")
+    (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+    (tmp_path / "node_modules" / "dep" / "index.js").write_text("needle\n")
+    (tmp_path / "env").mkdir()
+    (tmp_path / "env" / "pyvenv.cfg").write_text("home = /usr\n")
+    (tmp_path / "env" / "site.py").write_text("needle\n")
+    (tmp_path / "image.bin").write_bytes(b"\x89PNG\0\0needle")
+    return tmp_path
+
+
+def test_ignore_rules():
+    """Test gitignore pattern semantics."""
+    rules = IgnoreRules("", ["# comment", "*.pyc", "/dist", "docs/**/*.tmp", "cache/", "!important.pyc"])
+    assert rules.match("a/b/c.pyc", False) is True
+    assert rules.match("important.pyc", False) is False
+    assert rules.match("dist", True) is True
+    assert rules.match("sub/dist", True) is None
+    assert rules.match("docs/x/y/z.tmp", False) is True
+    assert rules.match("cache", True) is True
+    assert rules.match("cache", False) is None
+    nested = IgnoreRules("src", ["*.gen"])
+    assert nested.match("src/deep/x.gen", False) is True
+    assert nested.match("other/x.gen", False) is None
+
+
+def test_walk_skips_ignored_and_excluded(tree):
+    """Test the walker honors .gitignore files and default excludes."""
+    files = [rel for _, rel in walk_files(str(tree))]
+    assert files == [
+        ".gitignore", "image.bin", "keep.log",
+        "src/.gitignore", "src/top_only.txt", "src/pkg/a.py", "src/pkg/b.txt"
+    ]
+    # Rules from the repository top apply when walking a subdirectory
+    assert [rel for _, rel in walk_files(str(tree / "src"))] == [
+        ".gitignore", "top_only.txt", "pkg/a.py", "pkg/b.txt"
+    ]
+    assert len([rel for _, rel in walk_files(str(tree), use_ignore_files=False)]) == 11
+
+
+@pytest.mark.parametrize("workers,executor", [(1, "thread"), (4, "thread"), (2, "process")])
+def test_search_files(tree, workers, executor):
+    """Test matches, line numbers and context, sequentially and in pools."""
+    results, truncated = search_files(str(tree), r"needle", workers=workers, executor=executor)
+    assert not truncated
+    assert [(r["file"][len(str(tree)) + 1:], r["line"]) for r in results] == [
+        ("keep.log", 1), ("src/top_only.txt", 1), ("src/pkg/a.py", 2), ("src/pkg/a.py", 5), ("src/pkg/b.txt", 1)
+    ]
+    assert results[3]["context"] == "three\nfour\nfive needle\n"
+    assert results[2]["context"] == "one\ntwo needle\nthree\nfour"
+
+
+def test_search_max_results_and_file_pattern(tree):
+    """Test stopping early and filtering by file name."""
+    results, truncated = search_files(str(tree), r"needle", max_results=2, workers=4)
+    assert truncated and len(results) == 2
+    for workers in (1, 4):
+        results, truncated = search_files(str(tree), r"needle", max_results=5, workers=workers)
+        assert len(results) == 5 and not truncated
+    results, _ = search_files(str(tree), r"needle", file_pattern="*.py")
+    assert {r["file"].rsplit("/", 1)[-1] for r in results} == {"a.py"}
+    results, _ = search_files(str(tree), r"needle", file_pattern="pkg/*.txt")
+    assert len(results) == 1
+
+
+def test_tool_manager_search_files(tree):
+    """Test the tool wrapper result shape and invalid patterns."""
+    manager = ToolManager()
+    result = manager.search_files(str(tree), r"t\w+ needle", max_results=10)
+    assert result["success"] and result["truncated"] is False
+    assert [r["match"] for r in result["results"]] == ["two needle"]
+    assert manager.search_files(str(tree), r"(")["success"] is False
+
+
+def test_line_index():
+    """Test line numbers and context slices from the line-offset table."""
+    content = "one\ntwo needle\nthree\nfour\nfive needle\n"
+    line_index = LineIndex(content)
+    assert len(line_index) == 6
+    assert [line_index.line_number(content.index(word)) for word in ("one", "two", "five")] == [1, 2, 5]
+    assert line_index.line_number(3) == 1  # the newline belongs to its line
+    assert line_index.context(1) == "one\ntwo needle\nthree"
+    assert line_index.context(5) == "three\nfour\nfive needle\n"
+    assert line_index.lines(2, 3) == "two needle\nthree"
+    assert line_index.lines(7, 9) == ""
+
+
+def test_list_code_definitions_lines(tmp_path, monkeypatch):
+    """Test definition line numbers."""
+    monkeypatch.setenv("KAZURI_REPO_MAP_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "mod.py").write_text("import os\n\nclass A:\n    def run(self):\n        x = 1\n")
+    result = ToolManager().list_code_definitions(str(tmp_path / "mod.py"))
+    assert [(d["type"], d["name"], d["line"]) for d in result["definitions"]] == [
+        ("class", "A", 3), ("method", "A.run", 4)
+    ]
+
+
+def test_walk_depth_and_resume(tree):
+    """Test max_depth and resuming a walk after a file."""
+    assert [rel for _, rel in walk_files(str(tree), max_depth=0)] == [".gitignore", "image.bin", "keep.log"]
+    assert [rel for _, rel in walk_files(str(tree), max_depth=1)][-2:] == ["src/.gitignore", "src/top_only.txt"]
+    full = [rel for _, rel in walk_files(str(tree))]
+    for i, rel in enumerate(full):
+        assert [r for _, r in walk_files(str(tree), start_after=rel)] == full[i + 1:]
+
+
+def test_list_files_pagination(tree):
+    """Test list_files pages through a recursive listing with its cursor."""
+    manager = ToolManager()
+    assert manager.list_files(str(tree))["files"] == [".gitignore", "image.bin", "keep.log"]
+    pages, cursor = [], None
+    while True:
+        result = manager.list_files(str(tree), recursive=True, limit=3, cursor=cursor)
+        pages.append(result["files"])
+        if not result["truncated"]:
+            break
+        cursor = result["next_cursor"]
+    assert pages == [
+        [".gitignore", "image.bin", "keep.log"],
+        ["src/.gitignore", "src/top_only.txt", "src/pkg/a.py"],
+        ["src/pkg/b.txt"]
+    ]
+    assert manager.list_files(str(tree / "missing"))["success"] is False
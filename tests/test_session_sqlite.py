@@ -0,0 +1,132 @@
+import json
+import threading
+import pytest
+from kazuri.session import Session, open_session
+from kazuri.session_sqlite import SQLiteSession
+
+
+@pytest.fixture
+def session(tmp_path):
+    """Create a SQLite-backed session."""
+    session = SQLiteSession(session_dir=str(tmp_path))
+    yield session
+    session.close()
+
+
+def test_open_session_backend(tmp_path, monkeypatch):
+    """Test choosing the backend explicitly and from the environment."""
+    assert type(open_session(str(tmp_path / "a"))) is Session
+    monkeypatch.setenv("KAZURI_SESSION_BACKEND", "sqlite")
+    assert isinstance(open_session(str(tmp_path / "b")), SQLiteSession)
+    with pytest.raises(ValueError):
+        open_session(str(tmp_path / "c"), backend="redis")
+
+
+def test_sqlite_session_api(session, tmp_path):
+    """Test that the SQLite backend behaves like the file backend."""
+    assert session.get_last_response() is None
+    assert session.get_last_tool_uses() == []
+
+    session.add_interaction("Task 1", "Response 1")
+    session.add_interaction("Task 2", "Response 2", [
+        {"tool": "read_file", "parameters": {"path": "a.py"}, "result": {"success": True}},
+        "invalid tool use"
+    ])
+    session.save_generated_content("print('hi')", "hi.py", "Greeting", "code")
+    session.save_generated_content("a: 1", "conf.yaml", content_type="config")
+
+    assert [h["task"] for h in session.history] == ["Task 1", "Task 2"]
+    assert session.get_last_response() == "Response 2"
+    assert session.get_last_tool_uses() == [
+        {"tool": "read_file", "parameters": {"path": "a.py"}, "result": {"success": True}}
+    ]
+    assert [f["original_name"] for f in session.list_saved_files("code")] == ["hi.py"]
+    assert len(session.list_saved_files()) == 2
+    assert "Human: Task 2" in session.get_recent_context(limit=1)
+    assert "Task 1" not in session.get_recent_context(limit=1)
+
+    info = session.get_session_info()
+    assert info["interaction_count"] == 2 and info["saved_files_count"] == 2
+    assert info["start_time"] == session.history[0]["timestamp"]
+
+    # Reopening resumes the most recent session
+    reopened = SQLiteSession(session_dir=str(tmp_path))
+    assert reopened.session_name == session.session_name
+    assert len(reopened.history) == 2
+
+    session.clear_history()
+    assert reopened.history == []
+    assert len(reopened.saved_files) == 2
+
+
+def test_sqlite_session_export_import(session, tmp_path):
+    """Test round-tripping a session through export and import."""
+    session.add_interaction("Task 1", "Response 1")
+    export_file = tmp_path / "export.json"
+    session.export_session(str(export_file))
+    assert json.loads(export_file.read_text())["session_info"]["interaction_count"] == 1
+
+    other = SQLiteSession(session_dir=str(tmp_path), session_name="other")
+    other.import_session(str(export_file))
+    assert other.get_last_response() == "Response 1"
+    assert session.get_session_info()["interaction_count"] == 1
+
+
+def test_sqlite_session_iter_history_pages(session, monkeypatch):
+    """Test iterating over the history a page at a time."""
+    monkeypatch.setattr("kazuri.session_sqlite.HISTORY_PAGE_SIZE", 3)
+    for i in range(10):
+        session.add_interaction(f"Task {i}", "ok", [{"tool": "t", "result": i}])
+    assert [h["tool_uses"][0]["result"] for h in session.iter_history()] == list(range(10))
+    assert [h["task"] for h in session.iter_history(-2)] == ["Task 8", "Task 9"]
+    assert [h["task"] for h in session.iter_history(2, 6)] == ["Task 2", "Task 3", "Task 4", "Task 5"]
+
+
+def test_sqlite_history_view_reads_only_what_is_used(session, tmp_path):
+    """Test the history view queries by count and offset, per session."""
+    other = SQLiteSession(session_dir=str(tmp_path), session_name="other")
+    for i in range(6):
+        session.add_interaction(f"Task {i}", "ok", [{"tool": "t", "result": i}])
+        other.add_interaction(f"Other {i}", "ok", [{"tool": "t", "result": -i}])
+
+    statements = []
+    session._conn.set_trace_callback(statements.append)
+    history = session.history
+    assert len(history) == 6
+    assert history[-1]["tool_uses"] == [{"tool": "t", "parameters": {}, "result": 5}]
+    assert [h["task"] for h in history[2:4]] == ["Task 2", "Task 3"]
+    session._conn.set_trace_callback(None)
+    assert all("LIMIT" in sql or "COUNT" in sql or "tool_uses" in sql for sql in statements)
+    assert [h["tool_uses"][0]["result"] for h in other.history] == [0, -1, -2, -3, -4, -5]
+    other.close()
+
+
+def test_sqlite_session_concurrent_writers(tmp_path):
+    """Test that separate connections appending to one session lose nothing."""
+    def worker(n):
+        writer = SQLiteSession(session_dir=str(tmp_path), session_name="shared")
+        for i in range(20):
+            writer.add_interaction(f"worker {n} task {i}", "ok", [{"tool": "t", "result": i}])
+        writer.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    session = SQLiteSession(session_dir=str(tmp_path), session_name="shared")
+    history = session.history
+    assert len(history) == 120
+    assert all(len(h["tool_uses"]) == 1 for h in history)
+    assert len({h["task"] for h in history}) == 120
+
+
+def test_pending_records_are_per_instance(tmp_path, session):
+    """Test each session buffers its own write-behind records."""
+    first = Session(session_dir=str(tmp_path / "a"), write_behind=True)
+    second = Session(session_dir=str(tmp_path / "b"), write_behind=True)
+    first.add_interaction("Task", "Response")
+    assert first._pending and not second._pending
+    assert session._pending == [] and session._pending is not first._pending
+    first.flush()
@@ -0,0 +1,155 @@
+from kazuri import symbols
+from kazuri.symbols import SymbolIndex, parse_javascript, parse_python, parse_symbols, register_parser
+from kazuri.tools import ToolManager
+
+PYTHON_SOURCE = '''\
+import os
+from typing import TYPE_CHECKING
+
+VERSION = "1.0"
+if TYPE_CHECKING:
+    Alias = int
+
+class Base:
+    limit: int = 3
+
+    def run(self, x=1):
+        y = x == 2
+        return call(key=y)
+
+    class Inner:
+        async def fetch(self):
+            pass
+
+def helper(a, b):
+    total = a + b
+    return total
+'''
+
+JS_SOURCE = '''\
+import x from "y";
+export const API_URL = "https://example.com"; // { not a brace
+export function fetchData(url) {
+  const local = 1;
+  return local;
+}
+const handler = async (event) => {
+  if (event) { return 1; }
+};
+export class Store extends Base {
+  constructor() { super(); }
+  async load(id: string): Promise<void> {
+    for (const item of items) {}
+  }
+  static get size() { return 0; }
+}
+export interface Options { verbose: boolean }
+type Id = string;
+'''
+
+
+def test_parse_python():
+    """Test AST symbols skip locals, keyword arguments and comparisons."""
+    assert [(s["type"], s["name"], s["line"], s["end_line"]) for s in parse_python(PYTHON_SOURCE)] == [
+        ("variable", "VERSION", 4, 4),
+        ("variable", "Alias", 6, 6),
+        ("class", "Base", 8, 17),
+        ("variable", "Base.limit", 9, 9),
+        ("method", "Base.run", 11, 13),
+        ("class", "Base.Inner", 15, 17),
+        ("method", "Base.Inner.fetch", 16, 17),
+        ("function", "helper", 19, 21),
+    ]
+    # Python that does not parse falls back to def and class lines
+    assert [s["name"] for s in parse_symbols("old.py", "class A:\n    def f(self):\n        print 'x'\n")] == ["A", "f"]
+
+
+def test_parse_javascript():
+    """Test the line-based JavaScript and TypeScript scanner."""
+    assert [(s["type"], s["name"], s["line"]) for s in parse_javascript(JS_SOURCE)] == [
+        ("variable", "API_URL", 2),
+        ("function", "fetchData", 3),
+        ("function", "handler", 7),
+        ("class", "Store", 10),
+        ("method", "Store.load", 12),
+        ("method", "Store.size", 15),
+        ("interface", "Options", 17),
+        ("type", "Id", 18),
+    ]
+
+
+def test_symbol_index_caches_by_content(tmp_path, monkeypatch):
+    """Test directory listing, caching and invalidation."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text(PYTHON_SOURCE)
+    (tmp_path / "src" / "copy.py").write_text(PYTHON_SOURCE)
+    (tmp_path / "src" / "app.ts").write_text(JS_SOURCE)
+    (tmp_path / "notes.txt").write_text("def nothing(): pass\n")
+    calls = []
+    parse_chunk = symbols._parse_chunk
+    monkeypatch.setattr(symbols, "_parse_chunk", lambda files: calls.extend(files) or parse_chunk(files))
+
+    with SymbolIndex(str(tmp_path / "cache" / "symbols.db")) as index:
+        result = index.symbols(str(tmp_path / "src"))
+        assert list(result) == ["a.py", "app.ts", "copy.py"]
+        # Identical files are parsed once
+        assert len(calls) == 2
+        assert index.symbols(str(tmp_path / "src")) == result
+        assert len(calls) == 2
+
+        (tmp_path / "src" / "a.py").write_text("def changed():\n    pass\n")
+        assert [s["name"] for s in index.symbols(str(tmp_path / "src"))["a.py"]] == ["changed"]
+        assert len(calls) == 3
+        assert list(index.symbols(str(tmp_path / "src" / "app.ts"))) == ["app.ts"]
+        entries = index.entries_for([(str(tmp_path / "src" / "copy.py"), "copy")])
+        assert "TYPE_CHECKING" in entries["copy"]["identifiers"]
+        assert len(calls) == 3
+
+
+def test_register_parser_and_tool(tmp_path, monkeypatch):
+    """Test a registered parser and the directory form of the tool."""
+    monkeypatch.setenv("KAZURI_REPO_MAP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(symbols, "PARSERS", dict(symbols.PARSERS))
+    register_parser([".sql"], lambda source: [
+        {"type": "table", "name": line.split()[2], "line": i, "end_line": i}
+        for i, line in enumerate(source.split("\n"), 1) if line.startswith("CREATE TABLE")
+    ])
+    (tmp_path / "schema.sql").write_text("-- schema\nCREATE TABLE users (id int);\n")
+    (tmp_path / "mod.py").write_text("def f():\n    pass\n")
+    result = ToolManager().list_code_definitions(str(tmp_path))
+    assert result["success"]
+    assert [(d["file"], d["type"], d["name"]) for d in result["definitions"]] == [
+        ("mod.py", "function", "f"), ("schema.sql", "table", "users")
+    ]
+
+
+def test_symbol_index_process_pool(tmp_path, monkeypatch):
+    """Test parsing uncached files in a process pool gives the same symbols."""
+    monkeypatch.setattr(symbols, "POOL_MIN_FILES", 1)
+    for i in range(6):
+        (tmp_path / f"m{i}.py").write_text(f"def f{i}():\n    pass\n")
+    with SymbolIndex(str(tmp_path / "pool.db"), workers=2) as index:
+        result = index.symbols(str(tmp_path))
+    assert {rel: [s["name"] for s in syms] for rel, syms in result.items()} == {
+        f"m{i}.py": [f"f{i}"] for i in range(6)
+    }
+
+
+def test_symbol_index_skips_pool_while_threads_run(tmp_path, monkeypatch):
+    """Test the pool is not forked from a process running other threads."""
+    monkeypatch.setattr(symbols, "POOL_MIN_FILES", 1)
+    monkeypatch.setattr(symbols, "ProcessPoolExecutor", None)
+    monkeypatch.setattr(symbols.threading, "active_count", lambda: 2)
+    (tmp_path / "m.py").write_text("def f():\n    pass\n")
+    with SymbolIndex(str(tmp_path / "pool.db"), workers=2) as index:
+        assert [s["name"] for s in index.symbols(str(tmp_path))["m.py"]] == ["f"]
+
+
+def test_default_cache_is_outside_the_working_directory(tmp_path, monkeypatch):
+    """Test the symbol cache defaults to the user cache directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("KAZURI_REPO_MAP_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    with SymbolIndex() as index:
+        assert index.cache_path.parent.parent == tmp_path / "xdg" / "kazuri" / "repomap"
+    assert not (tmp_path / ".kazuri_cache").exists()
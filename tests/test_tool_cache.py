@@ -0,0 +1,102 @@
+import os
+import time
+
+from kazuri.tool_cache import ToolResultCache
+from kazuri.tools import ToolManager
+
+
+def _backdate(*paths):
+    """Move modification times out of the window in which they are not trusted."""
+    old = time.time() - 60
+    for path in paths:
+        os.utime(path, (old, old))
+
+
+def _manager(root, monkeypatch):
+    monkeypatch.chdir(root)
+    monkeypatch.setenv("KAZURI_REPO_MAP_CACHE_DIR", str(root / ".kazuri_cache"))
+    monkeypatch.setenv("KAZURI_SEARCH_INDEX", "0")
+    return ToolManager()
+
+
+def test_read_file_hit_and_stat_invalidation(tmp_path, monkeypatch):
+    target = tmp_path / "a.txt"
+    target.write_text("one\n")
+    _backdate(target)
+    manager = _manager(tmp_path, monkeypatch)
+
+    assert manager.read_file("a.txt")["content"] == "one\n"
+    first = manager.read_file("a.txt")
+    first["content"] = "mutated"
+    assert manager.read_file("a.txt")["content"] == "one\n"
+    assert manager.result_cache.stats()["hits"] == 2
+
+    # Edited behind the tools' back
+    target.write_text("two, longer\n")
+    assert manager.read_file("a.txt")["content"] == "two, longer\n"
+    assert manager.result_cache.stats()["stale"] == 1
+
+
+def test_write_to_file_invalidates_reads_and_listings(tmp_path, monkeypatch):
+    (tmp_path / "src").mkdir()
+    target = tmp_path / "src" / "m.py"
+    target.write_text("def f():\n    return 1\n")
+    _backdate(target, tmp_path / "src", tmp_path)
+    manager = _manager(tmp_path, monkeypatch)
+
+    assert manager.list_files(".", recursive=True)["files"] == ["src/m.py"]
+    assert manager.search_files(".", r"return \d")["results"][0]["file"].endswith("m.py")
+    assert [d["name"] for d in manager.list_code_definitions("src")["definitions"]] == ["f"]
+    assert manager.read_file("src/m.py")["success"]
+    assert manager.result_cache.stats()["entries"] == 4
+
+    assert manager.write_to_file("src/m.py", "def g():\n    pass\n")["success"]
+    assert manager.result_cache.stats()["entries"] == 0
+    assert manager.read_file("src/m.py")["content"] == "def g():\n    pass\n"
+    assert manager.search_files(".", r"return \d")["results"] == []
+    assert [d["name"] for d in manager.list_code_definitions("src")["definitions"]] == ["g"]
+
+
+def test_new_file_changes_directory_listing(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_text("a")
+    _backdate(tmp_path / "a.txt", tmp_path)
+    manager = _manager(tmp_path, monkeypatch)
+
+    assert manager.list_files(".")["files"] == ["a.txt"]
+    (tmp_path / "b.txt").write_text("b")
+    assert manager.list_files(".")["files"] == ["a.txt", "b.txt"]
+
+
+def test_recent_and_failed_results_are_not_cached(tmp_path, monkeypatch):
+    (tmp_path / "fresh.txt").write_text("new")
+    manager = _manager(tmp_path, monkeypatch)
+
+    manager.read_file("fresh.txt")
+    manager.read_file("missing.txt")
+    assert manager.result_cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_and_stats(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"{i}.txt"
+        path.write_text(str(i))
+        paths.append(path)
+    _backdate(*paths)
+    cache = ToolResultCache(max_bytes=300)
+
+    result = {"success": True, "content": "x" * 80, "error": None}
+
+    for i, path in enumerate(paths[:2]):
+        stat = os.stat(path)
+        assert cache.put(cache.make_key("read_file", {"path": i}), result, {str(path): (stat.st_mtime_ns, stat.st_size)})
+    assert cache.get(cache.make_key("read_file", {"path": 0})) is not None
+
+    stat = os.stat(paths[2])
+    cache.put(cache.make_key("read_file", {"path": 2}), result, {str(paths[2]): (stat.st_mtime_ns, stat.st_size)})
+    assert cache.get(cache.make_key("read_file", {"path": 1})) is None
+    assert cache.get(cache.make_key("read_file", {"path": 0})) is not None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (2, 1, 1, 2)
+    assert stats["bytes"] <= 300
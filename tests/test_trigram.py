@@ -0,0 +1,66 @@
+import os
+from kazuri import trigram
+from kazuri.search import search_files
+from kazuri.trigram import TrigramIndex, pattern_query
+
+
+def make_tree(root):
+    (root / ".gitignore").write_text("build/\n")
+    (root / "src").mkdir()
+    (root / "src" / "a.py").write_text("def handle_click(event):\n    return event\n")
+    (root / "src" / "b.py").write_text("def helper(x):\n    return x\n")
+    (root / "c.txt").write_text("Handle_Click happens here\n")
+    (root / "build").mkdir()
+    (root / "build" / "out.py").write_text("def handle_click(event):\n")
+    # Files modified just before an update are re-read on the next one
+    for path in root.rglob("*"):
+        os.utime(path, (1_000_000, 1_000_000))
+
+
+def test_pattern_query():
+    """Test extraction of the literals a match must contain."""
+    assert pattern_query(r"def handle_\w+\(event\)") == ("and", ["def handle_", "(event)"])
+    assert pattern_query(r"class (Foo|Barr)Bar") == ("and", ["class ", ("or", ["Foo", "Barr"]), "Bar"])
+    assert pattern_query(r"^import os$") == "import os"
+    # No usable literals: a short literal, an optional part or a short branch
+    assert pattern_query(r"\w+\s*=") is None
+    assert pattern_query(r"(?:abcd)?x") is None
+    assert pattern_query(r"abcd|x") is None
+    # Under IGNORECASE, "i" also matches the dotless i, so it splits literals
+    assert pattern_query(r"(?i)handle_click") == "handle_cl"
+
+
+def test_index_candidates_and_updates(tmp_path, monkeypatch):
+    """Test candidate narrowing and incremental updates by mtime and size."""
+    make_tree(tmp_path)
+    with TrigramIndex(str(tmp_path)) as index:
+        files, counts = index.update()
+        assert counts == {"added": 4, "updated": 0, "removed": 0, "unchanged": 0}
+        assert [rel for _, rel, _ in files] == [".gitignore", "c.txt", "src/a.py", "src/b.py"]
+        assert [rel for _, rel in index.candidates(str(tmp_path), r"handle_\w+")] == ["c.txt", "src/a.py"]
+        assert [rel for _, rel in index.candidates(str(tmp_path / "src"), r"def helper")] == ["b.py"]
+        assert index.candidates(str(tmp_path), r"\w+") is None
+
+        (tmp_path / "src" / "b.py").write_text("def handle_key(event):\n")
+        os.utime(tmp_path / "src" / "b.py", (2_000_000, 2_000_000))
+        (tmp_path / "c.txt").unlink()
+        _, counts = index.update()
+        assert counts == {"added": 0, "updated": 1, "removed": 1, "unchanged": 2}
+        assert [rel for _, rel in index.candidates(str(tmp_path), r"handle_\w+")] == ["src/a.py", "src/b.py"]
+        assert [rel for _, rel in index.candidates(str(tmp_path), r"def helper")] == []
+        assert index.status()["files"] == 3 and index.status()["stale_files"] == 0
+
+        # Compaction merges the chunks and keeps the same answers
+        monkeypatch.setattr(trigram, "MAX_CHUNKS", 0)
+        index._maybe_compact()
+        assert [rel for _, rel in index.candidates(str(tmp_path), r"handle_\w+")] == ["src/a.py", "src/b.py"]
+
+
+def test_search_files_uses_index(tmp_path):
+    """Test search results are the same with and without the index."""
+    make_tree(tmp_path)
+    TrigramIndex(str(tmp_path)).update()
+    for pattern in (r"handle_\w+", r"(?i)HANDLE_CLICK", r"\w+\(x\)", r"return \w+"):
+        indexed, _ = search_files(str(tmp_path), pattern, workers=1)
+        scanned, _ = search_files(str(tmp_path), pattern, workers=1, use_index=False)
+        assert indexed == scanned